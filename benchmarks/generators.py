@@ -0,0 +1,123 @@
+"""
+Geradores de dados sintéticos no formato bruto dos relatórios do Cognos, usados pelos benchmarks
+
+O cabeçalho é montado a partir do PIPELINE_CONFIG (remove_columns + chaves do rename_columns), então o
+benchmark passa pelo mesmo caminho de leitura, rename e tipagem dos arquivos reais
+
+Classes e funções:
+REPORTS: Relatórios cobertos pelo benchmark -> chave no PIPELINE_CONFIG
+
+generate_report(): Gera um DataFrame bruto (colunas originais, valores em texto) de um relatório
+
+write_report_csv(): Grava o relatório sintético em disco, em blocos, no encoding e separador do relatório
+"""
+
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from config.pipeline_config import PIPELINE_CONFIG
+from config.elements import ELEMENTS
+from utils.classification import SETOR_RULES
+
+REPORTS = { # <-- nome do relatório no benchmark/paths -> chave no PIPELINE_CONFIG
+    'olpn': 'olpn',
+    'picking': 'picking',
+    'packing': 'packing',
+    'loading': 'loading',
+    'putaway': 'putaway',
+    'cancel': 'cancel',
+    'expedicao': 'expedicoes'
+}
+
+POOL_SIZE = 50_000 # <-- valores distintos por coluna de texto/data, amostrados por índice (geração vetorizada)
+BASE_TIMESTAMP = pd.Timestamp('2025-01-01')
+DATETIME_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+TIPOS_PEDIDO = sorted({t for rule in SETOR_RULES for t in rule.tipos_pedido if t} | set(ELEMENTS['ELEMENTS_OLPN']['list_itens']))
+
+SPECIAL_VALUES = { # <-- colunas renomeadas com domínio conhecido
+    'tipo_de_pedido': TIPOS_PEDIDO,
+    'status_olpn': ['Shipped', 'Packed', 'Loaded', 'Picked', 'Allocated'],
+    'filial': ['1200'],
+    'motivo_cancelamento': ['SALDO INSUFICIENTE', 'avaria', 'erro operacional', 'falta ead', 'no show', 'outros'],
+}
+
+def _raw_columns(config: dict) -> list[str]:
+    return list(dict.fromkeys(list(config.get('rename_columns', {})) + list(config.get('remove_columns', []))))
+
+def _column_kind(raw: str, config: dict) -> tuple[str, str]:
+    name = config.get('rename_columns', {}).get(raw, raw)
+
+    if name in config.get('datetime_columns', []):
+        return name, 'datetime'
+    if name == 'box':
+        return name, 'box'
+    if config.get('column_types', {}).get(name) == 'Int64':
+        return name, 'int'
+    return name, 'string'
+
+def _datetime_pool(rng: np.random.Generator) -> np.ndarray:
+    seconds = np.sort(rng.integers(0, 90 * 24 * 3600, POOL_SIZE))
+    return (BASE_TIMESTAMP + pd.to_timedelta(seconds, unit='s')).strftime(DATETIME_FORMAT).to_numpy()
+
+def generate_report(report: str, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Gera n_rows linhas brutas de um relatório
+
+    params:
+    report: str | Relatório (chave do REPORTS)
+    n_rows: int | Quantidade de linhas
+    seed: int = 0 | Semente, garante dados reprodutíveis entre execuções
+    """
+
+    config = PIPELINE_CONFIG[REPORTS.get(report, report)]
+    rng = np.random.default_rng(seed)
+    dt_pool = _datetime_pool(rng)
+
+    data = {}
+    for raw in _raw_columns(config):
+        name, kind = _column_kind(raw, config)
+
+        if kind == 'datetime':
+            data[raw] = dt_pool[rng.integers(0, len(dt_pool), n_rows)]
+        elif kind == 'box':
+            data[raw] = rng.integers(277, 639, n_rows)
+        elif kind == 'int':
+            data[raw] = rng.integers(1, 10_000_000 if name in ('item', 'asn', 'pedido') else 50, n_rows)
+        elif name in SPECIAL_VALUES:
+            pool = np.asarray(SPECIAL_VALUES[name], dtype=object)
+            data[raw] = pool[rng.integers(0, len(pool), n_rows)]
+        else:
+            pool = np.asarray([f'{name.upper()[:3]}{i:08d}' for i in range(POOL_SIZE)], dtype=object)
+            data[raw] = pool[rng.integers(0, POOL_SIZE, n_rows)]
+
+    return pd.DataFrame(data)
+
+def write_report_csv(
+        report: str,
+        n_rows: int,
+        path: str | Path,
+        seed: int = 0,
+        chunk_rows: int = 1_000_000
+) -> Path:
+    """
+    Grava o relatório sintético em blocos de chunk_rows linhas (10M de linhas não cabem folgadas em memória)
+
+    params:
+    report: str | Relatório (chave do REPORTS)
+    n_rows: int | Quantidade total de linhas
+    path: str | Path | Arquivo de saída
+    seed: int = 0 | Semente base, cada bloco usa seed + índice do bloco
+    chunk_rows: int = 1_000_000 | Linhas por bloco
+    """
+
+    config = PIPELINE_CONFIG[REPORTS.get(report, report)]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'w', encoding=config['encoding'], newline='') as f:
+        for i, start in enumerate(range(0, n_rows, chunk_rows)):
+            chunk = generate_report(report, min(chunk_rows, n_rows - start), seed=seed + i)
+            chunk.to_csv(f, sep=config['sep'], index=False, header=(i == 0))
+
+    return path
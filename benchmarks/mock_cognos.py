@@ -0,0 +1,257 @@
+"""
+Servidor local que imita o portal Cognos (viavp-sci.sce.manh.com) para testes de carga da extração
+
+Serve as páginas de prompt com os mesmos ids do config/elements.py (frame rsIFrameManager_1, dv*_ValueComboBox,
+campos de data, listbox de tipos de pedido, botão de confirmação) e, ao confirmar, devolve o relatório
+como download CSV UTF-16 sintético, com atraso de renderização e tamanho configuráveis
+
+Classes e funções:
+mock_links(): Retorna uma cópia do LINKS apontando para o servidor local
+
+MockCognosServer(): Servidor HTTP em thread, pode ser iniciado dentro de testes
+
+Como usar (na raiz do projeto):
+python -m benchmarks.mock_cognos --port 8765 --render-delay 3 --rows 200000
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote
+from html import escape
+import argparse
+import codecs
+import threading
+import time
+from config.pipeline_config import LINKS, PIPELINE_CONFIG
+from config.elements import ELEMENTS, LIST_FILIAL
+from benchmarks.generators import REPORTS, generate_report
+
+REPORT_LINKS = { # <-- relatório -> (chave do LINKS, chave do ELEMENTS)
+    'olpn': ('LOGIN_OLPN', 'ELEMENTS_OLPN'),
+    'picking': ('LOGIN_PICKING', 'ELEMENTS_PICKING'),
+    'packing': ('LOGIN_PACKING', 'ELEMENTS_PACKING'),
+    'loading': ('LOGIN_LOADING', 'ELEMENTS_LOADING'),
+    'putaway': ('LOGIN_PUTAWAY', 'ELEMENTS_PUTAWAY'),
+    'cancel': ('LOGIN_CANCEL', 'ELEMENTS_CANCEL'),
+    'expedicao': ('LOGIN_EXPEDICAO', 'ELEMENTS_EXPEDICAO'),
+    'pendencia_asn': ('LOGIN_PENDENCIA_ASN', 'ELEMENTS_PENDENCIA_ASN'),
+    'recebimento': ('LOGIN_RECEBIMENTO', 'ELEMENTS_RECEBIMENTO'),
+    'estoque_mov': ('LOGIN_ESTOQUE_MOV', 'ELEMENTS_MOV_ESTOQUE'),
+}
+
+STREAM_CHUNK_ROWS = 50_000
+
+def _report_id(url: str) -> str | None:
+    return parse_qs(urlsplit(url).query).get('id', [None])[0]
+
+REPORT_BY_ID = {_report_id(LINKS[link]): report for report, (link, _) in REPORT_LINKS.items()}
+
+def mock_links(base_url: str = 'http://127.0.0.1:8765') -> dict:
+    """
+    Cópia do LINKS com o host do Cognos trocado pelo servidor local (mesmo path e query)
+    """
+    links = {}
+    for key, url in LINKS.items():
+        parts = urlsplit(url)
+        links[key] = f'{base_url}{parts.path}?{parts.query}' if 'sce.manh.com' in parts.netloc else url
+    return links
+
+def _xpath_id(selector: str) -> str:
+    """
+    Extrai o id de seletores xpath do tipo //*[@id="dv52_MultiSelectList"]
+    """
+    if '@id="' in selector:
+        return selector.split('@id="', 1)[1].split('"', 1)[0]
+    return selector
+
+def _home_page() -> str:
+    login = ELEMENTS['ELEMENTS_LOGIN']
+    return (
+        f'<html><head><title>IBM Cognos Analytics</title></head><body>'
+        f'<div id="{login["element_banner"]}" class="{login["element_title"]}">IBM Cognos Analytics</div>'
+        f'<div class="{login["element_title_v2"]}"></div></body></html>'
+    )
+
+def _outer_page(report: str, query: str) -> str:
+    frame_id = _xpath_id(ELEMENTS['frame'])
+    return (
+        f'<html><head><title>{escape(report)}</title></head><body>'
+        f'<iframe id="{frame_id}" src="/prompt/{report}?{escape(query)}" style="width:100%;height:95vh"></iframe>'
+        f'</body></html>'
+    )
+
+def _prompt_page(report: str) -> str:
+    elements = ELEMENTS[REPORT_LINKS[report][1]]
+    parts = [f'<html><head><title>{escape(report)}</title></head><body><form id="prompt">']
+
+    options = ''.join(f'<option value="{f}">{f}</option>' for f in LIST_FILIAL)
+    parts.append(f'<select id="{elements["element_filial_id"]}" name="filial" multiple>{options}</select>')
+
+    for key in ('element_dt_start', 'element_dt_end'):
+        if key in elements:
+            parts.append(f'<input type="text" id="{_xpath_id(elements[key])}" name="{key}">')
+
+    if 'element_select_all' in elements:
+        parts.append(f'<a id="{elements["element_select_all"]}" href="#">Selecionar tudo</a>')
+
+    if 'element_listbox' in elements:
+        rows = ''.join(
+            f'<tr role="option" checkboxitem="true" {elements["element_get_item"]}="{escape(item, quote=True)}" '
+            f'{elements["element_get_checked"]}="false"><td>{escape(item)}</td></tr>'
+            for item in elements['list_itens']
+        )
+        parts.append(
+            f'<table id="{_xpath_id(elements["element_listbox"])}"><tbody>{rows}</tbody></table>'
+            '<script>'
+            "document.querySelectorAll('tr[role=option]').forEach(function (row) {"
+            "  row.addEventListener('click', function () {"
+            "    row.setAttribute('aria-checked', row.getAttribute('aria-checked') === 'true' ? 'false' : 'true');"
+            "  });"
+            "});"
+            '</script>'
+        )
+
+    parts.append(f'<button type="button" id="{elements["element_confirm"]}">OK</button>')
+    parts.append(
+        '<script>'
+        f"document.getElementById('{elements['element_confirm']}').addEventListener('click', function () {{"
+        f"  var sel = document.getElementById('{elements['element_filial_id']}');"
+        "  var filiais = Array.from(sel.selectedOptions).map(function (o) { return o.value; }).join(',');"
+        f"  window.top.location.href = '/render/{report}?filial=' + encodeURIComponent(filiais) + window.location.search.replace('?', '&');"
+        "});"
+        '</script></form></body></html>'
+    )
+
+    return ''.join(parts)
+
+class MockCognosServer:
+    """
+    Servidor HTTP do portal falso
+
+    params:
+    host: str = '127.0.0.1' | Interface
+    port: int = 8765 | Porta
+    render_delay: float = 1.0 | Segundos de espera antes do início do download (simula a renderização)
+    rows: int = 10_000 | Linhas do relatório por filial, pode ser sobrescrito por ?rows= na url
+    seed: int = 0 | Semente dos dados sintéticos
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, render_delay: float = 1.0, rows: int = 10_000, seed: int = 0):
+        self.render_delay = render_delay
+        self.rows = rows
+        self.seed = seed
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.base_url = f'http://{host}:{self.httpd.server_address[1]}'
+        self._thread: threading.Thread | None = None
+
+    def _handler_class(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_html(self, body: str):
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+
+                if parts.path.startswith('/bi'):
+                    report = REPORT_BY_ID.get(query.get('id', [None])[0])
+                    self._send_html(_outer_page(report, parts.query) if report else _home_page())
+                elif parts.path.startswith('/prompt/'):
+                    report = parts.path.rsplit('/', 1)[1]
+                    if report not in REPORT_LINKS:
+                        self.send_error(404)
+                        return
+                    self._send_html(_prompt_page(report))
+                elif parts.path.startswith('/render/'):
+                    self._render(parts.path.rsplit('/', 1)[1], query)
+                else:
+                    self.send_error(404)
+
+            def _render(self, report: str, query: dict):
+                filiais = [f for f in query.get('filial', [''])[0].split(',') if f] or LIST_FILIAL[:1]
+                rows = int(query.get('rows', [server.rows])[0])
+                delay = float(query.get('render_delay', [server.render_delay])[0])
+                config_key = REPORTS.get(report, report)
+                config = PIPELINE_CONFIG.get(config_key, PIPELINE_CONFIG['padrao'])
+                generator_key = config_key if config.get('rename_columns') else None # <-- relatórios sem config geram colunas genéricas
+
+                time.sleep(delay)
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/csv; charset=utf-16')
+                self.send_header('Content-Disposition', f"attachment; filename*=UTF-8''{quote(report)}.csv")
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                encoding = config.get('encoding', 'utf-16')
+                if encoding == 'utf-16':
+                    self._chunk(codecs.BOM_UTF16_LE)
+                codec = 'utf-16-le' if encoding == 'utf-16' else encoding # <-- BOM já enviado, blocos sem BOM
+
+                header_sent = False
+                for f_idx, filial in enumerate(filiais):
+                    for c_idx, start in enumerate(range(0, rows, STREAM_CHUNK_ROWS)):
+                        n = min(STREAM_CHUNK_ROWS, rows - start)
+
+                        if generator_key:
+                            df = generate_report(generator_key, n, seed=server.seed + f_idx * 1000 + c_idx)
+                            filial_col = next((raw for raw, name in config['rename_columns'].items() if name == 'filial'), None)
+                            if filial_col:
+                                df[filial_col] = filial
+                            text = df.to_csv(sep=config['sep'], index=False, header=not header_sent)
+                        else:
+                            lines = [] if header_sent else ['Filial\tLinha']
+                            lines += [f'{filial}\t{i}' for i in range(start, start + n)]
+                            text = '\r\n'.join(lines) + '\r\n'
+
+                        header_sent = True
+                        self._chunk(text.encode(codec))
+
+                self._chunk(b'')
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+
+        return _Handler
+
+    def start(self) -> 'MockCognosServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock_cognos', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description='Portal Cognos falso para testes de carga da extração')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--render-delay', type=float, default=1.0)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    server = MockCognosServer(args.host, args.port, args.render_delay, args.rows, args.seed)
+    print(f'mock cognos em {server.base_url}')
+    for key, url in mock_links(server.base_url).items():
+        print(f'  {key}: {url}')
+
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
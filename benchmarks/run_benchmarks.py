@@ -0,0 +1,139 @@
+"""
+Benchmark dos caminhos críticos do tratamento: leitura do CSV, tipagem, apply_setor_rules, check_dedline,
+penultimate_date e merge com a gold
+
+Os resultados são gravados em JSON; com --baseline a execução falha (exit 1) quando alguma etapa
+fica mais lenta que a baseline além do limite --threshold
+
+Como usar (na raiz do projeto):
+python -m benchmarks.run_benchmarks --sizes 100000 1000000 10000000
+python -m benchmarks.run_benchmarks --reports olpn picking --baseline benchmarks/baseline.json --threshold 0.2
+"""
+
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import pandas as pd
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.classification import apply_setor_rules, check_dedline, SETOR_RULES
+from utils.get_infos import penultimate_date
+from utils.schema_registry import get_schema
+from benchmarks.generators import REPORTS, write_report_csv
+
+DEFAULT_SIZES = [100_000, 1_000_000, 10_000_000]
+RESULTS_DIR = Path(__file__).parent / 'results'
+MIN_REGRESSION_SECONDS = 0.05 # <-- diferenças absolutas menores que isso são ruído
+
+def _timed(results: dict, step: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    results[step] = round(time.perf_counter() - start, 4)
+    return value
+
+def _gold_merge(history: pd.DataFrame, delta: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    keys = [k for k in keys if k in history.columns]
+    return pd.concat([history, delta], ignore_index=True).drop_duplicates(subset=keys, keep='last')
+
+def bench_report(report: str, n_rows: int, work_dir: Path, seed: int = 0) -> dict:
+    """
+    Executa todas as etapas de um relatório em um tamanho e retorna {etapa: segundos}
+    """
+
+    config = PIPELINE_CONFIG[REPORTS[report]]
+    schema = get_schema(REPORTS[report])
+    results: dict[str, float] = {}
+
+    csv_path = write_report_csv(report, n_rows, work_dir / f'{report}_{n_rows}.csv', seed=seed)
+
+    raw = _timed(results, 'csv_parse', pd.read_csv, csv_path, sep=config['sep'], encoding=config['encoding'], dtype=str)
+    df = _timed(results, 'typing', schema.apply, raw)
+    del raw
+
+    if {'box', 'tipo_de_pedido'} <= set(df.columns):
+        _timed(results, 'apply_setor_rules', apply_setor_rules, df, SETOR_RULES)
+
+    if {'data_locacao_pedido', 'data_hora_ultimo_update_olpn', 'status_olpn', 'box'} <= set(df.columns):
+        _timed(results, 'check_dedline', check_dedline, df)
+
+    date_columns = [c for c in config.get('datetime_columns', []) if c in df.columns]
+    if date_columns:
+        parquet_path = work_dir / f'{report}_{n_rows}.parquet'
+        df.to_parquet(parquet_path, index=False)
+        _timed(results, 'penultimate_date', penultimate_date, parquet_path, column=date_columns[0])
+        parquet_path.unlink()
+
+    delta = df.sample(frac=0.1, random_state=seed)
+    _timed(results, 'gold_merge', _gold_merge, df, delta, list(schema.key_columns))
+
+    csv_path.unlink()
+
+    return results
+
+def find_regressions(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compara os resultados com a baseline e lista as etapas que pioraram além do limite
+    """
+
+    regressions = []
+    for report, sizes in current['results'].items():
+        for size, steps in sizes.items():
+            for step, seconds in steps.items():
+                base = baseline.get('results', {}).get(report, {}).get(size, {}).get(step)
+                if base is None:
+                    continue
+                if seconds > base * (1 + threshold) and seconds - base > MIN_REGRESSION_SECONDS:
+                    regressions.append(f'{report}[{size}] {step}: {base:.4f}s -> {seconds:.4f}s (+{(seconds / base - 1):.0%})')
+
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark dos caminhos críticos do tratamento')
+    parser.add_argument('--reports', nargs='+', default=list(REPORTS), choices=list(REPORTS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, default=None, help='JSON de saída (padrão: benchmarks/results/<data>.json)')
+    parser.add_argument('--baseline', type=Path, default=None, help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--threshold', type=float, default=0.2, help='piora relativa tolerada (0.2 = 20%%)')
+    parser.add_argument('--work-dir', type=Path, default=None, help='diretório dos arquivos sintéticos (padrão: temporário)')
+    args = parser.parse_args(argv)
+
+    current = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'seed': args.seed
+        },
+        'results': {}
+    }
+
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as tmp:
+        for report in args.reports:
+            for size in args.sizes:
+                steps = bench_report(report, size, Path(tmp), seed=args.seed)
+                current['results'].setdefault(report, {})[str(size)] = steps
+                print(f'{report:<10} {size:>10,} ' + ' '.join(f'{k}={v:.3f}s' for k, v in steps.items()))
+
+    output = args.output or RESULTS_DIR / f'{datetime.now():%Y%m%d_%H%M%S}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(current, indent=2), encoding='utf-8')
+    print(f'resultados gravados em {output}')
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regressions = find_regressions(current, baseline, args.threshold)
+        if regressions:
+            print('regressões acima do limite:')
+            print('\n'.join(f'  {r}' for r in regressions))
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
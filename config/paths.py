@@ -3,9 +3,13 @@ PLAYWRIGHT_CHROMIUM_PATH = Mostra o local da pasta chromium-1194 que você deve
 BASE_PATH = Armazena o caminho principal da base de dados
 LOG_DIR = Armazena o path da log
 LOG_PATH = Armazena o caminho direto a log
+LOCAL_LOG_DIR = Armazena o path local (fora do OneDrive) da log gravada pelo processo ouvinte no modo fila
+LOCAL_LOG_PATH = Armazena o caminho direto a log local
+METRICS_DIR = Armazena o histórico em Parquet das métricas de desempenho do pipeline
 ENV_PATH = Armazena o caminho da .ENV
 EXECUTION_MODE = Armazena o txt de controle do projeto
 SELENIUM_CHROME = Armazena o caminho da pasta de arquivos .temp
+BROWSER_ASSET_CACHE = Armazena o cache local dos arquivos estáticos do Cognos, compartilhado entre contextos do browser (não é limpo)
 REAL_TIME_UPDATE = Armazena os paths dos diretórios do modo de execução "Atualização em tempo real"
 TEMP_DIR = Armazena os paths dos diretórios onde serão alocados arquivos temporarios (Não ficarão no banco de dados)
 CLEAR_DIR = Armazena os paths dos diretórios que serão limpos após utilizados
@@ -27,12 +31,19 @@ BASE_PATH = Path(r'C:/Users/2960006959/OneDrive - Grupo Casas Bahia S.A/Sala PCP
 LOG_DIR = Path(f'{BASE_PATH}/Gold (Business Layer)/logs')
 LOG_PATH = LOG_DIR / Path(r'log.log')
 
+LOCAL_LOG_DIR = Path(os.path.expanduser('~')) / 'web_data_collector' / 'logs'
+LOCAL_LOG_PATH = LOCAL_LOG_DIR / Path(r'log.log')
+
+METRICS_DIR = LOG_DIR / Path(r'metrics')
+
 ENV_PATH = Path(r'C:/Users/2960006959/Desktop/project/web_data_collector/config/.env')
 
 EXECUTION_MODE = Path(f'{BASE_PATH}/Bronze (Raw Layer)/TEMP_DIR_CHROME/web_data_collector/execution_mode.txt')
 
 SELENIUM_CHROME = Path('C:/Users/2960006959/Desktop/selenium_chrome')
 
+BROWSER_ASSET_CACHE = Path('C:/Users/2960006959/Desktop/browser_asset_cache')
+
 REAL_TIME_UPDATE = {
     'SELENIUM_CHROME': SELENIUM_CHROME,
     'BRONZE': {
@@ -186,7 +197,8 @@ DATA_PATHS = {
         'time_lead_olpn' : Path(f'{BASE_PATH}/Gold (Business Layer)/analise_time_lead_olpn'),
         'jornada' : Path(f'{BASE_PATH}/Gold (Business Layer)/jornada'),
         'bottleneck_box' : Path(f'{BASE_PATH}/Gold (Business Layer)/analise_bottleneck_box'),
-        'bottleneck_salao' : Path(f'{BASE_PATH}/Gold (Business Layer)/analise_bottleneck_salao')
+        'bottleneck_salao' : Path(f'{BASE_PATH}/Gold (Business Layer)/analise_bottleneck_salao'),
+        'olpn_lifecycle' : Path(f'{BASE_PATH}/Gold (Business Layer)/analise_olpn_lifecycle')
     }
 }
 
@@ -235,6 +247,38 @@ PIPELINE_PATHS = {
         'parquet_load': Path(DATA_PATHS['gold']['loading']),
         'parquet_putaway': Path(DATA_PATHS['gold']['putaway']),
         'output_parquet': Path(DATA_PATHS['gold']['bottleneck_box'])
+    },
+    'olpn_lifecycle': {
+        'parquet_olpn': Path(DATA_PATHS['gold']['olpn']),
+        'parquet_picking': Path(DATA_PATHS['gold']['picking']),
+        'parquet_packed': Path(DATA_PATHS['gold']['packing']),
+        'parquet_putaway': Path(DATA_PATHS['gold']['putaway']),
+        'parquet_load': Path(DATA_PATHS['gold']['loading']),
+        'output_parquet': Path(DATA_PATHS['gold']['olpn_lifecycle'])
+    },
+    'wip_state': {
+        'snapshot': Path(f'{BASE_PATH}/Gold (Business Layer)/wip_state')
+    },
+    'pendencia_asn_historico': {
+        'parquet_pendencia': Path(DATA_PATHS['gold']['pendencia_asn']),
+        'current': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_pendencia_asn/atual'),
+        'output_parquet': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_pendencia_asn/historico')
+    },
+    'expedicao_rollup': {
+        'parquet_expedicao': Path(DATA_PATHS['gold']['expedicao']),
+        'state': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_expedicao/linhas'),
+        'output_parquet': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_expedicao/fill_rate')
+    },
+    'cancel_cube': {
+        'parquet_cancel': Path(DATA_PATHS['gold']['cancel']),
+        'state': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_cancelamento/linhas'),
+        'dimensions': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_cancelamento/dimensoes'),
+        'output_parquet': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_cancelamento/cubo')
+    },
+    'estoque_ledger': {
+        'parquet_mov': Path(DATA_PATHS['gold']['estoque_mov']),
+        'deltas': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_estoque_saldo/deltas'),
+        'snapshots': Path(f'{BASE_PATH}/Gold (Business Layer)/analise_estoque_saldo/snapshots')
     }
 }
 
@@ -4,7 +4,18 @@ LINKS = Armazena os links de acesso aos relatórios já configurados para sair e
 EMAIL = Requisita o email do arquivo .env
 PASSWORD = Requisita a senha do arquivo .env
 CHUNKSIZE = Armazena o limite de linhas que serão lidas pela automação
+RESOURCE_RULES = Armazena, por chave do LINKS, os tipos de recurso e domínios bloqueados e os arquivos estáticos cacheados
+    static_cache_version = versão do cache de estáticos
 PIPELINE_CONFIG = Armazena o tratamento que será aplicado nos arquivos extraidos e no banco de dados
+    relatórios: datetime_formats = formato strptime de cada coluna de data, key_columns = chave de deduplicação
+    no merge com a gold, event_column = data/hora do evento (filtros e ordenação da gold)
+    olpn_lifecycle: stages = relatório -> data/hora da etapa, buckets = arquivos da tabela por hash do olpn
+    wip_state: stages = etapas em ordem, terminal_* = etapas e status que tiram o olpn do WIP
+    pendencia_asn_historico: compare_columns = colunas comparadas entre snapshots para detectar alteração
+    expedicao_rollup: group_columns = dimensões do fill rate além do dia, buckets = arquivos do estado por linha
+    cancel_cube: dimensions = dimensões codificadas em inteiro do cubo de cancelamento
+    estoque_ledger: balance_keys = chave do saldo, snapshot_every_hours = intervalo entre snapshots de saldo
+    window_days = tamanho da janela de datas de cada extração incremental
 """
 
 from config.paths import ENV_PATH
@@ -35,6 +46,34 @@ LINKS = {
     'LOGIN_EXPEDICAO': 'https://viavp-sci.sce.manh.com/bi/?perspective=authoring&id=i14E08EF0A3D244EFAA7EFEA25F910A54&objRef=i14E08EF0A3D244EFAA7EFEA25F910A54&action=run&format=CSV&cmPropStr=%7B%22id%22%3A%22i14E08EF0A3D244EFAA7EFEA25F910A54%22%2C%22type%22%3A%22report%22%2C%22defaultName%22%3A%226.06%20-%20Expedi%C3%A7%C3%A3o%20-%20CD%22%2C%22permissions%22%3A%5B%22execute%22%2C%22read%22%2C%22traverse%22%5D%7D'
 }
 
+RESOURCE_RULES = { # <-- chaves iguais às do LINKS, 'default' vale para links sem regra própria
+    'default': {
+        'block_resource_types': ['image', 'font', 'media'],
+        'block_domains': [
+            'google-analytics.com',
+            'googletagmanager.com',
+            'doubleclick.net',
+            'newrelic.com',
+            'nr-data.net',
+            'hotjar.com'
+        ],
+        'static_cache_patterns': [ # <-- regex sobre a url, apenas GET 200 de script/stylesheet são cacheados
+            r'/bi/.*\.(js|css)(\?|$)'
+        ],
+        'static_cache_version': '1' # <-- incrementar após atualização do Cognos descarta o cache de estáticos
+    },
+    'LOGIN_CSI': { # <-- login passa pelo Azure AD, bloquear recursos pode quebrar o fluxo
+        'block_resource_types': [],
+        'block_domains': [],
+        'static_cache_patterns': []
+    },
+    'LOGIN_PRWEB': {
+        'block_resource_types': [],
+        'block_domains': [],
+        'static_cache_patterns': []
+    }
+}
+
 PIPELINE_CONFIG = {
         'pendencia_asn' :{
         'remove_columns': [
@@ -76,6 +115,12 @@ PIPELINE_CONFIG = {
             'data_integracao_wms',
             'data_inicio_recebimento'
         ],
+        'datetime_formats': {
+                'data_integracao_wms': '%d/%m/%Y %H:%M:%S',
+                'data_inicio_recebimento': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['asn', 'item'],
+        'event_column': 'data_integracao_wms',
         'encoding':'utf-16',
         'sep':'\t'
         },
@@ -113,6 +158,36 @@ PIPELINE_CONFIG = {
             'olpn': 'string'
         }
 
+    },
+        'olpn_lifecycle': {
+        'stages': { # <-- relatório -> coluna de data/hora da etapa (uma coluna por etapa na tabela larga)
+            'olpn': 'data_hora_ultimo_update_olpn',
+            'picking': 'data_hora_fim_olpn',
+            'packing': 'data_hora_packed',
+            'putaway': 'data_hora_putaway',
+            'loading': 'data_hora_load'
+        },
+        'attribute_columns': [
+            'pedido',
+            'filial',
+            'box',
+            'tipo_de_pedido',
+            'status_olpn'
+        ],
+        'key_columns': ['olpn'],
+        'buckets': 64
+    },
+        'wip_state': {
+        'stages': [ # <-- ordem das etapas; um olpn só avança, eventos atrasados de etapas anteriores são ignorados
+            'olpn',
+            'picking',
+            'packing',
+            'putaway',
+            'loading'
+        ],
+        'terminal_stages': ['loading'],
+        'terminal_status': ['Shipped', 'Cancelled'],
+        'snapshot_every': 20
     },
         'time_lead_olpn': {
         'read_columns': [
@@ -160,7 +235,6 @@ PIPELINE_CONFIG = {
             'Pedido':'pedido',
             'Box':'box',
             'Tipo do pedido':'tipo_de_pedido',
-            'Descrição':'descricao',
             'Setor do item':'setor_item',
             'Status':'status',
             'Qtde. original':'qtd_pcs_solicitada',
@@ -171,7 +245,6 @@ PIPELINE_CONFIG = {
             'pedido':'string',
             'box':'Int64',
             'tipo_de_pedido':'string',
-            'descricao':'string',
             'setor_item':'string',
             'status':'string',
             'qtd_pcs_solicitada':'Int64',
@@ -180,6 +253,11 @@ PIPELINE_CONFIG = {
         'datetime_columns': [
             'dt_ultima_movimentacao'
         ],
+        'datetime_formats': {
+                'dt_ultima_movimentacao': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['filial', 'pedido', 'box', 'setor_item'],
+        'event_column': 'dt_ultima_movimentacao',
         'encoding':'utf-16',
         'sep':'\t'
         },
@@ -227,7 +305,6 @@ PIPELINE_CONFIG = {
                 'tarefa': 'string',
                 'grupo_de_tarefa': 'string',
                 'item': 'Int64',
-                'descricao': 'string',
                 'local_de_picking': 'string',
                 'qt_pecas': 'Int64',
                 'box': 'Int64',
@@ -240,6 +317,12 @@ PIPELINE_CONFIG = {
                 'data_locacao_pedido',
                 'data_hora_ultimo_update_olpn'
         ],
+        'datetime_formats': {
+                'data_locacao_pedido': '%d/%m/%Y %H:%M:%S',
+                'data_hora_ultimo_update_olpn': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['olpn', 'item'],
+        'event_column': 'data_hora_ultimo_update_olpn',
         'encoding': 'utf-16',
         'sep' : '\t'
     },
@@ -295,6 +378,13 @@ PIPELINE_CONFIG = {
                 'data_hora_fim_tarefa',
                 'data_hora_fim_olpn'
         ],
+        'datetime_formats': {
+                'data_hora_inicio_tarefa': '%d/%m/%Y %H:%M:%S',
+                'data_hora_fim_tarefa': '%d/%m/%Y %H:%M:%S',
+                'data_hora_fim_olpn': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['tarefa', 'olpn', 'item'],
+        'event_column': 'data_hora_fim_tarefa',
         'encoding': 'utf-16',
         'sep' : '\t'
     },
@@ -317,6 +407,7 @@ PIPELINE_CONFIG = {
                 'Qtde Ajustada': 'qt_pecas',
                 'Data do Cancelamento': 'data_cancelamento',
                 'Usuário': 'usuario',
+                'Item': 'item',
                 ' Motivo Secondary Reference Text': 'motivo_cancelamento'
         },
         'column_types': {
@@ -330,6 +421,11 @@ PIPELINE_CONFIG = {
         'datetime_columns': [
                 'data_cancelamento'
         ],
+        'datetime_formats': {
+                'data_cancelamento': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['pedido', 'item', 'data_cancelamento'],
+        'event_column': 'data_cancelamento',
         'encoding': 'utf-16',
         'sep': '\t'
     },
@@ -375,6 +471,11 @@ PIPELINE_CONFIG = {
         'datetime_columns': [
                 'data_hora_packed'
         ],
+        'datetime_formats': {
+                'data_hora_packed': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['olpn', 'item'],
+        'event_column': 'data_hora_packed',
         'encoding': 'utf-16',
         'sep': '\t'
     },
@@ -406,12 +507,18 @@ PIPELINE_CONFIG = {
                 'usuario': 'string',
                 'qt_pecas': 'Int64',
                 'box': 'Int64',
-                'Item': 'Int64'
+                'item': 'Int64'
         },
         'datetime_columns': [
                 'data_hora_load',
                 'data_pedido'
         ],
+        'datetime_formats': {
+                'data_hora_load': '%d/%m/%Y %H:%M:%S',
+                'data_pedido': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['olpn', 'item'],
+        'event_column': 'data_hora_load',
         'encoding': 'utf-16',
         'sep': '\t'
     },
@@ -449,8 +556,122 @@ PIPELINE_CONFIG = {
         'datetime_columns': [
                 'data_hora_putaway'
         ],
+        'datetime_formats': {
+                'data_hora_putaway': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['olpn', 'item'],
+        'event_column': 'data_hora_putaway',
+        'encoding': 'utf-16',
+        'sep': '\t'
+    },
+        'recebimento' : {
+        'remove_columns': [
+                'Facility ID',
+                'Inventory Type ID',
+                'Descrição do Item',
+                'Nome do Usuário'
+        ],
+        'rename_columns': {
+                'Filial': 'filial',
+                'ASN': 'asn',
+                'Nota Fiscal': 'nota_fiscal',
+                'Fornecedor': 'fornecedor',
+                'iLPN': 'ilpn',
+                'Item': 'item',
+                'Setor': 'setor',
+                'Qtde Recebida': 'qtd_recebida',
+                'Data Recebimento': 'data_recebimento',
+                'Usuário': 'usuario'
+        },
+        'column_types': {
+                'filial': 'string',
+                'asn': 'Int64',
+                'nota_fiscal': 'string',
+                'fornecedor': 'string',
+                'ilpn': 'string',
+                'item': 'Int64',
+                'setor': 'string',
+                'qtd_recebida': 'Int64',
+                'usuario': 'string'
+        },
+        'datetime_columns': [
+                'data_recebimento'
+        ],
+        'datetime_formats': {
+                'data_recebimento': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['asn', 'ilpn', 'item'],
+        'event_column': 'data_recebimento',
+        'window_days': 1, # <-- uma extração (e um arquivo gold) por dia, reextrair o dia sobrescreve o arquivo
         'encoding': 'utf-16',
         'sep': '\t'
+    },
+        'estoque_mov' : {
+        'remove_columns': [
+                'Facility ID',
+                'Inventory Type ID',
+                'Descrição do Item',
+                'Nome do Usuário'
+        ],
+        'rename_columns': {
+                'Filial': 'filial',
+                'Data Movimentação': 'data_movimentacao',
+                'Item': 'item',
+                'Local': 'local',
+                'Tipo de Transação': 'tipo_transacao',
+                'Referência': 'referencia',
+                'Qtde Ajustada': 'qtd_movimentada',
+                'Usuário': 'usuario'
+        },
+        'column_types': {
+                'filial': 'string',
+                'item': 'Int64',
+                'local': 'string',
+                'tipo_transacao': 'string',
+                'referencia': 'string',
+                'qtd_movimentada': 'Int64',
+                'usuario': 'string'
+        },
+        'datetime_columns': [
+                'data_movimentacao'
+        ],
+        'datetime_formats': {
+                'data_movimentacao': '%d/%m/%Y %H:%M:%S'
+        },
+        'key_columns': ['filial', 'item', 'local', 'data_movimentacao', 'tipo_transacao', 'referencia'],
+        'event_column': 'data_movimentacao',
+        'encoding': 'utf-16',
+        'sep': '\t'
+    },
+        'pendencia_asn_historico': {
+        'key_columns': ['asn', 'item'],
+        'compare_columns': [ # <-- mudança em qualquer uma abre uma nova versão da linha
+            'descricao',
+            'filial_origem',
+            'desc_recebimento',
+            'nota_fiscal',
+            'data_integracao_wms',
+            'data_inicio_recebimento',
+            'setor',
+            'status_produto',
+            'qtd_original',
+            'qtd_recebida'
+        ]
+    },
+        'expedicao_rollup': {
+        'source_report': 'expedicoes',
+        'group_columns': ['filial', 'box', 'setor_item'], # <-- além do dia (data da dt_ultima_movimentacao)
+        'buckets': 32
+    },
+        'cancel_cube': {
+        'dimensions': ['filial', 'tipo_de_pedido', 'setor'], # <-- além do dia e do motivo oficial, viram códigos inteiros estáveis
+        'buckets': 32
+    },
+        'estoque_ledger': {
+        'balance_keys': ['filial', 'item', 'local'],
+        'quantity_column': 'qtd_movimentada', # <-- quantidade com sinal (entrada positiva, saída negativa)
+        'event_column': 'data_movimentacao',
+        'snapshot_every_hours': 24
     },
         'jornada' : {
         'remove_columns': [],
@@ -467,6 +688,11 @@ PIPELINE_CONFIG = {
         'datetime_columns': [
                 'data'
         ],
+        'datetime_formats': {
+                'data': '%d/%m/%Y'
+        },
+        'key_columns': ['matricula', 'data', 'hora'],
+        'event_column': 'data',
         'encoding': 'ascii',
         'sep': ';'
     },
@@ -475,6 +701,9 @@ PIPELINE_CONFIG = {
         'rename_columns': {},
         'column_types': {},
         'datetime_columns': [],
+        'datetime_formats': {},
+        'key_columns': [],
+        'event_column': None,
         'encoding': 'utf-16',
         'sep': '\t'
     },
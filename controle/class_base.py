@@ -1,12 +1,23 @@
 import inspect
+import logging
 from pathlib import Path
 from typing import Callable, Any
+from utils.download_manager import download_report
+from utils.filial_split import split_by_filial
+from utils.metrics import METRICS
+from config.paths import METRICS_DIR
 
 """
 Classe base de extração de relatórios do sistema IBM, outras classes herdarão essa classe base
 """
 
+logger = logging.getLogger(__name__)
+
+BATCH_FILIAL = 'lote'
+
 class BaseDataExtraction:
+    report_name: str | None = None # <-- chave do PIPELINE_CONFIG, usada nas métricas (padrão: nome da classe)
+
     def __init__(
             self,
             cookies: list[dict],
@@ -15,6 +26,7 @@ class BaseDataExtraction:
             parquet_folder: Path | None = None,
             entry_date: str | Callable | None = None,
             exit_date: str | Callable | None = None,
+            batch_filiais: bool = False,
             **kwargs: Any
     ):
         self.cookies = cookies
@@ -23,9 +35,11 @@ class BaseDataExtraction:
         self.parquet_folder = parquet_folder
         self.entry_date = entry_date
         self.exit_date = exit_date
+        self.batch_filiais = batch_filiais # <-- True envia todas as filiais em um único prompt (só onde o Cognos aceita múltiplos valores)
         self.extra_params = kwargs
 
         self.driver = None
+        self.current_filial = None
     
     def _resolve_date(self, date_value):
         if callable(date_value):
@@ -34,19 +48,64 @@ class BaseDataExtraction:
                 return date_value(self.parquet_folder)
             return date_value()
         return date_value
+
+    def _stage(self, stage: str):
+        """
+        Mede um bloco como etapa (STAGES) do relatório e filial corrente: with self._stage('prompt_fill'): ...
+        """
+        return METRICS.stage(self.report_name or self.__class__.__name__, self.current_filial, stage)
+
+    def _download(self, page, trigger: Callable[[], None], **kwargs: Any) -> Path:
+        """
+        Dispara o download e aguarda o arquivo completo em self.download_dir, sem esperas fixas.
+        Mede a espera do render e a transferência como etapas separadas ('render' e 'download')
+        """
+        return download_report(page, trigger, self.download_dir, stage=self._stage, **kwargs)
     
+    def _select_filiais(self, frame, element_id: str, filiais: list) -> None:
+        """
+        Seleciona uma ou várias filiais no ValueComboBox do prompt em uma única chamada
+        """
+        frame.select_option(f'#{element_id}', [str(f) for f in filiais])
+
+    def _split_batch(self, file_path: Path, column: str = 'Filial', **kwargs: Any) -> dict[str, Path]:
+        """
+        Separa o export multi-filial em um arquivo por filial, mantendo o fluxo do FILE_ROUTER inalterado
+        """
+        return split_by_filial(file_path, column=column, filiais=self.list_filial, **kwargs)
+
+    def _execute_for_filiais(self, filiais: list) -> None:
+        """
+        Execução em lote: um render e um download para todas as filiais.
+        Só tem efeito nas classes que sobrescrevem este método (hoje RecebimentoExtraction);
+        nas demais batch_filiais=True avisa e cai na execução filial a filial
+        """
+        logger.warning(
+            f'{self.__class__.__name__} sem execucao em lote, batch_filiais ignorado (filial a filial)',
+            extra={'job': 'batch_filiais', 'status': 'failure'}
+        )
+        for filial in filiais:
+            self.current_filial = filial
+            self._execute_for_filial(filial)
+
     def run(self):
         self.entry_date = self._resolve_date(self.entry_date)
         self.exit_date = self._resolve_date(self.exit_date)
 
-        self.driver = create_authenticated_driver(
-            self.cookies,
-            download_dir=self.download_dir
-        )
+        with self._stage('browser_start'):
+            self.driver = create_authenticated_driver(
+                self.cookies,
+                download_dir=self.download_dir
+            )
 
         try:
-            for filial in self.list_filial:
-                self._execute_for_filial(filial)
+            if self.batch_filiais:
+                self.current_filial = BATCH_FILIAL # <-- métricas do lote ficam com o rótulo 'lote'
+                self._execute_for_filiais(self.list_filial)
+            else:
+                for filial in self.list_filial:
+                    self.current_filial = filial
+                    self._execute_for_filial(filial)
 
         except Exception as e:
             logger.info(
@@ -55,4 +114,6 @@ class BaseDataExtraction:
             )
 
         finally:
-            self.driver.quit()
\ No newline at end of file
+            self.driver.quit()
+            self.current_filial = None
+            METRICS.flush_history(METRICS_DIR)
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Extração do relatório 1.06 - Recebimento com janelas de datas incrementais
+
+A data inicial padrão é o último recebimento já catalogado na gold (utils.get_infos.last_event_date), então
+cada execução pede ao Cognos só o período novo. O período é quebrado em janelas de
+PIPELINE_CONFIG['recebimento']['window_days'] dias alinhadas ao calendário, uma renderização e um arquivo
+por janela e filial: reextrair uma janela gera o mesmo nome de arquivo e sobrescreve a anterior
+
+Classes e funções:
+RecebimentoExtraction(): Extração do recebimento filial a filial, janela a janela
+
+Como usar:
+RecebimentoExtraction(cookies, TEMP_DIR['BRONZE']['recebimento'], LIST_FILIAL,
+                      parquet_folder=DATA_PATHS['gold']['recebimento']).run()
+"""
+
+from pathlib import Path
+from typing import Any, Callable
+import os
+import logging
+from controle.class_base import BaseDataExtraction
+from config.pipeline_config import LINKS, PIPELINE_CONFIG
+from config.elements import ELEMENTS
+from utils.get_infos import date_windows, last_event_date, today
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['recebimento']
+ELEMENTS_RECEBIMENTO = ELEMENTS['ELEMENTS_RECEBIMENTO']
+
+def _last_recebimento(parquet_folder: Path) -> str:
+    return last_event_date(parquet_folder, CONFIG['event_column'])
+
+class RecebimentoExtraction(BaseDataExtraction):
+    """
+    Extração do recebimento (LINKS['LOGIN_RECEBIMENTO'])
+
+    params:
+    cookies: list[dict] | Cookies da sessão autenticada
+    download_dir: Path | Diretório temporário de download (TEMP_DIR['BRONZE']['recebimento'])
+    list_filial: list | Filiais extraídas
+    parquet_folder: Path | None = None | Gold do recebimento, base da data inicial incremental
+    entry_date: str | Callable | None = None | Data inicial, por padrão o último recebimento da gold
+    exit_date: str | Callable | None = None | Data final, por padrão hoje
+    window_days: int = CONFIG['window_days'] | Dias por janela de extração
+    batch_filiais: bool = False | True baixa todas as filiais em um único prompt por janela e separa localmente
+    """
+
+    report_name = 'recebimento'
+
+    def __init__(
+            self,
+            cookies: list[dict],
+            download_dir: Path,
+            list_filial: list,
+            parquet_folder: Path | None = None,
+            entry_date: str | Callable | None = None,
+            exit_date: str | Callable | None = None,
+            window_days: int = CONFIG['window_days'],
+            **kwargs: Any
+    ):
+        super().__init__(
+            cookies,
+            download_dir,
+            list_filial,
+            parquet_folder=parquet_folder,
+            entry_date=entry_date or _last_recebimento,
+            exit_date=exit_date or today,
+            **kwargs
+        )
+        self.window_days = window_days
+
+    def _open_prompt(self):
+        """
+        Abre o prompt do relatório e retorna o frame onde ficam os campos
+        """
+        page = self.driver
+        page.goto(LINKS['LOGIN_RECEBIMENTO'])
+        return page.locator(f'xpath={ELEMENTS["frame"]}').element_handle().content_frame()
+
+    @staticmethod
+    def _window_filename(filial: str, start: str, end: str) -> str:
+        """
+        Nome do export de uma filial e janela, igual nos modos filial a filial e em lote: o arquivo gold
+        leva o nome do CSV, então a reextração da mesma janela sobrescreve em vez de duplicar
+        """
+        return f'recebimento_{filial}_{start.replace("/", "")}_{end.replace("/", "")}.csv'
+
+    def _download_window(self, filiais: list, start: str, end: str, filename: str) -> Path:
+        with self._stage('prompt_fill'):
+            frame = self._open_prompt() # <-- após o download o Cognos sai do prompt, cada janela reabre o link
+            self._select_filiais(frame, ELEMENTS_RECEBIMENTO['element_filial_id'], filiais)
+            frame.fill(f'#{ELEMENTS_RECEBIMENTO["element_dt_start"]}', start)
+            frame.fill(f'#{ELEMENTS_RECEBIMENTO["element_dt_end"]}', end)
+
+        return self._download(
+            self.driver,
+            lambda: frame.click(f'#{ELEMENTS_RECEBIMENTO["element_confirm"]}'),
+            filename=filename,
+            encoding=CONFIG['encoding']
+        )
+
+    def _execute_for_filial(self, filial: str) -> None:
+        windows = date_windows(self.entry_date, self.exit_date, days=self.window_days)
+
+        for start, end in windows:
+            self._download_window([filial], start, end, self._window_filename(filial, start, end))
+
+        logger.info(
+            f'recebimento filial {filial}: {len(windows)} janelas de {self.entry_date} a {self.exit_date}',
+            extra={'job': 'recebimento', 'status': 'sucess'}
+        )
+
+    def _execute_for_filiais(self, filiais: list) -> None:
+        """
+        batch_filiais=True: um download por janela com todas as filiais, separado localmente nos mesmos
+        nomes do modo filial a filial (recebimento_<filial>_<janela>.csv)
+        """
+        windows = date_windows(self.entry_date, self.exit_date, days=self.window_days)
+
+        for start, end in windows:
+            path = self._download_window(filiais, start, end, f'recebimento_lote_{start.replace("/", "")}_{end.replace("/", "")}.csv')
+            outputs = self._split_batch(path, column='Filial', encoding=CONFIG['encoding'], sep=CONFIG['sep'])
+            for filial, output in outputs.items():
+                os.replace(output, output.with_name(self._window_filename(filial, start, end)))
+
+        logger.info(
+            f'recebimento {len(filiais)} filiais em lote: {len(windows)} janelas de {self.entry_date} a {self.exit_date}',
+            extra={'job': 'recebimento', 'status': 'sucess'}
+        )
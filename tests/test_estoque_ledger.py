@@ -0,0 +1,50 @@
+"""
+Testes do razão de estoque: reaplicar a mesma extração (ou uma janela sobreposta) não pode mudar o saldo
+"""
+
+from datetime import datetime
+import pandas as pd
+from utils.estoque_ledger import append_movements, balance_at, build_snapshot
+
+def _movements(rows):
+    return pd.DataFrame(
+        rows,
+        columns=['filial', 'item', 'local', 'data_movimentacao', 'tipo_transacao', 'referencia', 'qtd_movimentada']
+    ).astype({'item': 'Int64', 'qtd_movimentada': 'Int64', 'data_movimentacao': 'datetime64[ms]'})
+
+def _balance(tmp_path, as_of=datetime(2025, 1, 31)):
+    balance = balance_at(as_of, deltas_dir=tmp_path / 'deltas', snapshots_dir=tmp_path / 'snapshots')
+    return {(r['filial'], r['item'], r['local']): r['saldo'] for r in balance.to_pylist()}
+
+def test_same_batch_twice_keeps_balance(tmp_path):
+    dirs = {'deltas_dir': tmp_path / 'deltas', 'snapshots_dir': tmp_path / 'snapshots'}
+    batch = _movements([
+        ('1200', 10, 'A01', datetime(2025, 1, 2, 8), 'entrada', 'NF1', 5),
+        ('1200', 10, 'A01', datetime(2025, 1, 3, 8), 'saida', None, -2), # <-- referencia nula também é chave
+        ('1200', 11, 'B02', datetime(2025, 1, 3, 9), 'entrada', 'NF2', 7),
+    ])
+
+    assert append_movements(batch, **dirs) is not None
+    expected = {('1200', 10, 'A01'): 3, ('1200', 11, 'B02'): 7}
+    assert _balance(tmp_path) == expected
+
+    build_snapshot(datetime(2025, 1, 4), **dirs)
+    assert append_movements(batch, **dirs) is None # <-- nada novo, nenhum delta nem snapshot refeito
+    assert _balance(tmp_path) == expected
+
+def test_overlapping_window_adds_only_new_movements(tmp_path):
+    dirs = {'deltas_dir': tmp_path / 'deltas', 'snapshots_dir': tmp_path / 'snapshots'}
+    first = _movements([
+        ('1200', 10, 'A01', datetime(2025, 1, 2, 8), 'entrada', 'NF1', 5),
+        ('1200', 10, 'A01', datetime(2025, 1, 2, 8), 'entrada', 'NF1', 5), # <-- linha repetida no export
+    ])
+    second = _movements([
+        ('1200', 10, 'A01', datetime(2025, 1, 2, 8), 'entrada', 'NF1', 5),
+        ('1200', 10, 'A01', datetime(2025, 1, 3, 8), 'entrada', 'NF3', 4),
+    ])
+
+    append_movements(first, **dirs)
+    assert _balance(tmp_path) == {('1200', 10, 'A01'): 5}
+
+    append_movements(second, **dirs)
+    assert _balance(tmp_path) == {('1200', 10, 'A01'): 9}
@@ -0,0 +1,56 @@
+"""
+Testes da leitura em blocos: campos entre aspas com quebra de linha e aspas escapadas ("") não podem
+ser cortados na fronteira de um bloco
+"""
+
+import csv
+import io
+import pandas as pd
+from utils.parallel_reader import _iter_blocks, _record_end, read_report_parallel
+from utils.schema_registry import get_schema
+
+REPORT = 'recebimento'
+
+def _write_export(path, rows: int = 6):
+    schema = get_schema(REPORT)
+    raw = {raw: out for raw, out in schema.rename_columns.items()}
+    records = []
+    for i in range(rows):
+        row = {c: 'x' for c in schema.remove_columns}
+        row.update({c: str(i) for c in raw})
+        row['Data Recebimento'] = f'0{i + 1}/01/2025 08:00:00'
+        row['Fornecedor'] = f'fornecedor {i}\nsegunda "linha"\n' if i % 2 else f'fornecedor {i}'
+        records.append(row)
+
+    pd.DataFrame(records).to_csv(path, sep=schema.sep, encoding=schema.encoding, index=False)
+    return records
+
+def test_record_end_carries_quote_state():
+    assert _record_end('a\n"b\nc') == (2, True) # <-- segundo '\n' dentro das aspas
+    assert _record_end('d"\te\nf', in_quotes=True) == (5, False)
+    assert _record_end('""\n', in_quotes=False) == (3, False) # <-- aspas escapadas
+    assert _record_end('"\n', in_quotes=False) == (-1, True) # <-- segunda aspa do "" no bloco seguinte reabre o campo
+
+def test_blocks_end_on_record_boundary(tmp_path):
+    path = tmp_path / 'recebimento.csv'
+    records = _write_export(path)
+    schema = get_schema(REPORT)
+
+    with open(path, 'r', encoding=schema.encoding, newline='') as f:
+        f.readline()
+        body = f.read()
+
+    for block_chars in range(1, len(body) + 1): # <-- todas as fronteiras possíveis, inclusive dentro das aspas
+        texts = [text for _, text in _iter_blocks(path, schema.encoding, block_chars)]
+        assert ''.join(texts) == body
+        parsed = sum(len(list(csv.reader(io.StringIO(t), delimiter=schema.sep))) for t in texts)
+        assert parsed == len(records)
+
+def test_read_report_parallel_multiline_field(tmp_path):
+    path = tmp_path / 'recebimento.csv'
+    records = _write_export(path)
+
+    table = read_report_parallel(path, REPORT, max_workers=2, block_chars=64)
+
+    assert table.num_rows == len(records)
+    assert table.column('fornecedor').to_pylist() == [r['Fornecedor'] for r in records]
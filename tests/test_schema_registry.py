@@ -0,0 +1,45 @@
+"""
+Testes do registro de schemas: cada relatório de ingestão lê um CSV de amostra com os próprios
+read_csv_kwargs e converte para pyarrow sem erro de tipo
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from utils.schema_registry import ARROW_TYPES, DATETIME_ARROW_TYPE, SCHEMAS
+
+SAMPLE_VALUES = { # <-- texto numérico em colunas string é o caso que o pandas inferiria como int64
+    pa.int64(): '1',
+    pa.float64(): '1.5',
+    pa.bool_(): 'True',
+    pa.string(): '1',
+    pa.timestamp('ms'): '01/01/2025 08:00:00',
+}
+INGESTION_REPORTS = sorted(name for name, schema in SCHEMAS.items() if schema.columns) # <-- 'padrao' não tem colunas
+
+def _sample_csv(schema, path):
+    raw_by_output = {out: raw for raw, out in schema.rename_columns.items()}
+    row = {raw: 'x' for raw in schema.remove_columns}
+    for col in schema.columns:
+        row[raw_by_output[col]] = SAMPLE_VALUES[schema.arrow_schema.field(col).type]
+
+    pd.DataFrame([row, row]).to_csv(path, sep=schema.sep, encoding=schema.encoding, index=False)
+
+@pytest.mark.parametrize('report', INGESTION_REPORTS)
+def test_to_arrow_sample_frame(report, tmp_path):
+    schema = SCHEMAS[report]
+    path = tmp_path / f'{report}.csv'
+    _sample_csv(schema, path)
+
+    df = schema.apply(pd.read_csv(path, **schema.read_csv_kwargs))
+    table = schema.to_arrow(df)
+
+    assert table.num_rows == 2
+    for col in schema.columns:
+        expected = DATETIME_ARROW_TYPE if col in schema.datetime_columns else ARROW_TYPES[schema.dtypes[col]]
+        assert table.schema.field(col).type == expected
+
+@pytest.mark.parametrize('report', sorted(SCHEMAS))
+def test_every_output_column_typed(report):
+    schema = SCHEMAS[report]
+    assert set(schema.dtypes) | set(schema.datetime_columns) == set(schema.columns)
@@ -0,0 +1,205 @@
+"""
+Manifesto de conteúdo da camada bronze, evita que o mesmo export do Cognos seja roteado e tratado mais de uma vez
+
+Classes e funções:
+file_digest(): Calcula o hash do arquivo em streaming, sem carregar o arquivo inteiro em memória
+
+BronzeManifest(): Manifesto endereçado por conteúdo (hash, tamanho, relatório, filial, janela de datas)
+
+dedup_temp_dir(): Remove do diretório temporário os arquivos já catalogados antes de passar pelo FILE_ROUTER
+
+register_routed(): Cataloga no manifesto os arquivos que já foram roteados e tratados com sucesso
+
+Como usar:
+novos = dedup_temp_dir(TEMP_DIR['BRONZE']['olpn'], DATA_PATHS['bronze']['olpn'], 'olpn')
+... # <-- FILE_ROUTER / tratamento dos novos
+register_routed(tratados, DATA_PATHS['bronze']['olpn'], 'olpn')
+"""
+
+from pathlib import Path
+from datetime import datetime
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '_manifest.json'
+HASH_CHUNK_SIZE = 1024 * 1024 # <-- 1 MiB por leitura, mantém memória constante mesmo em exports grandes
+
+def file_digest(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Calcula o sha256 do arquivo lendo em blocos
+
+    params:
+    path: Path | Recebe o path do arquivo
+    chunk_size: int = HASH_CHUNK_SIZE | Tamanho em bytes de cada bloco lido
+    """
+
+    digest = hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+class BronzeManifest:
+    """
+    Manifesto endereçado por conteúdo de um diretório da camada bronze
+
+    O manifesto é um JSON {hash: metadados} salvo dentro do próprio diretório bronze do relatório.
+    A gravação é atômica (arquivo temporário + os.replace), leitores nunca veem um JSON pela metade
+
+    params:
+    bronze_dir: Path | Recebe o diretório bronze do relatório (ex: DATA_PATHS['bronze']['olpn'])
+    """
+
+    def __init__(self, bronze_dir: Path):
+        self.bronze_dir = Path(bronze_dir)
+        self.path = self.bronze_dir / MANIFEST_NAME
+        self.entries: dict[str, dict] = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(
+                f'manifesto bronze ilegivel {self.path}, iniciando vazio: {e}',
+                extra={'job': 'bronze_manifest', 'status': 'failure'}
+            )
+            return {}
+
+    def save(self):
+        """
+        Persiste o manifesto de forma atômica
+        """
+
+        self.bronze_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+
+        os.replace(tmp_path, self.path)
+
+    def contains(self, digest: str) -> bool:
+        return digest in self.entries
+
+    def register(
+            self,
+            file_path: Path,
+            report: str,
+            filial: str | None = None,
+            entry_date: str | None = None,
+            exit_date: str | None = None,
+            digest: str | None = None
+    ) -> bool:
+        """
+        Cataloga um arquivo no manifesto. Retorna False se o conteúdo já estava catalogado (duplicado)
+
+        params:
+        file_path: Path | Recebe o arquivo baixado
+        report: str | Nome do relatório (chave do PIPELINE_CONFIG)
+        filial: str | None = None | Filial extraída
+        entry_date: str | None = None | Data inicial da janela extraída
+        exit_date: str | None = None | Data final da janela extraída
+        digest: str | None = None | Hash já calculado, evita reler o arquivo
+        """
+
+        file_path = Path(file_path)
+        digest = digest or file_digest(file_path)
+
+        if digest in self.entries:
+            return False
+
+        self.entries[digest] = {
+            'file': file_path.name,
+            'size': file_path.stat().st_size,
+            'report': report,
+            'filial': filial,
+            'entry_date': entry_date,
+            'exit_date': exit_date,
+            'registered_at': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        }
+
+        return True
+
+def dedup_temp_dir(
+        temp_dir: Path,
+        bronze_dir: Path,
+        report: str,
+        pattern: str = '*.csv'
+) -> list[Path]:
+    """
+    Remove do diretório temporário (TEMP_DIR['BRONZE'][...]) os arquivos cujo conteúdo já está no manifesto
+    (ou repetido no próprio lote). Deve rodar antes do FILE_ROUTER, assim duplicados nunca são tratados
+
+    Não cataloga os novos: o manifesto só recebe o arquivo via register_routed, depois que o roteamento e o
+    tratamento terminarem. Se o pipeline falhar no meio, o próximo download do mesmo conteúdo não é descartado
+
+    Retorna a lista de arquivos novos que seguem no pipeline
+
+    params:
+    temp_dir: Path | Diretório temporário de download
+    bronze_dir: Path | Diretório bronze de destino (valor do FILE_ROUTER)
+    report: str | Nome do relatório
+    pattern: str = '*.csv' | Padrão dos arquivos considerados
+    """
+
+    manifest = BronzeManifest(bronze_dir)
+    seen: dict[str, str] = {} # <-- hash -> arquivo, duplicados dentro do mesmo lote de downloads
+    novos: list[Path] = []
+
+    for file_path in sorted(Path(temp_dir).glob(pattern)):
+        digest = file_digest(file_path)
+
+        if not manifest.contains(digest) and digest not in seen:
+            seen[digest] = file_path.name
+            novos.append(file_path)
+            continue
+
+        original = manifest.entries[digest]['file'] if manifest.contains(digest) else seen[digest]
+        logger.info(
+            f'{report}: arquivo duplicado descartado {file_path.name} (igual a {original})',
+            extra={'job': 'dedup_temp_dir', 'status': 'sucess'}
+        )
+        file_path.unlink()
+
+    return novos
+
+def register_routed(
+        files: list[Path],
+        bronze_dir: Path,
+        report: str,
+        filial: str | None = None,
+        entry_date: str | None = None,
+        exit_date: str | None = None
+) -> int:
+    """
+    Cataloga no manifesto os arquivos que passaram pelo FILE_ROUTER e foram tratados sem erro (commit do lote).
+    Arquivos que falharam não devem ser passados, assim uma nova extração do mesmo conteúdo volta a ser tratada
+
+    Retorna a quantidade de arquivos catalogados
+
+    params:
+    files: list[Path] | Arquivos roteados (o hash é o mesmo do download, o caminho pode ser o de destino)
+    bronze_dir: Path | Diretório bronze do relatório
+    report: str | Nome do relatório
+    filial: str | None = None | Filial extraída
+    entry_date: str | None = None | Data inicial da janela extraída
+    exit_date: str | None = None | Data final da janela extraída
+    """
+
+    manifest = BronzeManifest(bronze_dir)
+    registered = sum(manifest.register(f, report, filial, entry_date, exit_date) for f in files)
+
+    if registered:
+        manifest.save()
+
+    return registered
@@ -8,7 +8,9 @@ create_authenticated_page(): Cria uma página já autenticada via cookies
 """
 
 from playwright.sync_api import sync_playwright
-from config.pipeline_config import LINKS
+from config.pipeline_config import LINKS, RESOURCE_RULES
+from config.paths import BROWSER_ASSET_CACHE
+from utils.resource_rules import install_resource_rules
 from pathlib import Path
 import tempfile
 import uuid
@@ -44,13 +46,18 @@ def init_browser(download_dir: str | Path):
             '--no-sandbox',
             '--disable-gpu',
             '--disable-dev-shm-usage',
-            '--disable-blink-features=AutomationControlled'
+            '--disable-blink-features=AutomationControlled',
+            '--disable-background-networking',
+            '--disable-component-update',
+            '--disable-sync',
+            '--no-first-run',
+            '--mute-audio'
         ]
     )
 
     return playwright, context
 
-def create_authenticated_page(cookies: list[dict], download_dir: Path):
+def create_authenticated_page(cookies: list[dict], download_dir: Path, link_key: str | None = None):
     """
     Cria uma página playwright já autenticada via cookies
 
@@ -59,6 +66,9 @@ def create_authenticated_page(cookies: list[dict], download_dir: Path):
 
     download_dir: Path
     Recebe o path do diretório de download que será configurado na instância
+
+    link_key: str | None
+    Chave do LINKS do relatório, aplica o bloqueio de recursos e o cache de estáticos do RESOURCE_RULES
     """
 
     playwright, context = init_browser(download_dir=download_dir)
@@ -98,6 +108,9 @@ def create_authenticated_page(cookies: list[dict], download_dir: Path):
     # Reload da página já autenticada
     page.goto(LINKS['LOGIN_CSI'])
 
+    # Regras só na página do relatório e depois do login: o fluxo do Azure AD nunca passa pela rota
+    install_resource_rules(page, link_key, RESOURCE_RULES, cache_dir=BROWSER_ASSET_CACHE)
+
     return page, context, playwright
 
 def load_cookies(path='cookies.json'):
@@ -0,0 +1,252 @@
+"""
+Cubo de cancelamentos por dia, filial, tipo de pedido, setor e motivo oficial, mantido de forma incremental
+
+Cada delta do relatório de cancelados (6.10) é reduzido a uma linha por pedido/item/data de cancelamento, com o
+motivo em texto livre convertido no código do MOTIVOS_OFICIAIS (utils.classification.apply_motivo_rules) e o
+setor pelas SETOR_RULES. Filial, tipo de pedido e setor viram códigos inteiros estáveis (dicionário por dimensão
+que só cresce). As linhas ficam em um estado dividido por hash do pedido (reextrair a mesma janela substitui em
+vez de somar de novo) e só os dias tocados pelo delta são reagregados no cubo, que guarda peças, linhas e
+pedidos distintos por célula. O painel diário lê o cubo já agregado
+
+Classes e funções:
+DimensionCodes(): Dicionário valor <-> código inteiro de uma dimensão
+
+cancel_lines(): Reduz o delta tratado a uma linha codificada por pedido/item/data
+
+update_cube(): Aplica um delta de cancelamentos no estado e reagrega os dias tocados
+
+read_cube(): Lê o cubo no período, opcionalmente com os rótulos das dimensões
+
+Como usar:
+update_cube(read_report_parallel(csv_path, 'cancel'))
+df = read_cube(('2025-01-01', '2025-01-08'), as_pandas=True)
+"""
+
+from pathlib import Path
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from config.paths import PIPELINE_PATHS
+from config.pipeline_config import PIPELINE_CONFIG
+from config.regras_de_negocio import MOTIVOS_OFICIAIS
+from utils.classification import SETOR_RULES, apply_motivo_rules, apply_setor_rules
+from utils.gold_reader import open_gold
+from utils.gold_writer import GoldLayout, write_gold
+from utils.incremental import bucket_ids, month_keys, to_date
+from utils.ingestion import dedup_keys
+from utils.schema_registry import get_schema
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['cancel_cube']
+SOURCE = get_schema('cancel')
+KEYS: list[str] = list(SOURCE.key_columns)
+EVENT = SOURCE.event_column
+
+DAY = 'dia'
+MOTIVO = 'motivo_id'
+QTY = 'qt_pecas'
+LINES = 'linhas'
+ORDERS = 'pedidos'
+DIMENSIONS: list[str] = CONFIG['dimensions']
+DIM_IDS = {dim: f'{dim}_id' for dim in DIMENSIONS}
+CELL: list[str] = [DAY, *DIM_IDS.values(), MOTIVO]
+
+STATE_DIR = PIPELINE_PATHS['cancel_cube']['state']
+DIMENSIONS_DIR = PIPELINE_PATHS['cancel_cube']['dimensions']
+CUBE_DIR = PIPELINE_PATHS['cancel_cube']['output_parquet']
+STATE_LAYOUT = GoldLayout(sort_by=(DAY,), index_columns=('pedido',)) # <-- ordenado por dia, a releitura dos dias tocados poda row groups
+CUBE_LAYOUT = GoldLayout(sort_by=tuple(CELL))
+
+class DimensionCodes:
+    """
+    Dicionário de uma dimensão: o código é a posição do valor na lista, valores novos entram no fim,
+    então um código nunca muda de significado entre atualizações
+
+    params:
+    name: str | Nome da dimensão (filial, tipo_de_pedido, setor)
+    directory: Path = DIMENSIONS_DIR | Diretório dos dicionários
+    """
+
+    def __init__(self, name: str, directory: Path = DIMENSIONS_DIR):
+        self.name = name
+        self.path = Path(directory) / f'{name}.parquet'
+        self.values: list[str] = []
+
+        if self.path.exists():
+            table = pq.read_table(self.path).sort_by('codigo')
+            self.values = table.column('valor').to_pylist()
+
+    def save(self) -> Path:
+        table = pa.table({
+            'codigo': pa.array(np.arange(len(self.values), dtype=np.int32)),
+            'valor': pa.array(self.values, type=pa.string())
+        })
+        return write_gold(table, self.path, layout=GoldLayout(sort_by=('codigo',)))
+
+    def encode(self, values: pa.Array | pa.ChunkedArray) -> pa.Array:
+        """
+        Códigos dos valores (nulo continua nulo), registrando os valores ainda não vistos
+        """
+        values = values.cast(pa.string())
+        known = pa.array(self.values, type=pa.string())
+        distinct = pc.unique(pc.drop_null(values))
+        new = distinct.filter(pc.invert(pc.is_in(distinct, value_set=known)))
+
+        if len(new):
+            self.values.extend(new.to_pylist())
+            self.save()
+
+        return pc.index_in(values, value_set=pa.array(self.values, type=pa.string())).cast(pa.int32())
+
+    def decode(self, codes: pa.Array | pa.ChunkedArray) -> pa.Array:
+        return pc.take(pa.array(self.values, type=pa.string()), codes)
+
+def cancel_lines(delta: pd.DataFrame | pa.Table, dimensions_dir: Path = DIMENSIONS_DIR) -> pa.Table:
+    """
+    Uma linha por pedido/item/data de cancelamento com dia, dimensões codificadas, motivo oficial e peças
+
+    params:
+    delta: pd.DataFrame | pa.Table | Linhas novas do relatório de cancelados, já tratadas pelo schema
+    dimensions_dir: Path = DIMENSIONS_DIR | Diretório dos dicionários das dimensões
+    """
+
+    if isinstance(delta, pd.DataFrame):
+        delta = SOURCE.to_arrow(delta)
+
+    valid = pc.is_valid(delta.column(KEYS[0]))
+    for key in KEYS[1:]:
+        valid = pc.and_(valid, pc.is_valid(delta.column(key)))
+    delta = dedup_keys(delta.filter(valid), KEYS)
+
+    tipo = delta.column('tipo_de_pedido').to_pandas()
+    setor = apply_setor_rules(pd.DataFrame({'box': pd.Series(pd.NA, index=tipo.index), 'tipo_de_pedido': tipo}), SETOR_RULES) # <-- sem box no relatório, só regras por tipo de pedido
+    motivo = apply_motivo_rules(delta.column('motivo_cancelamento').to_pandas())
+
+    values = {'filial': delta.column('filial'), 'tipo_de_pedido': delta.column('tipo_de_pedido'), 'setor': pa.array(setor, type=pa.string())}
+
+    return pa.table({
+        **{key: delta.column(key) for key in KEYS},
+        DAY: pc.cast(delta.column(EVENT), pa.date32()),
+        **{DIM_IDS[dim]: DimensionCodes(dim, dimensions_dir).encode(values[dim]) for dim in DIMENSIONS},
+        MOTIVO: pa.array(motivo.to_numpy(dtype=np.int32)),
+        QTY: pc.fill_null(delta.column(QTY), 0)
+    })
+
+def _upsert_state(lines: pa.Table, state_dir: Path, buckets: int):
+    key_buckets = bucket_ids(lines.column('pedido'), buckets)
+
+    for bucket in np.unique(key_buckets):
+        path = state_dir / f'bucket_{int(bucket):03d}.parquet'
+        part = lines.filter(pa.array(key_buckets == bucket))
+
+        if path.exists():
+            state = pq.read_table(path, memory_map=True).cast(part.schema)
+            kept = state.join(part.select(KEYS), keys=KEYS, join_type='left anti').select(part.column_names)
+            part = pa.concat_tables([kept, part]) # <-- mesma chave reextraída substitui a linha anterior
+
+        write_gold(part, path, layout=STATE_LAYOUT)
+
+def _aggregate(lines: pa.Table) -> pa.Table:
+    cube = lines.group_by(CELL).aggregate([(QTY, 'sum'), ('pedido', 'count'), ('pedido', 'count_distinct')])
+    names = {f'{QTY}_sum': QTY, 'pedido_count': LINES, 'pedido_count_distinct': ORDERS}
+    cube = cube.rename_columns([names.get(c, c) for c in cube.column_names]).select(CELL + [QTY, LINES, ORDERS])
+    return cube.cast(pa.schema([cube.schema.field(c) for c in CELL] + [pa.field(c, pa.int64()) for c in (QTY, LINES, ORDERS)]))
+
+def update_cube(
+        delta: pd.DataFrame | pa.Table,
+        state_dir: Path = STATE_DIR,
+        dimensions_dir: Path = DIMENSIONS_DIR,
+        cube_dir: Path = CUBE_DIR,
+        buckets: int = CONFIG['buckets']
+) -> dict[str, int]:
+    """
+    Aplica um delta de cancelamentos: atualiza o estado das linhas e reagrega só os dias tocados
+
+    Retorna {'linhas': linhas no delta, 'dias': dias reagregados, 'celulas': células desses dias}
+
+    params:
+    delta: pd.DataFrame | pa.Table | Linhas novas do relatório de cancelados, já tratadas pelo schema
+    state_dir: Path = STATE_DIR | Diretório do estado por linha cancelada
+    dimensions_dir: Path = DIMENSIONS_DIR | Diretório dos dicionários das dimensões
+    cube_dir: Path = CUBE_DIR | Diretório do cubo (um arquivo por mês)
+    buckets: int = CONFIG['buckets'] | Arquivos do estado (não mudar depois da primeira carga)
+    """
+
+    lines = cancel_lines(delta, dimensions_dir)
+    if lines.num_rows == 0:
+        return {'linhas': 0, 'dias': 0, 'celulas': 0}
+
+    state_dir, cube_dir = Path(state_dir), Path(cube_dir)
+    _upsert_state(lines, state_dir, buckets)
+
+    touched = pc.unique(lines.column(DAY))
+    state = open_gold(state_dir).to_table(columns=CELL + ['pedido', QTY], filter=ds.field(DAY).isin(touched))
+    recomputed = _aggregate(state)
+
+    catalog = TableCatalog(cube_dir) if TableCatalog.exists(cube_dir) else None
+    months = month_keys(recomputed.column(DAY))
+
+    for month in np.unique(months):
+        path = cube_dir / f'cubo_{month}.parquet'
+        part = recomputed.filter(pa.array(months == month))
+
+        if path.exists():
+            existing = pq.read_table(path, memory_map=True).cast(part.schema)
+            existing = existing.filter(pc.invert(pc.is_in(existing.column(DAY), value_set=touched))) # <-- dias tocados saem inteiros e voltam recalculados
+            part = pa.concat_tables([existing, part])
+
+        write_gold(part, path, layout=CUBE_LAYOUT, catalog=catalog)
+
+    logger.info(
+        f'cubo de cancelamento: {lines.num_rows} linhas, {len(touched)} dias, {recomputed.num_rows} celulas',
+        extra={'job': 'cancel_cube', 'status': 'sucess'}
+    )
+
+    return {'linhas': lines.num_rows, 'dias': len(touched), 'celulas': recomputed.num_rows}
+
+def read_cube(
+        date_range: tuple | None = None,
+        labels: bool = True,
+        cube_dir: Path = CUBE_DIR,
+        dimensions_dir: Path = DIMENSIONS_DIR,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Lê o cubo no período
+
+    params:
+    date_range: tuple | None = None | (início, fim) em dias, início inclusivo e fim exclusivo
+    labels: bool = True | Acrescenta os rótulos das dimensões e do motivo oficial ao lado dos códigos
+    cube_dir: Path = CUBE_DIR | Diretório do cubo
+    dimensions_dir: Path = DIMENSIONS_DIR | Diretório dos dicionários
+    as_pandas: bool = False | Retorna DataFrame em vez de pa.Table
+    """
+
+    expression = None
+    if date_range is not None:
+        start, end = date_range
+        if start is not None:
+            expression = ds.field(DAY) >= pa.scalar(to_date(start), type=pa.date32())
+        if end is not None:
+            clause = ds.field(DAY) < pa.scalar(to_date(end), type=pa.date32())
+            expression = clause if expression is None else expression & clause
+
+    cube_dir = Path(cube_dir)
+    if cube_dir.is_dir() and open_gold(cube_dir).files:
+        table = open_gold(cube_dir).to_table(filter=expression)
+    else:
+        table = _aggregate(cancel_lines(SOURCE.arrow_schema.empty_table(), dimensions_dir))
+
+    if labels:
+        for dim in DIMENSIONS:
+            table = table.append_column(dim, DimensionCodes(dim, dimensions_dir).decode(table.column(DIM_IDS[dim])))
+        motivos = pa.array([MOTIVOS_OFICIAIS.get(i) for i in range(max(MOTIVOS_OFICIAIS) + 1)], type=pa.string())
+        table = table.append_column('motivo', pc.take(motivos, table.column(MOTIVO)))
+
+    return table.to_pandas(types_mapper=pd.ArrowDtype) if as_pandas else table
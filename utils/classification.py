@@ -5,13 +5,19 @@ Classes e funções:
 
 apply_setor_rules(): aplica as regras de negocio na coluna tipos_de_pedido. Como usar:
 df['setor'] = apply_setor_rules(df, SETOR_RULES)
+
+apply_motivo_rules(): converte o motivo de cancelamento em texto livre no código do MOTIVOS_OFICIAIS. Como usar:
+df['motivo_id'] = apply_motivo_rules(df['motivo_cancelamento'])
 """
 
 from dataclasses import dataclass
-from typing import Iterable, Optional, Tuples
+from typing import Iterable, Optional
 import pandas as pd
-import numbers as np
+import numpy as np
 from collections.abc import Callable
+import re
+import unicodedata
+from config.regras_de_negocio import MAPEAMENTO_TEXTUAL, REGRAS_DIRETAS
 
 
 # Regras de classificação de setor =======================================================
@@ -208,7 +214,7 @@ SLA_RULES = [
     ),
     SLARule(
         (557, 584),
-        lambda d: (d + pd.TImedelta(days=1)).dt.normalize() + pd.Timedelta(hours=18)
+        lambda d: (d + pd.Timedelta(days=1)).dt.normalize() + pd.Timedelta(hours=18)
     ),
 
 
@@ -228,7 +234,7 @@ def check_dedline(df: pd.DataFrame) -> pd.Series:
         ini, fim = rule.box_range
         mask = mask_base & box.between(ini, fim)
 
-        deadline = rule.deadlie_fn(base_date)
+        deadline = rule.deadline_fn(base_date)
 
         resultado[mask] = np.where(
             update[mask] <= deadline[mask],
@@ -236,4 +242,49 @@ def check_dedline(df: pd.DataFrame) -> pd.Series:
             'Fora do prazo'
         )
 
-    return resultado
\ No newline at end of file
+    return resultado
+
+# Regras de motivo de cancelamento =======================================================
+
+MOTIVO_PADRAO = 1 # <-- 'MOTIVO DESCONTINUADO (OUTROS)', motivo vazio ou sem regra
+_MOTIVO_REGEX = [(codigo, re.compile('|'.join(padroes))) for codigo, padroes in MAPEAMENTO_TEXTUAL.items()]
+
+def _normalize_motivo(texto: str) -> str:
+    texto = unicodedata.normalize('NFKD', texto.lower().strip())
+    return ''.join(c for c in texto if not unicodedata.combining(c)) # <-- REGRAS_DIRETAS são escritas sem acento
+
+def classify_motivo(texto) -> int:
+    """
+    Código do MOTIVOS_OFICIAIS para um motivo em texto livre: regex do MAPEAMENTO_TEXTUAL (na ordem do dicionário),
+    depois palavras-chave do REGRAS_DIRETAS (alguma do primeiro grupo e, quando existe, alguma do segundo)
+
+    params:
+    texto: str | Motivo digitado no cancelamento
+    """
+    if texto is None or texto is pd.NA or (isinstance(texto, float) and np.isnan(texto)):
+        return MOTIVO_PADRAO
+
+    bruto = str(texto).lower().strip()
+    normalizado = _normalize_motivo(bruto)
+
+    for codigo, regex in _MOTIVO_REGEX:
+        if regex.search(bruto) or regex.search(normalizado):
+            return codigo
+
+    for codigo, palavras, *exigidas in REGRAS_DIRETAS:
+        if any(p in normalizado for p in palavras) and all(any(p in normalizado for p in grupo) for grupo in exigidas):
+            return codigo
+
+    return MOTIVO_PADRAO
+
+def apply_motivo_rules(motivos: pd.Series) -> pd.Series:
+    """
+    Aplica o classify_motivo uma vez por texto distinto e devolve os códigos para as linhas (Int64)
+
+    params:
+    motivos: pd.Series | Coluna motivo_cancelamento
+    """
+    codes, uniques = pd.factorize(motivos, use_na_sentinel=True) # <-- poucos motivos distintos, muitas linhas repetidas
+    mapped = np.array([classify_motivo(u) for u in uniques] + [MOTIVO_PADRAO], dtype=np.int64) # <-- última posição atende o sentinela -1 (nulo)
+
+    return pd.Series(mapped[codes], index=motivos.index, dtype='Int64')
@@ -8,7 +8,13 @@ CustomJsonFormatter(): Formatação de asctime
 
 setup_logger(): Criação e configuração da log
 
-log_with_context(): Inserção de campos com contexto corporativo
+start_log_listener(): Inicia o processo ouvinte do modo fila (grava em lote no disco local)
+
+configure_worker_logging(): Liga processos filhos à fila de log do processo principal
+
+log_with_context(): Inserção de campos com contexto corporativo, amostragem de sucessos e histograma de latência por job
+
+flush_histograms(): Grava na log os histogramas de latência acumulados (também no LogListener.stop e no encerramento)
 
 get_user(): Retorna o sistema operacional
 
@@ -16,15 +22,43 @@ get_user(): Retorna o sistema operacional
 
 import os
 import logging
+import logging.handlers
+import multiprocessing
+import queue as queue_module
+import shutil
+import copy
+import random
+import threading
 import time
+import atexit
 from pythonjsonlogger import jsonlogger
 from concurrent_log_handler import ConcurrentRotatingFileHandler
 import functools
 import uuid
 import inspect
-from config.paths import LOG_PATH, LOG_DIR
+from config.paths import LOG_PATH, LOG_DIR, LOCAL_LOG_PATH
 import getpass
 
+LOG_FIELDS = ' '.join([
+    '%(asctime)s', # data e hora exatos
+    '%(levelname)s', # log level (INFO, WARNING, ERROR, etc.)
+    '%(name)s', # nome da log
+    '%(message)s', # atual mensagem na log
+    '%(job)s', # nome da execução
+    '%(statu)s', # status da execução (sucess, failure, etc)
+    '%(user)s', # usuario ou sistema responsavel pela execução
+    '%(locate)s', # sistema operação
+    '%(event_id)s', # ID de execução única
+    '%(duration)s', # execution duration
+    '%(source_file)s', # arquivo/fonte que acionou a execução
+])
+
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+_LOG_QUEUE = None # <-- fila do modo fila, definida por start_log_listener ou configure_worker_logging
+_MANAGED_LOGGERS: dict[str, logging.Logger] = {} # <-- loggers criados por setup_logger, trocam de handler ao ligar/desligar a fila
+
 class ContextFilter(logging.Filter):
     """
     Filtro que injeta o nome do usuário no registro de log
@@ -56,86 +90,404 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
 def setup_logger(name= __name__, locate_value=None):
     """
     Criação e configuração de log com um único handler
-    """
 
-    os.makedinr(LOG_DIR, exist_ok=True)
+    Com a fila de log ativa (start_log_listener / configure_worker_logging) o handler apenas
+    enfileira o registro em memória; caso contrário grava direto no LOG_PATH
+    """
 
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
     logger.propagate = False
 
     if not logger.handlers:
-        logHandler = ConcurrentRotatingFileHandler(LOG_PATH, maxBytes=10 * 1024 * 1024, backupCount=5)
-
-        formatter = CustomJsonFormatter(
-            fmt=' '.join([
-                '%(asctime)s', # data e hora exatos
-                '%(levelname)s', # log level (INFO, WARNING, ERROR, etc.)
-                '%(name)s', # nome da log
-                '%(message)s', # atual mensagem na log
-                '%(job)s', # nome da execução
-                '%(statu)s', # status da execução (sucess, failure, etc)
-                '%(user)s', # usuario ou sistema responsavel pela execução
-                '%(locate)s', # sistema operação
-                '%(event_id)s', # ID de execução única
-                '%(duration)s', # execution duration
-                '%(source_file)s', # arquivo/fonte que acionou a execução
-            ]))
-        logHandler.setFormatter(formatter)
+        if _LOG_QUEUE is not None:
+            logHandler = BatchQueueHandler(_LOG_QUEUE)
+        else:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            logHandler = ConcurrentRotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+            logHandler.setFormatter(CustomJsonFormatter(fmt=LOG_FIELDS))
 
         context_filter = ContextFilter(user=get_user(), locate=locate_value)
         logger.addFilter(context_filter)
         logger.addHandler(logHandler)
+        _MANAGED_LOGGERS[name] = logger
 
     if not logger or not isinstance(logger, logging.Logger):
         raise RuntimeError(f'logger invalido criado para {name}')
     
     return logger
 
-def log_with_context(job=None, logger=None):
+# Modo fila =======================================================
+
+class BatchQueueHandler(logging.handlers.QueueHandler):
+    """
+    Handler do modo fila: resolve a mensagem e o traceback no processo produtor e enfileira o registro,
+    sem lock de arquivo nem escrita em disco no caminho da extração
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+
+        if record.exc_info:
+            record.traceback = logging.Formatter().formatException(record.exc_info)
+
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+class _BatchFileWriter:
+    """
+    Escrita em lote com rotação por tamanho. Segmentos rotacionados são copiados para o LOG_DIR (OneDrive)
+    """
+
+    def __init__(self, path, sync_dir, max_bytes, backup_count):
+        self.path = path
+        self.sync_dir = sync_dir
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.formatter = CustomJsonFormatter(fmt=LOG_FIELDS)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.stream = open(path, 'a', encoding='utf-8')
+
+    def write(self, records):
+        self.stream.write(''.join(f'{self.formatter.format(r)}\n' for r in records))
+
+        if self.max_bytes and self.stream.tell() >= self.max_bytes:
+            self.rotate()
+
+    def sync(self):
+        self.stream.flush()
+        os.fsync(self.stream.fileno())
+
+    def rotate(self):
+        self.sync()
+        self.stream.close()
+
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f'{self.path}.{i}'
+            if os.path.exists(src):
+                os.replace(src, f'{self.path}.{i + 1}')
+
+        rotated = f'{self.path}.1'
+        os.replace(self.path, rotated)
+
+        if self.sync_dir:
+            try:
+                os.makedirs(self.sync_dir, exist_ok=True)
+                shutil.copy2(rotated, os.path.join(self.sync_dir, f'log_{time.strftime("%Y%m%d_%H%M%S")}.log'))
+            except OSError:
+                pass # <-- OneDrive indisponível não pode parar a log local
+
+        self.stream = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        self.sync()
+        self.stream.close()
+
+def _reset_handlers():
+    """
+    Refaz o handler dos loggers já criados (ex: logger de config.pipeline_config, criado no import)
+    """
+    for logger in _MANAGED_LOGGERS.values():
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        for log_filter in list(logger.filters):
+            logger.removeFilter(log_filter)
+
+    for name in list(_MANAGED_LOGGERS):
+        setup_logger(name)
+
+def _listener_main(log_queue, log_path, sync_dir, max_bytes, backup_count, batch_size, flush_interval):
+    """
+    Loop do processo ouvinte: drena a fila em lotes e sincroniza o arquivo a cada flush_interval segundos
+    """
+
+    writer = _BatchFileWriter(log_path, sync_dir, max_bytes, backup_count)
+    last_sync = time.monotonic()
+    running = True
+
+    while running:
+        batch = []
+
+        try:
+            item = log_queue.get(timeout=flush_interval)
+            while True:
+                if item is None: # <-- sentinela de parada
+                    running = False
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    break
+                item = log_queue.get_nowait()
+        except queue_module.Empty:
+            pass
+
+        if batch:
+            writer.write(batch)
+
+        if not running or time.monotonic() - last_sync >= flush_interval:
+            writer.sync()
+            last_sync = time.monotonic()
+
+    writer.close()
+
+class LogListener:
+    """
+    Processo único que consome a fila de log e grava no disco local
+
+    params:
+    log_queue: multiprocessing.Queue | Fila compartilhada com os produtores
+    process: multiprocessing.Process | Processo ouvinte
+    """
+
+    def __init__(self, log_queue, process):
+        self.queue = log_queue
+        self.process = process
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Grava os histogramas pendentes, envia a sentinela, aguarda o último lote ser gravado e desliga a fila
+        do processo atual
+        """
+        global _LOG_QUEUE
+
+        flush_histograms() # <-- ainda pela fila: o último intervalo de latências não se perde no desligamento
+
+        _LOG_QUEUE = None
+        _reset_handlers()
+
+        self.queue.put(None)
+        self.process.join(timeout)
+
+def start_log_listener(
+        log_path=LOCAL_LOG_PATH,
+        sync_dir=LOG_DIR,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        batch_size: int = 500,
+        flush_interval: float = 2.0
+) -> LogListener:
+    """
+    Inicia o modo fila: loggers criados depois desta chamada apenas enfileiram registros,
+    e um processo ouvinte grava em lote no disco local, com rotação e fsync periódico
+
+    Deve ser chamado no processo principal antes de setup_logger; processos filhos usam configure_worker_logging
+
+    params:
+    log_path = LOCAL_LOG_PATH | Arquivo de log local
+    sync_dir = LOG_DIR | Diretório que recebe cópia dos segmentos rotacionados, None desliga
+    max_bytes: int = LOG_MAX_BYTES | Tamanho para rotação
+    backup_count: int = LOG_BACKUP_COUNT | Quantidade de segmentos mantidos
+    batch_size: int = 500 | Máximo de registros por escrita
+    flush_interval: float = 2.0 | Intervalo em segundos entre fsync
+    """
+    global _LOG_QUEUE
+
+    log_queue = multiprocessing.Queue(-1)
+    process = multiprocessing.Process(
+        target=_listener_main,
+        args=(log_queue, str(log_path), str(sync_dir) if sync_dir else None, max_bytes, backup_count, batch_size, flush_interval),
+        name='log_listener',
+        daemon=True
+    )
+    process.start()
+
+    _LOG_QUEUE = log_queue
+    _reset_handlers()
+
+    return LogListener(log_queue, process)
+
+def configure_worker_logging(log_queue) -> None:
+    """
+    Liga um processo filho à fila de log do processo principal (LogListener.queue)
+    """
+    global _LOG_QUEUE
+    _LOG_QUEUE = log_queue
+    _reset_handlers()
+
+# Histogramas de latência =======================================================
+
+HISTOGRAM_FLUSH_INTERVAL = 60.0 # <-- segundos entre gravações dos histogramas na log
+HISTOGRAM_BUCKETS_US = tuple(2 ** i for i in range(0, 31, 2)) # <-- limites superiores em microssegundos (1us .. ~18min), escala log
+
+class LatencyHistogram:
+    """
+    Histograma de latência em memória de um job, buckets fixos em escala logarítmica
+
+    params:
+    job: str | Nome do job
+    """
+
+    __slots__ = ('job', 'logger', 'counts', 'count', 'total_ns', 'max_ns', '_lock')
+
+    def __init__(self, job: str):
+        self.job = job
+        self.logger = None # <-- logger do job, definido na primeira execução
+        self._lock = threading.Lock() # <-- funções decoradas rodam em threads, os contadores não podem se perder
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS_US) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def observe(self, elapsed_ns: int):
+        elapsed_us = elapsed_ns // 1000
+        idx = 0
+        for idx, limit in enumerate(HISTOGRAM_BUCKETS_US): # <-- 16 comparações no pior caso
+            if elapsed_us <= limit:
+                break
+        else:
+            idx = len(HISTOGRAM_BUCKETS_US)
+
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total_ns += elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+
+    def take(self) -> dict | None:
+        """
+        Snapshot e zeragem na mesma seção crítica (nenhuma observação entre os dois se perde); None se vazio
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            snapshot = self.snapshot()
+            self._clear()
+            return snapshot
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ns / self.count / 1e6, 3) if self.count else 0.0,
+            'max_ms': round(self.max_ns / 1e6, 3),
+            'buckets_us': {
+                (str(limit) if i < len(HISTOGRAM_BUCKETS_US) else '+inf'): c
+                for i, (limit, c) in enumerate(zip(HISTOGRAM_BUCKETS_US + (None,), self.counts)) if c
+            }
+        }
+
+_HISTOGRAMS: dict[str, LatencyHistogram] = {}
+_last_histogram_flush = time.monotonic()
+
+def flush_histograms(logger=None) -> None:
+    """
+    Grava um registro por job com o histograma acumulado e zera os contadores
+    """
+    global _last_histogram_flush
+    _last_histogram_flush = time.monotonic()
+
+    for histogram in list(_HISTOGRAMS.values()):
+        if (logger or histogram.logger) is None:
+            continue
+
+        snapshot = histogram.take()
+        if snapshot is None:
+            continue
+
+        (logger or histogram.logger).info(
+            f'{histogram.job} latency histogram',
+            extra={
+                'job': histogram.job,
+                'status': 'histogram',
+                'duration': round(snapshot['mean_ms'] / 1000, 6),
+                'histogram': snapshot
+            }
+        )
+
+atexit.register(flush_histograms) # <-- job que parou de ser chamado ou processo encerrado antes do intervalo
+
+def log_with_context(job=None, logger=None, sample_rate: float = 1.0):
     """
     Aplicação de decorador com contexto corporativo (job, duration, event, ID, etc)
+
+    Metadados da função (job, source_file) são resolvidos uma única vez na decoração.
+    Toda execução alimenta o histograma de latência do job, gravado a cada HISTOGRAM_FLUSH_INTERVAL;
+    registros de sucesso são amostrados por sample_rate, falhas são sempre registradas
+
+    params:
+    job: str | None = None | Nome do job, por padrão o nome da função
+    logger: Logger | None = None | Logger usado, por padrão o kwarg 'logger' da chamada ou 'default_logger'
+    sample_rate: float = 1.0 | Fração dos sucessos registrados individualmente (0.0 registra apenas o histograma)
     """
 
     def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            start_time = time.time()
-            event_id = str(uuid.uuid4())
+        job_name = job or func.__name__
+        func_name = func.__name__
+        success_message = f"{func_name} executed successfully"
+
+        try:
             source_file = inspect.getfile(func)
+        except TypeError:
+            source_file = None
 
-            _logger = logger or kwargs.get('logger')
+        resolved = {'logger': logger}
+
+        def _get_logger(kwargs):
+            _logger = resolved['logger'] or kwargs.get('logger')
             if _logger is None:
-                _logger = setup_logger(name='default_logger') # fallback
+                _logger = resolved['logger'] = setup_logger(name='default_logger') # fallback, resolvido uma vez
+            return _logger
+
+        histogram = _HISTOGRAMS.setdefault(job_name, LatencyHistogram(job_name))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
 
             try:
                 result = func(*args, **kwargs)
-                duration = round(time.time() - start_time, 2)
-
-                _logger.info(
-                    f"{func.__name__} executed successfully",
-                    extra = {
-                        'job': job or func.__name__,
-                        'status': 'sucess',
-                        'event_id': event_id,
-                        'duration': duration,
-                        'source_file': source_file
-                    }
-                )
-                return result
             except Exception as e:
-                duration = round(time.time() - start_time, 2)
-                _logger.exception(
-                    f"error execution {func.__name__}: {e}",
+                elapsed_ns = time.perf_counter_ns() - start_ns
+                histogram.observe(elapsed_ns)
+                histogram.logger = _get_logger(kwargs)
+                histogram.logger.exception(
+                    f"error execution {func_name}: {e}",
                     extra={
-                        'job': job or func.__name__,
+                        'job': job_name,
                         'status': 'failure',
-                        'event_id': event_id,
-                        'duration': duration,
+                        'event_id': str(uuid.uuid4()),
+                        'duration': round(elapsed_ns / 1e9, 6),
                         'source_file': source_file
                     }
                 )
                 raise
+
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            histogram.observe(elapsed_ns)
+
+            if histogram.logger is None:
+                histogram.logger = _get_logger(kwargs)
+
+            if sample_rate >= 1.0 or (sample_rate > 0.0 and random.random() < sample_rate):
+                _get_logger(kwargs).info(
+                    success_message,
+                    extra = {
+                        'job': job_name,
+                        'status': 'sucess',
+                        'event_id': str(uuid.uuid4()),
+                        'duration': round(elapsed_ns / 1e9, 6),
+                        'source_file': source_file,
+                        'sample_rate': sample_rate
+                    }
+                )
+
+            if time.monotonic() - _last_histogram_flush >= HISTOGRAM_FLUSH_INTERVAL:
+                flush_histograms()
+
+            return result
         return wrapper
     return decorator
 
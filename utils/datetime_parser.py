@@ -0,0 +1,101 @@
+"""
+Conversão vetorizada de colunas de data/hora com formato explícito (pyarrow strptime)
+
+Os exports do Cognos trazem datas em texto no padrão brasileiro (dd/mm/yyyy hh:mm:ss) e repetem muito o
+mesmo timestamp. Cada coluna é codificada em dicionário e apenas os valores distintos passam pelo strptime
+(cache natural dos textos repetidos); o resultado volta para as linhas por índice. Valores que não batem
+com nenhum formato vão para a coluna de quarentena em vez de gerar exceção
+
+Classes e funções:
+DEFAULT_DATETIME_FORMATS: Formatos tentados, em ordem, quando a coluna não tem formato próprio
+
+QUARANTINE_COLUMN: Nome da coluna que recebe os valores inválidos (coluna=valor; ...)
+
+parse_datetime_array(): Converte um array de texto e retorna (timestamps, máscara de inválidos)
+
+parse_datetimes(): Converte as colunas de um DataFrame e preenche a coluna de quarentena
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+DEFAULT_DATETIME_FORMATS = ('%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+QUARANTINE_COLUMN = '_quarentena'
+TIMESTAMP_UNIT = 'ms'
+
+def parse_datetime_array(
+        values: pa.Array | pa.ChunkedArray,
+        formats: tuple[str, ...] = DEFAULT_DATETIME_FORMATS
+) -> tuple[pa.Array, np.ndarray]:
+    """
+    Converte texto em timestamp, testando os formatos em ordem apenas sobre os valores distintos
+
+    Retorna o array de timestamps (nulo onde vazio ou inválido) e uma máscara numpy dos valores inválidos
+
+    params:
+    values: pa.Array | pa.ChunkedArray | Coluna em texto
+    formats: tuple[str, ...] = DEFAULT_DATETIME_FORMATS | Formatos strptime, o primeiro que converter vence
+    """
+
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+
+    if not pa.types.is_string(values.type) and not pa.types.is_large_string(values.type):
+        values = values.cast(pa.string())
+
+    encoded = pc.dictionary_encode(pc.utf8_trim_whitespace(values))
+    dictionary = encoded.dictionary
+    dictionary = pc.if_else(pc.equal(dictionary, ''), pa.scalar(None, pa.string()), dictionary)
+
+    parsed = None
+    for fmt in formats:
+        attempt = pc.strptime(dictionary, format=fmt, unit=TIMESTAMP_UNIT, error_is_null=True)
+        parsed = attempt if parsed is None else pc.coalesce(parsed, attempt)
+
+    invalid_dictionary = pc.and_(pc.is_valid(dictionary), pc.is_null(parsed))
+
+    result = pc.take(parsed, encoded.indices)
+    invalid = pc.fill_null(pc.take(invalid_dictionary, encoded.indices), False)
+
+    return result, invalid.to_numpy(zero_copy_only=False)
+
+def parse_datetimes(
+        df: pd.DataFrame,
+        formats_by_column: dict[str, tuple[str, ...]],
+        quarantine_column: str = QUARANTINE_COLUMN
+) -> pd.DataFrame:
+    """
+    Converte as colunas de data/hora do DataFrame. Linhas com valor inválido recebem 'coluna=valor'
+    na coluna de quarentena (separados por '; ' quando mais de uma coluna falha)
+
+    params:
+    df: pd.DataFrame | DataFrame com as colunas em texto
+    formats_by_column: dict[str, tuple[str, ...]] | Coluna -> formatos (colunas ausentes são ignoradas)
+    quarantine_column: str = QUARANTINE_COLUMN | Nome da coluna de quarentena
+    """
+
+    quarantine = None
+
+    for col, formats in formats_by_column.items():
+        if col not in df.columns or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+
+        raw = pa.array(df[col], type=pa.string(), from_pandas=True)
+        parsed, invalid = parse_datetime_array(raw, formats)
+
+        df[col] = parsed.to_numpy(zero_copy_only=False) # <-- numpy posicional, independe do índice do chunk
+
+        if invalid.any(): # <-- erros são raros, o laço percorre apenas as linhas inválidas
+            if quarantine is None:
+                quarantine = np.full(len(df), None, dtype=object)
+
+            for i, value in zip(np.flatnonzero(invalid), raw.filter(pa.array(invalid)).to_pylist()):
+                message = f'{col}={value}'
+                quarantine[i] = message if quarantine[i] is None else f'{quarantine[i]}; {message}'
+
+    if quarantine is not None:
+        df[quarantine_column] = pd.array(quarantine, dtype='string')
+
+    return df
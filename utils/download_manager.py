@@ -0,0 +1,113 @@
+"""
+Gerenciador de downloads do playwright, substitui esperas fixas e polling de diretório
+
+Classes e funções:
+DownloadError(): Erro de download incompleto ou inválido
+
+download_report(): Aguarda o evento de download, salva direto no diretório temporário e valida o arquivo
+
+Como usar:
+path = download_report(page, lambda: frame.click(f'#{ELEMENTS["ELEMENTS_OLPN"]["element_confirm"]}'),
+                       TEMP_DIR['BRONZE']['olpn'], encoding=PIPELINE_CONFIG['olpn']['encoding'])
+"""
+
+from pathlib import Path
+from collections.abc import Callable
+from contextlib import nullcontext
+import codecs
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT_MS = 15 * 60 * 1000 # <-- relatórios grandes do Cognos podem levar minutos para renderizar
+
+ENCODING_HEADERS = { # <-- BOMs aceitos para cada encoding do PIPELINE_CONFIG
+    'utf-16': (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE),
+    'utf-16-le': (codecs.BOM_UTF16_LE,),
+    'utf-16-be': (codecs.BOM_UTF16_BE,),
+}
+
+class DownloadError(Exception):
+    """
+    Download falhou, veio vazio ou com encoding diferente do esperado
+    """
+
+def _check_header(path: Path, encoding: str | None) -> None:
+    expected = ENCODING_HEADERS.get((encoding or '').lower())
+    if not expected:
+        return
+
+    with open(path, 'rb') as f:
+        header = f.read(2)
+
+    if header not in expected:
+        raise DownloadError(f'{path.name} sem cabeçalho {encoding} (lido {header!r})')
+
+def download_report(
+        page,
+        trigger: Callable[[], None],
+        target_dir: str | Path,
+        filename: str | None = None,
+        encoding: str | None = 'utf-16',
+        min_size: int = 1,
+        timeout_ms: int = DEFAULT_TIMEOUT_MS,
+        stage: Callable | None = None
+) -> Path:
+    """
+    Executa a ação que dispara o download e retorna assim que o arquivo está completo no disco
+
+    O evento de download é registrado antes da ação (page.expect_download), então não há corrida
+    entre o clique e o início da transferência. download.save_as só retorna com o arquivo finalizado.
+
+    params:
+    page: Page | Página playwright onde o download acontece
+    trigger: Callable[[], None] | Ação que dispara o download (ex: clique no botão de confirmação)
+    target_dir: str | Path | Diretório de destino (ex: TEMP_DIR['BRONZE']['olpn'])
+    filename: str | None = None | Nome final do arquivo, por padrão usa o suggested_filename do Cognos
+    encoding: str | None = 'utf-16' | Encoding esperado, valida o BOM do arquivo. None desliga a validação
+    min_size: int = 1 | Tamanho mínimo em bytes para o arquivo ser considerado válido
+    timeout_ms: int = DEFAULT_TIMEOUT_MS | Tempo máximo de espera pelo evento de download
+    stage: Callable | None = None | Fábrica de medição por etapa (ex: BaseDataExtraction._stage), mede 'render'
+    (da ação ao início do download) separado de 'download' (transferência e validação)
+    """
+
+    target_dir = Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+
+    with stage('render') if stage else nullcontext():
+        with page.expect_download(timeout=timeout_ms) as download_info:
+            trigger()
+
+        download = download_info.value # <-- o Cognos só dispara o download quando termina de renderizar
+
+    with stage('download') if stage else nullcontext() as rec:
+        target = target_dir / (filename or download.suggested_filename)
+
+        download.save_as(target) # <-- bloqueia até a transferência terminar
+
+        failure = download.failure()
+        if failure:
+            raise DownloadError(f'download {target.name} falhou: {failure}')
+
+        size = target.stat().st_size
+        if size < min_size:
+            raise DownloadError(f'{target.name} com {size} bytes, mínimo {min_size}')
+
+        _check_header(target, encoding)
+
+        if rec is not None:
+            rec.bytes = size
+
+    logger.info(
+        f'download concluido {target.name} ({size} bytes)',
+        extra={
+            'job': 'download_report',
+            'status': 'sucess',
+            'duration': round(time.perf_counter() - start, 2)
+        }
+    )
+
+    return target
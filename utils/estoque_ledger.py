@@ -0,0 +1,259 @@
+"""
+Razão (ledger) da movimentação de estoque (7.05) com snapshots periódicos de saldo
+
+As movimentações tratadas entram como deltas na chave da movimentação (key_columns do 'estoque_mov'), só as
+que ainda não estão nos deltas: reaplicar a mesma extração (ou janelas sobrepostas) não muda o saldo. A cada
+snapshot_every_hours o saldo acumulado é gravado como snapshot; o saldo em um instante qualquer é o
+último snapshot anterior mais a cauda curta de deltas até o instante, sem reprocessar o histórico.
+Movimentação atrasada (anterior ao último snapshot) invalida os snapshots posteriores a ela, que são
+refeitos nos mesmos instantes logo após a gravação do delta
+
+Classes e funções:
+append_movements(): Grava as movimentações novas de uma extração e refaz os snapshots afetados por movimentos atrasados
+
+build_snapshot(): Grava o snapshot de saldo em um instante a partir do snapshot anterior e dos deltas
+
+maybe_snapshot(): Gera o snapshot quando o último tem mais de snapshot_every_hours
+
+balance_at(): Saldo por filial/item/local em um instante
+
+Como usar:
+append_movements(df_estoque_mov_tratado)
+maybe_snapshot()
+saldo = balance_at(datetime(2025, 1, 10, 8), item=[123456])
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import numpy as np
+import pyarrow.dataset as ds
+from config.paths import PIPELINE_PATHS
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.gold_writer import GoldLayout, write_gold
+from utils.gold_reader import open_gold
+from utils.ingestion import ROW_ID, dedup_keys
+from utils.schema_registry import get_schema
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['estoque_ledger']
+KEYS: list[str] = CONFIG['balance_keys']
+QTY = CONFIG['quantity_column']
+EVENT = CONFIG['event_column']
+MOVEMENT_KEYS: list[str] = list(PIPELINE_CONFIG['estoque_mov']['key_columns']) # <-- identidade de uma movimentação, inclui KEYS e EVENT
+BALANCE = 'saldo'
+SNAPSHOT_FORMAT = '%Y%m%d_%H%M%S'
+
+DELTAS_DIR = PIPELINE_PATHS['estoque_ledger']['deltas']
+SNAPSHOTS_DIR = PIPELINE_PATHS['estoque_ledger']['snapshots']
+DELTA_LAYOUT = GoldLayout(sort_by=(EVENT,))
+
+def _snapshots(snapshots_dir: Path) -> list[tuple[datetime, Path]]:
+    """
+    Snapshots existentes em ordem de instante (o instante está no nome do arquivo)
+    """
+    snapshots = []
+    for path in Path(snapshots_dir).glob('saldo_*.parquet'):
+        try:
+            snapshots.append((datetime.strptime(path.stem.removeprefix('saldo_'), SNAPSHOT_FORMAT), path))
+        except ValueError:
+            continue
+    return sorted(snapshots)
+
+def _latest_before(as_of: datetime, snapshots_dir: Path) -> tuple[datetime | None, Path | None]:
+    candidates = [(ts, path) for ts, path in _snapshots(snapshots_dir) if ts <= as_of]
+    return candidates[-1] if candidates else (None, None)
+
+def _empty_balance() -> pa.Table:
+    schema = get_schema('estoque_mov').schema_for(KEYS)
+    return pa.schema(list(schema) + [pa.field(BALANCE, pa.int64())]).empty_table()
+
+def _key_filter(filial=None, item=None, local=None) -> ds.Expression | None:
+    expression = None
+    for column, values in (('filial', filial), ('item', item), ('local', local)):
+        if values is None:
+            continue
+        values = [values] if isinstance(values, (str, int)) else list(values)
+        clause = ds.field(column).isin(values)
+        expression = clause if expression is None else expression & clause
+    return expression
+
+def _new_movements(movements: pa.Table, deltas_dir: Path) -> pa.Table:
+    """
+    Movimentações cuja chave (MOVEMENT_KEYS) ainda não está nos deltas do mesmo período
+    """
+    deltas_dir = Path(deltas_dir)
+    if not deltas_dir.exists():
+        return movements
+
+    dataset = open_gold(deltas_dir)
+    if not dataset.files:
+        return movements
+
+    earliest, latest = pc.min_max(movements.column(EVENT)).values()
+    expression = (ds.field(EVENT) >= earliest.cast(pa.timestamp('ms'))) & (ds.field(EVENT) <= latest.cast(pa.timestamp('ms')))
+    existing = dataset.to_table(columns=MOVEMENT_KEYS, filter=expression) # <-- só os row groups do período da extração
+    if existing.num_rows == 0:
+        return movements
+
+    # Agrupamento em vez de join: chave com referencia nula também casa (nulo == nulo, como no dedup_keys)
+    numbered = pa.concat_tables(
+        [
+            existing.append_column(ROW_ID, pa.array(np.full(existing.num_rows, -1, dtype=np.int64))),
+            movements.select(MOVEMENT_KEYS).append_column(ROW_ID, pa.array(np.arange(movements.num_rows, dtype=np.int64)))
+        ],
+        promote_options='permissive'
+    )
+    first = numbered.group_by(MOVEMENT_KEYS).aggregate([(ROW_ID, 'min')]).column(f'{ROW_ID}_min')
+    fresh = first.filter(pc.greater_equal(first, 0)) # <-- chave já gravada tem -1 no mínimo
+
+    return movements.take(pc.take(fresh, pc.sort_indices(fresh)))
+
+def append_movements(
+        movements: pd.DataFrame | pa.Table,
+        deltas_dir: Path = DELTAS_DIR,
+        snapshots_dir: Path = SNAPSHOTS_DIR
+) -> Path | None:
+    """
+    Grava como delta as movimentações de uma extração que ainda não estão nos deltas (chave MOVEMENT_KEYS,
+    última linha vence dentro da extração). Snapshots de instante igual ou posterior ao movimento novo mais
+    antigo são apagados e refeitos, em ordem, sobre o último snapshot válido e os deltas (incluindo o novo)
+
+    params:
+    movements: pd.DataFrame | pa.Table | Movimentações tratadas pelo schema do 'estoque_mov'
+    deltas_dir: Path = DELTAS_DIR | Diretório dos deltas
+    snapshots_dir: Path = SNAPSHOTS_DIR | Diretório dos snapshots (invalidados por movimento atrasado)
+    """
+
+    if isinstance(movements, pd.DataFrame):
+        movements = get_schema('estoque_mov').to_arrow(movements)
+
+    movements = movements.select(MOVEMENT_KEYS + [QTY])
+    movements = movements.filter(pc.and_(pc.is_valid(movements.column(EVENT)), pc.is_valid(movements.column(QTY))))
+    if movements.num_rows == 0:
+        return None
+
+    delta = _new_movements(dedup_keys(movements, MOVEMENT_KEYS), deltas_dir)
+    if delta.num_rows == 0: # <-- extração já aplicada
+        return None
+
+    earliest = pc.min(delta.column(EVENT)).as_py()
+    stale = [(ts, path) for ts, path in _snapshots(snapshots_dir) if ts >= earliest]
+    for _, stale_path in stale: # <-- saldo desses snapshots não inclui o movimento atrasado
+        stale_path.unlink(missing_ok=True)
+
+    path = Path(deltas_dir) / f'mov_{datetime.now():%Y%m%d_%H%M%S_%f}.parquet'
+    write_gold(delta, path, layout=DELTA_LAYOUT)
+
+    if stale:
+        logger.warning(
+            f'{len(stale)} snapshots de saldo invalidados por movimentacao de {earliest}, refazendo',
+            extra={'job': 'estoque_ledger', 'status': 'failure'}
+        )
+        for ts, _ in stale: # <-- em ordem: cada um parte do anterior já refeito
+            build_snapshot(ts, deltas_dir=deltas_dir, snapshots_dir=snapshots_dir)
+
+    return path
+
+def _read_deltas(deltas_dir: Path, after: datetime | None, until: datetime, key_filter: ds.Expression | None = None) -> pa.Table:
+    deltas_dir = Path(deltas_dir)
+    if not deltas_dir.exists():
+        return pa.table({})
+
+    dataset = open_gold(deltas_dir)
+    if not dataset.files:
+        return pa.table({})
+
+    expression = ds.field(EVENT) <= pa.scalar(until, type=pa.timestamp('ms'))
+    if after is not None:
+        expression &= ds.field(EVENT) > pa.scalar(after, type=pa.timestamp('ms'))
+    if key_filter is not None:
+        expression &= key_filter
+
+    return dataset.to_table(columns=KEYS + [QTY], filter=expression) # <-- deltas ordenados pela data, poda por row group
+
+def _accumulate(base: pa.Table | None, deltas: pa.Table) -> pa.Table:
+    parts = []
+    if base is not None and base.num_rows:
+        parts.append(base.select(KEYS + [BALANCE]).rename_columns(KEYS + [QTY]))
+    if deltas.num_columns and deltas.num_rows:
+        parts.append(deltas.select(KEYS + [QTY]))
+
+    if not parts:
+        return _empty_balance()
+
+    summed = pa.concat_tables(parts, promote_options='permissive').group_by(KEYS).aggregate([(QTY, 'sum')])
+    return summed.rename_columns([BALANCE if c == f'{QTY}_sum' else c for c in summed.column_names]).select(KEYS + [BALANCE])
+
+def balance_at(
+        as_of: datetime | None = None,
+        filial=None,
+        item=None,
+        local=None,
+        deltas_dir: Path = DELTAS_DIR,
+        snapshots_dir: Path = SNAPSHOTS_DIR,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Saldo por filial/item/local no instante: último snapshot anterior + deltas até o instante
+
+    params:
+    as_of: datetime | None = None | Instante do saldo, por padrão agora
+    filial, item, local: valor ou lista | Filtros opcionais aplicados no snapshot e nos deltas
+    as_pandas: bool = False | Retorna DataFrame em vez de pa.Table
+    """
+
+    as_of = as_of or datetime.now()
+    key_filter = _key_filter(filial, item, local)
+
+    snapshot_ts, snapshot_path = _latest_before(as_of, snapshots_dir)
+    base = None
+    if snapshot_path is not None:
+        base = ds.dataset(str(snapshot_path), format='parquet').to_table(filter=key_filter)
+
+    result = _accumulate(base, _read_deltas(deltas_dir, snapshot_ts, as_of, key_filter))
+
+    return result.to_pandas(types_mapper=pd.ArrowDtype) if as_pandas else result
+
+def build_snapshot(
+        as_of: datetime | None = None,
+        deltas_dir: Path = DELTAS_DIR,
+        snapshots_dir: Path = SNAPSHOTS_DIR
+) -> Path:
+    """
+    Grava o snapshot de saldo no instante (saldo_<instante>.parquet), partindo do snapshot anterior
+
+    params:
+    as_of: datetime | None = None | Instante do snapshot, por padrão agora (truncado ao segundo)
+    """
+
+    as_of = (as_of or datetime.now()).replace(microsecond=0)
+    balance = balance_at(as_of, deltas_dir=deltas_dir, snapshots_dir=snapshots_dir)
+    balance = balance.filter(pc.not_equal(balance.column(BALANCE), 0)) # <-- saldo zerado não ocupa espaço
+
+    path = Path(snapshots_dir) / f'saldo_{as_of.strftime(SNAPSHOT_FORMAT)}.parquet'
+    write_gold(balance, path, layout=GoldLayout(sort_by=tuple(KEYS)))
+
+    logger.info(
+        f'snapshot de saldo {as_of:%d/%m/%Y %H:%M:%S}: {balance.num_rows} posicoes',
+        extra={'job': 'estoque_ledger', 'status': 'sucess'}
+    )
+
+    return path
+
+def maybe_snapshot(
+        every: timedelta = timedelta(hours=CONFIG['snapshot_every_hours']),
+        deltas_dir: Path = DELTAS_DIR,
+        snapshots_dir: Path = SNAPSHOTS_DIR
+) -> Path | None:
+    """
+    Gera o snapshot quando o último é mais antigo que `every` (ou não existe)
+    """
+    snapshots = _snapshots(snapshots_dir)
+    if snapshots and datetime.now() - snapshots[-1][0] < every:
+        return None
+    return build_snapshot(deltas_dir=deltas_dir, snapshots_dir=snapshots_dir)
@@ -0,0 +1,224 @@
+"""
+Rollup de fill rate da expedição (6.06) por dia, filial, box e setor, mantido de forma incremental
+
+Cada extração traz o estado atual de linhas de pedido (filial/pedido/setor do item) que já podem ter sido vistas
+antes com outra quantidade expedida, outra data de movimentação ou outro box (o box é atributo da linha, não
+faz parte da chave, então a troca de box move a contribuição). O estado guarda a última contribuição de
+cada linha (dividido em buckets pelo hash do pedido); o delta subtrai a contribuição anterior das linhas
+reextraídas e soma a nova, e só os meses tocados do rollup são reescritos. O rollup guarda somas, as taxas
+são sempre recalculadas das somas (nunca média de taxas)
+
+Classes e funções:
+line_contributions(): Reduz o delta tratado a uma contribuição por linha de pedido
+
+update_rollup(): Aplica um delta da expedição no estado e no rollup
+
+fill_rate(): Lê o rollup no período e reagrupa pelas dimensões pedidas
+
+Como usar:
+update_rollup(read_report_parallel(csv_path, 'expedicao'))
+df = fill_rate(('2025-01-01', '2025-02-01'), group_by=['dia', 'setor_item'], as_pandas=True)
+"""
+
+from pathlib import Path
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from config.paths import PIPELINE_PATHS
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.gold_reader import open_gold
+from utils.gold_writer import GoldLayout, write_gold
+from utils.incremental import bucket_ids, month_keys, to_date
+from utils.ingestion import dedup_keys
+from utils.schema_registry import get_schema
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['expedicao_rollup']
+SOURCE = get_schema(CONFIG['source_report'])
+LINE_KEYS: list[str] = [c for c in SOURCE.key_columns if c != 'box'] # <-- identidade da linha de pedido
+EVENT = SOURCE.event_column
+
+DAY = 'dia'
+GROUP: list[str] = [DAY, *CONFIG['group_columns']]
+ATTRIBUTES: list[str] = [c for c in CONFIG['group_columns'] if c not in LINE_KEYS] # <-- dimensões que a linha pode trocar (box)
+REQUESTED = 'qtd_pcs_solicitada'
+SHIPPED = 'qtd_pcs_expedida'
+LINES = 'linhas'
+COMPLETE = 'linhas_completas'
+MEASURES = [REQUESTED, SHIPPED, LINES, COMPLETE]
+FILL_RATE = 'fill_rate'
+LINE_FILL_RATE = 'fill_rate_linhas'
+
+MISSING_BOX = -1 # <-- mesma normalização do apply_setor_rules para box inválido
+MISSING_SETOR = 'Sem setor'
+
+STATE_DIR = PIPELINE_PATHS['expedicao_rollup']['state']
+ROLLUP_DIR = PIPELINE_PATHS['expedicao_rollup']['output_parquet']
+STATE_LAYOUT = GoldLayout(index_columns=('pedido',))
+ROLLUP_LAYOUT = GoldLayout(sort_by=tuple(GROUP))
+
+def line_contributions(delta: pd.DataFrame | pa.Table) -> pa.Table:
+    """
+    Uma linha por linha de pedido (última ocorrência) com o dia e as medidas que ela soma no rollup
+
+    params:
+    delta: pd.DataFrame | pa.Table | Linhas novas da expedição, já tratadas pelo schema
+    """
+
+    if isinstance(delta, pd.DataFrame):
+        delta = SOURCE.to_arrow(delta)
+
+    valid = pc.and_(pc.is_valid(delta.column('pedido')), pc.is_valid(delta.column(EVENT)))
+    delta = delta.filter(pc.and_(valid, pc.is_valid(delta.column('filial'))))
+    delta = delta.set_column(delta.schema.get_field_index('box'), 'box', pc.fill_null(delta.column('box'), MISSING_BOX))
+    delta = delta.set_column(delta.schema.get_field_index('setor_item'), 'setor_item', pc.fill_null(delta.column('setor_item'), MISSING_SETOR))
+    delta = dedup_keys(delta, LINE_KEYS) # <-- chaves sem nulo: o join do estado não casa nulos
+
+    requested = pc.fill_null(delta.column(REQUESTED), 0)
+    shipped = pc.fill_null(delta.column(SHIPPED), 0)
+    complete = pc.and_(pc.greater(requested, 0), pc.greater_equal(shipped, requested))
+
+    return pa.table({
+        **{column: delta.column(column) for column in LINE_KEYS + ATTRIBUTES},
+        DAY: pc.cast(delta.column(EVENT), pa.date32()),
+        REQUESTED: requested,
+        SHIPPED: shipped,
+        LINES: pa.array(np.ones(delta.num_rows, dtype=np.int64)),
+        COMPLETE: pc.cast(complete, pa.int64())
+    })
+
+def _negate(table: pa.Table) -> pa.Table:
+    for column in MEASURES:
+        table = table.set_column(table.schema.get_field_index(column), column, pc.negate(table.column(column)))
+    return table
+
+def _sum_by_group(table: pa.Table, group: list[str] = GROUP) -> pa.Table:
+    summed = table.group_by(group).aggregate([(c, 'sum') for c in MEASURES])
+    names = {f'{c}_sum': c for c in MEASURES}
+    return summed.rename_columns([names.get(c, c) for c in summed.column_names]).select(group + MEASURES)
+
+def _with_rates(table: pa.Table) -> pa.Table:
+    """
+    Acrescenta fill_rate (peças) e fill_rate_linhas calculados das somas; denominador zero vira nulo
+    """
+    requested = table.column(REQUESTED)
+    lines = table.column(LINES)
+    null = pa.scalar(None, type=pa.float64())
+    fill = pc.if_else(pc.greater(requested, 0), pc.divide(pc.cast(table.column(SHIPPED), pa.float64()), pc.cast(requested, pa.float64())), null)
+    line_fill = pc.if_else(pc.greater(lines, 0), pc.divide(pc.cast(table.column(COMPLETE), pa.float64()), pc.cast(lines, pa.float64())), null)
+    return table.append_column(FILL_RATE, fill).append_column(LINE_FILL_RATE, line_fill)
+
+def _update_state(contributions: pa.Table, state_dir: Path, buckets: int) -> pa.Table:
+    """
+    Troca a contribuição das linhas no estado e retorna as mudanças com sinal (anterior negativa, nova positiva)
+    """
+    key_buckets = bucket_ids(contributions.column('pedido'), buckets)
+    changes = [contributions]
+
+    for bucket in np.unique(key_buckets):
+        path = state_dir / f'bucket_{int(bucket):03d}.parquet'
+        part = contributions.filter(pa.array(key_buckets == bucket))
+
+        if path.exists():
+            state = pq.read_table(path, memory_map=True).cast(part.schema)
+            keys = part.select(LINE_KEYS)
+            changes.append(_negate(state.join(keys, keys=LINE_KEYS, join_type='inner').select(part.column_names)))
+            part = pa.concat_tables([state.join(keys, keys=LINE_KEYS, join_type='left anti').select(part.column_names), part])
+
+        write_gold(part, path, layout=STATE_LAYOUT)
+
+    return pa.concat_tables(changes)
+
+def update_rollup(
+        delta: pd.DataFrame | pa.Table,
+        state_dir: Path = STATE_DIR,
+        rollup_dir: Path = ROLLUP_DIR,
+        buckets: int = CONFIG['buckets']
+) -> dict[str, int]:
+    """
+    Aplica um delta da expedição: atualiza o estado das linhas tocadas e reescreve só os meses afetados do rollup
+
+    Retorna {'linhas': linhas no delta, 'grupos': grupos do rollup alterados, 'meses': arquivos reescritos}
+
+    params:
+    delta: pd.DataFrame | pa.Table | Linhas novas da expedição, já tratadas pelo schema ('expedicao'/'expedicoes')
+    state_dir: Path = STATE_DIR | Diretório do estado por linha de pedido
+    rollup_dir: Path = ROLLUP_DIR | Diretório do rollup (um arquivo por mês)
+    buckets: int = CONFIG['buckets'] | Arquivos do estado (não mudar depois da primeira carga)
+    """
+
+    contributions = line_contributions(delta)
+    if contributions.num_rows == 0:
+        return {'linhas': 0, 'grupos': 0, 'meses': 0}
+
+    state_dir, rollup_dir = Path(state_dir), Path(rollup_dir)
+    signed = _sum_by_group(_update_state(contributions, state_dir, buckets))
+
+    catalog = TableCatalog(rollup_dir) if TableCatalog.exists(rollup_dir) else None
+    months = month_keys(signed.column(DAY))
+
+    for month in np.unique(months):
+        path = rollup_dir / f'fill_rate_{month}.parquet'
+        part = signed.filter(pa.array(months == month))
+
+        if path.exists():
+            existing = pq.read_table(path, columns=GROUP + MEASURES, memory_map=True).cast(part.schema)
+            part = _sum_by_group(pa.concat_tables([existing, part]))
+
+        part = part.filter(pc.greater(part.column(LINES), 0)) # <-- grupo sem linhas (todas mudaram de dia/box) sai do rollup
+        write_gold(_with_rates(part), path, layout=ROLLUP_LAYOUT, catalog=catalog)
+
+    logger.info(
+        f'rollup da expedicao: {contributions.num_rows} linhas, {signed.num_rows} grupos em {len(np.unique(months))} meses',
+        extra={'job': 'expedicao_rollup', 'status': 'sucess'}
+    )
+
+    return {'linhas': contributions.num_rows, 'grupos': signed.num_rows, 'meses': int(len(np.unique(months)))}
+
+def fill_rate(
+        date_range: tuple | None = None,
+        group_by: list[str] | None = None,
+        filial: str | list[str] | None = None,
+        rollup_dir: Path = ROLLUP_DIR,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Fill rate no período, reagrupado pelas dimensões pedidas (taxas recalculadas das somas)
+
+    params:
+    date_range: tuple | None = None | (início, fim) em dias, início inclusivo e fim exclusivo
+    group_by: list[str] | None = None | Subconjunto de dia/filial/box/setor_item, None mantém todas
+    filial: str | list[str] | None = None | Filtro de filial
+    rollup_dir: Path = ROLLUP_DIR | Diretório do rollup
+    as_pandas: bool = False | Retorna DataFrame em vez de pa.Table
+    """
+
+    expression = None
+    if date_range is not None:
+        start, end = date_range
+        if start is not None:
+            expression = ds.field(DAY) >= pa.scalar(to_date(start), type=pa.date32())
+        if end is not None:
+            clause = ds.field(DAY) < pa.scalar(to_date(end), type=pa.date32())
+            expression = clause if expression is None else expression & clause
+    if filial is not None:
+        clause = ds.field('filial').isin([filial] if isinstance(filial, str) else list(filial))
+        expression = clause if expression is None else expression & clause
+
+    rollup_dir = Path(rollup_dir)
+    if rollup_dir.is_dir() and open_gold(rollup_dir).files:
+        table = open_gold(rollup_dir).to_table(columns=GROUP + MEASURES, filter=expression)
+    else:
+        table = _sum_by_group(line_contributions(SOURCE.arrow_schema.empty_table()))
+
+    if group_by is not None and list(group_by) != GROUP:
+        table = _sum_by_group(table, list(group_by))
+
+    table = _with_rates(table)
+    return table.to_pandas(types_mapper=pd.ArrowDtype) if as_pandas else table
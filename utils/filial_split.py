@@ -0,0 +1,92 @@
+"""
+Divisão local de um export multi-filial em um arquivo por filial
+
+Usado quando o prompt do Cognos recebe todas as filiais do LIST_FILIAL de uma vez: o relatório
+é renderizado e baixado uma única vez e separado aqui pela coluna de filial
+
+Classes e funções:
+split_by_filial(): Lê o CSV em streaming e grava um CSV por filial, no mesmo encoding e separador
+"""
+
+from pathlib import Path
+import csv
+import logging
+
+logger = logging.getLogger(__name__)
+
+def split_by_filial(
+        file_path: str | Path,
+        column: str = 'Filial',
+        encoding: str = 'utf-16',
+        sep: str = '\t',
+        filiais: list[str] | None = None,
+        remove_source: bool = True
+) -> dict[str, Path]:
+    """
+    Separa o arquivo pela coluna de filial, linha a linha, sem carregar o relatório em memória
+
+    Os arquivos gerados ficam no mesmo diretório, com o sufixo _<filial>, e seguem o fluxo normal do FILE_ROUTER
+
+    params:
+    file_path: str | Path | Export do Cognos com várias filiais
+    column: str = 'Filial' | Nome da coluna de filial no cabeçalho bruto (antes do rename_columns)
+    encoding: str = 'utf-16' | Encoding do arquivo (PIPELINE_CONFIG[...]['encoding'])
+    sep: str = '\t' | Separador do arquivo (PIPELINE_CONFIG[...]['sep'])
+    filiais: list[str] | None = None | Filiais esperadas, filiais ausentes no export geram aviso
+    remove_source: bool = True | Remove o arquivo original após a divisão
+    """
+
+    file_path = Path(file_path)
+    outputs: dict[str, Path] = {}
+    handles = {}
+    writers = {}
+    short_rows = 0
+
+    try:
+        with open(file_path, 'r', encoding=encoding, newline='') as src:
+            reader = csv.reader(src, delimiter=sep)
+            header = next(reader)
+
+            try:
+                idx = header.index(column)
+            except ValueError:
+                raise KeyError(f'coluna {column!r} ausente em {file_path.name}')
+
+            for row in reader:
+                if len(row) <= idx:
+                    short_rows += 1 # <-- linha sem a coluna de filial (quebrada ou rodapé do Cognos)
+                    continue
+
+                filial = row[idx].strip()
+                writer = writers.get(filial)
+
+                if writer is None:
+                    out = file_path.with_name(f'{file_path.stem}_{filial}{file_path.suffix}')
+                    handles[filial] = open(out, 'w', encoding=encoding, newline='')
+                    writer = writers[filial] = csv.writer(handles[filial], delimiter=sep)
+                    writer.writerow(header)
+                    outputs[filial] = out
+
+                writer.writerow(row)
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    if short_rows:
+        logger.warning(
+            f'{short_rows} linhas sem a coluna {column!r} descartadas de {file_path.name}',
+            extra={'job': 'split_by_filial', 'status': 'failure'}
+        )
+
+    if filiais:
+        ausentes = set(map(str, filiais)) - set(outputs)
+        if ausentes:
+            logger.warning(
+                f'filiais sem linhas no export {file_path.name}: {sorted(ausentes)}',
+                extra={'job': 'split_by_filial', 'status': 'failure'}
+            )
+
+    if remove_source:
+        file_path.unlink()
+
+    return outputs
@@ -9,6 +9,8 @@ import pyarrow.parquet as pd
 import pyarrow.compute as pc
 from utils.config_logger import log_with_context
 from config.pipeline_config import logger
+from utils.table_catalog import TableCatalog
+from utils.gold_reader import open_gold
 
 @log_with_context(job='penultimate_date', logger=logger)
 def penultimate_date(
@@ -43,7 +45,7 @@ def penultimate_date(
         for batch in parquet.iter_batches(columns=[column]):
             array = batch.column(0)
 
-            array = pd.drop_null(array) # Remove nulos
+            array = pc.drop_null(array) # Remove nulos
 
             if len(array) == 0:
                 del batch, array
@@ -155,4 +157,75 @@ def business_date(
     else:  # sábadp 5 ou domingo 6
         target = base - timedelta(days=weekday - 4)
 
-    return _format_date(target, format)
\ No newline at end of file
+    return _format_date(target, format)
+
+def date_windows(
+        start: str | datetime,
+        end: str | datetime,
+        days: int = 1,
+        format: str = '%d/%m/%Y'
+) -> list[tuple[str, str]]:
+    """
+    Divide o período [start, end] em janelas de `days` dias alinhadas ao calendário
+
+    O alinhamento é fixo (contado a partir de 01/01/2000), então a mesma data sempre cai na mesma janela:
+    reextrair o período gera os mesmos arquivos, que sobrescrevem os anteriores em vez de duplicar linhas
+
+    params:
+    start: str | datetime | Data inicial (string no formato `format`)
+    end: str | datetime | Data final, inclusiva
+    days: int = 1 | Tamanho de cada janela em dias
+    format: str = '%d/%m/%Y' | Formato das datas recebidas e retornadas
+    """
+
+    start = datetime.strptime(start, format) if isinstance(start, str) else start
+    end = datetime.strptime(end, format) if isinstance(end, str) else end
+    start, end = start.replace(hour=0, minute=0, second=0, microsecond=0), end.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    origin = datetime(2000, 1, 1)
+    window_start = origin + timedelta(days=(start - origin).days // days * days) # <-- início da janela que contém start
+
+    windows = []
+    while window_start <= end:
+        window_end = window_start + timedelta(days=days - 1)
+        windows.append((_format_date(window_start, format), _format_date(window_end, format)))
+        window_start += timedelta(days=days)
+
+    return windows
+
+def last_event_date(
+        parquet_folder: Path,
+        column: str,
+        format: str = '%d/%m/%Y',
+        fallback_days: int = 7
+) -> str:
+    """
+    Data do último evento já catalogado na gold, ponto de partida da extração incremental
+
+    Com catálogo (utils.table_catalog) o máximo vem das estatísticas do snapshot, sem ler dados; sem catálogo
+    lê só a coluna dos arquivos. Gold vazia retorna hoje - fallback_days
+
+    params:
+    parquet_folder: Path | Diretório gold do relatório
+    column: str | Coluna de data/hora do evento (event_column do PIPELINE_CONFIG)
+    format: str = '%d/%m/%Y' | Formato da data retornada
+    fallback_days: int = 7 | Dias para trás quando ainda não há dados
+    """
+
+    parquet_folder = Path(parquet_folder)
+    last = None
+
+    if TableCatalog.exists(parquet_folder):
+        maxima = [e['stats'][column][1] for e in TableCatalog(parquet_folder).snapshot()['files'] if column in e['stats']]
+        last = datetime.fromisoformat(max(maxima)) if maxima else None
+
+    elif parquet_folder.is_dir():
+        dataset = open_gold(parquet_folder)
+        if dataset.files:
+            last = pc.max(dataset.to_table(columns=[column]).column(column)).as_py()
+
+    if last is None:
+        logger.warning(f'gold sem {column} em {parquet_folder}, usando os ultimos {fallback_days} dias')
+        return _relative_date(-fallback_days, format=format)
+
+    return _format_date(last, format)
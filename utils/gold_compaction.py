@@ -0,0 +1,350 @@
+"""
+Compactação dos arquivos pequenos da camada gold gerados pelo modo de atualização em tempo real
+
+Cada ciclo do REAL_TIME_UPDATE grava um Parquet pequeno; a compactação junta os arquivos pequenos de cada
+partição (diretório) em arquivos do tamanho alvo, gravados com a política do utils.gold_writer.
+A troca é atômica via manifesto '_compaction.json' no diretório:
+
+1. o arquivo compactado é gravado com prefixo 'compacted_' (ignorado pelo live_files enquanto não estiver no manifesto)
+2. uma única gravação atômica do manifesto inclui o compactado e aposenta os arquivos de origem
+3. os aposentados são movidos para o subdiretório '_retired/' (fora do glob '*.parquet' e do ds.dataset, que
+   ignora diretórios com '_'), leitores que listam o diretório sem o manifesto não contam a linha duas vezes
+4. os aposentados só são apagados do disco depois de RETIRE_GRACE_SECONDS, leitores com o arquivo aberto não quebram
+
+Classes e funções:
+CompactionManifest(): Manifesto do diretório (compactados ativos e arquivos aposentados)
+
+live_files(): Arquivos Parquet visíveis para leitura em um diretório, segundo o manifesto
+
+compact_partition(): Compacta os arquivos pequenos de um diretório
+
+compact_report(): Compacta todas as partições de um diretório gold
+
+CompactionService(): Thread que compacta os diretórios apenas na janela ociosa
+
+Como usar:
+service = CompactionService(list(REAL_TIME_UPDATE['GOLD'].items()), idle_window=(1, 5))
+service.start()
+"""
+
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import threading
+import time
+import logging
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.gold_writer import RowGroupIndex, write_gold
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = '_compaction.json'
+LOCK_NAME = '_compaction.lock'
+COMPACTED_PREFIX = 'compacted_' # <-- sem '_': depois de aposentar as origens, leitores sem manifesto também veem o compactado
+RETIRED_DIR = '_retired'
+SMALL_FILE_BYTES = 16 * 1024 * 1024 # <-- arquivos abaixo disso são candidatos
+TARGET_FILE_BYTES = 128 * 1024 * 1024 # <-- tamanho alvo (em disco) de cada arquivo compactado
+MIN_FILES = 4 # <-- abaixo disso não compensa reescrever
+RETIRE_GRACE_SECONDS = 15 * 60
+LOCK_STALE_SECONDS = 2 * 60 * 60
+
+class CompactionManifest:
+    """
+    Manifesto de compactação de um diretório gold
+
+    O JSON guarda {'version': int, 'compacted': [nomes], 'retired': {caminho relativo: timestamp}} e é gravado
+    de forma atômica (arquivo temporário + os.replace). Aposentados movidos ficam como '_retired/<nome>'; o nome
+    original só fica no 'retired' se a movimentação falhou (arquivo aberto no Windows)
+
+    params:
+    directory: Path | Diretório (partição) gold
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_NAME
+        payload = self._load()
+        self.version: int = payload.get('version', 0)
+        self.compacted: list[str] = payload.get('compacted', [])
+        self.retired: dict[str, float] = payload.get('retired', {})
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(
+                f'manifesto de compactacao ilegivel {self.path}: {e}',
+                extra={'job': 'gold_compaction', 'status': 'failure'}
+            )
+            return {}
+
+    def save(self):
+        """
+        Persiste o manifesto de forma atômica, incrementando a versão
+        """
+
+        self.version += 1
+        tmp_path = self.path.with_suffix('.json.tmp')
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'compacted': self.compacted, 'retired': self.retired}, f, ensure_ascii=False, indent=2)
+
+        os.replace(tmp_path, self.path)
+
+    def live(self) -> list[Path]:
+        """
+        Arquivos visíveis: Parquet comuns não aposentados mais os compactados registrados
+        """
+
+        committed = set(self.compacted)
+        files = {
+            f for f in self.directory.glob('*.parquet')
+            if not f.name.startswith(('.', '_'))
+            and f.name not in self.retired
+            and (not f.name.startswith(COMPACTED_PREFIX) or f.name in committed) # <-- compactação interrompida antes do manifesto
+        }
+        files |= {self.directory / name for name in self.compacted if (self.directory / name).exists()} # <-- compactados antigos com '_compacted_'
+
+        return sorted(files, key=lambda f: f.name)
+
+def live_files(directory: Path) -> list[Path]:
+    """
+    Arquivos Parquet visíveis para leitura em um diretório gold e em suas partições
+
+    params:
+    directory: Path | Diretório gold
+    """
+
+    directory = Path(directory)
+    partitions = [directory] + sorted(p for p in directory.rglob('*') if p.is_dir() and not p.name.startswith(('.', '_')))
+
+    files = []
+    for partition in partitions:
+        files += CompactionManifest(partition).live()
+
+    return files
+
+def _acquire_lock(directory: Path) -> bool:
+    lock = directory / LOCK_NAME
+
+    if lock.exists() and time.time() - lock.stat().st_mtime > LOCK_STALE_SECONDS: # <-- compactação anterior morreu no meio
+        lock.unlink(missing_ok=True)
+
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+def _retire(directory: Path, source: Path) -> str:
+    """
+    Move o arquivo aposentado (com o índice lateral) para '_retired/' e retorna o caminho relativo gravado no manifesto
+    """
+
+    retired_dir = directory / RETIRED_DIR
+    retired_dir.mkdir(exist_ok=True)
+    target = retired_dir / source.name
+
+    try:
+        os.replace(source, target)
+    except OSError as e: # <-- arquivo aberto por outro processo (Windows), fica no lugar e só sai do manifesto
+        logger.warning(
+            f'{source.name} aposentado sem mover para {RETIRED_DIR}: {e}',
+            extra={'job': 'gold_compaction', 'status': 'failure'}
+        )
+        return source.name
+
+    index = RowGroupIndex.path_for(source)
+    if index.exists():
+        os.replace(index, RowGroupIndex.path_for(target))
+
+    return f'{RETIRED_DIR}/{source.name}'
+
+def _purge_retired(manifest: CompactionManifest) -> int:
+    """
+    Apaga do disco os aposentados há mais de RETIRE_GRACE_SECONDS e os compactados que nunca entraram no
+    manifesto (compactação interrompida), com o índice lateral. Roda com o lock, nenhum compactado está em escrita
+    """
+
+    now = time.time()
+    expired = [name for name, retired_at in manifest.retired.items() if now - retired_at > RETIRE_GRACE_SECONDS]
+    orphans = [f for f in manifest.directory.glob(f'{COMPACTED_PREFIX}*.parquet') if f.name not in manifest.compacted]
+
+    for name in expired:
+        path = manifest.directory / name
+        path.unlink(missing_ok=True)
+        RowGroupIndex.path_for(path).unlink(missing_ok=True)
+        del manifest.retired[name]
+
+    for path in orphans:
+        path.unlink(missing_ok=True)
+        RowGroupIndex.path_for(path).unlink(missing_ok=True)
+
+    return len(expired)
+
+def _plan_bins(files: list[Path], target_bytes: int) -> list[list[Path]]:
+    """
+    Agrupa os arquivos pequenos (em ordem de modificação) em lotes de até target_bytes
+    """
+
+    bins, current, current_bytes = [], [], 0
+
+    for f in sorted(files, key=lambda f: f.stat().st_mtime):
+        size = f.stat().st_size
+        if current and current_bytes + size > target_bytes:
+            bins.append(current)
+            current, current_bytes = [], 0
+        current.append(f)
+        current_bytes += size
+
+    if current:
+        bins.append(current)
+
+    return [b for b in bins if len(b) >= MIN_FILES]
+
+def compact_partition(
+        directory: Path,
+        report: str | None = None,
+        small_file_bytes: int = SMALL_FILE_BYTES,
+        target_bytes: int = TARGET_FILE_BYTES,
+        catalog: TableCatalog | None = None
+) -> list[Path]:
+    """
+    Compacta os arquivos pequenos de um diretório. Retorna os arquivos compactados criados
+
+    params:
+    directory: Path | Diretório (partição) gold
+    report: str | None = None | Chave do PIPELINE_CONFIG, define a política de escrita (ordenação e índice)
+    small_file_bytes: int = SMALL_FILE_BYTES | Limite de tamanho dos candidatos
+    target_bytes: int = TARGET_FILE_BYTES | Tamanho alvo dos arquivos gerados
+    catalog: TableCatalog | None = None | Catálogo da tabela; quando existe, a troca também vira um snapshot
+    """
+
+    directory = Path(directory)
+    if not directory.is_dir() or not _acquire_lock(directory):
+        return []
+
+    created = []
+    try:
+        manifest = CompactionManifest(directory)
+        purged = _purge_retired(manifest)
+
+        small = [f for f in manifest.live() if f.stat().st_size < small_file_bytes]
+
+        for sources in _plan_bins(small, target_bytes):
+            table = pa.concat_tables(
+                [pq.read_table(f, memory_map=True) for f in sources],
+                promote_options='default'
+            )
+
+            target = directory / f'{COMPACTED_PREFIX}{datetime.now():%Y%m%d_%H%M%S_%f}.parquet'
+            write_gold(table, target, report=report)
+
+            retired_at = time.time()
+            for f in sources:
+                if f.name in manifest.compacted:
+                    manifest.compacted.remove(f.name)
+                manifest.retired[f.name] = retired_at
+            manifest.compacted.append(target.name)
+            manifest.save() # <-- troca atômica: compactado entra e origens saem na mesma gravação
+
+            for f in sources:
+                moved = _retire(directory, f)
+                if moved != f.name:
+                    manifest.retired[moved] = manifest.retired.pop(f.name) # <-- nome original livre para um arquivo novo
+            manifest.save()
+
+            if catalog is not None:
+                catalog.commit(add=[target], remove=sources, operation='compaction')
+
+            created.append(target)
+
+            logger.info(
+                f'{directory.name}: {len(sources)} arquivos ({table.num_rows} linhas) compactados em {target.name}',
+                extra={'job': 'gold_compaction', 'status': 'sucess'}
+            )
+
+        if purged and not created:
+            manifest.save()
+
+    except Exception as e:
+        logger.error(f'falha na compactacao de {directory}: {e}', extra={'job': 'gold_compaction', 'status': 'failure'})
+        raise
+
+    finally:
+        (directory / LOCK_NAME).unlink(missing_ok=True)
+
+    return created
+
+def compact_report(directory: Path, report: str | None = None, **kwargs) -> list[Path]:
+    """
+    Compacta o diretório gold e cada partição abaixo dele
+
+    params:
+    directory: Path | Diretório gold do relatório
+    report: str | None = None | Chave do PIPELINE_CONFIG
+    """
+
+    directory = Path(directory)
+    kwargs.setdefault('catalog', TableCatalog(directory) if TableCatalog.exists(directory) else None)
+    partitions = [directory] + sorted(p for p in directory.rglob('*') if p.is_dir() and not p.name.startswith(('.', '_')))
+
+    created = []
+    for partition in partitions:
+        created += compact_partition(partition, report=report, **kwargs)
+
+    return created
+
+class CompactionService:
+    """
+    Thread daemon que compacta os diretórios gold apenas dentro da janela ociosa
+
+    params:
+    targets: list[tuple[str, Path]] | Pares (relatório, diretório gold), ex: list(REAL_TIME_UPDATE['GOLD'].items())
+    idle_window: tuple[int, int] = (1, 5) | Horas [início, fim) em que a compactação pode rodar
+    interval: float = 600 | Segundos entre verificações
+    """
+
+    def __init__(self, targets: list[tuple[str, Path]], idle_window: tuple[int, int] = (1, 5), interval: float = 600):
+        self.targets = targets
+        self.idle_window = idle_window
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def in_idle_window(self, now: datetime | None = None) -> bool:
+        hour = (now or datetime.now()).hour
+        start, end = self.idle_window
+        return start <= hour < end if start <= end else hour >= start or hour < end # <-- janela pode virar a meia-noite
+
+    def run_once(self) -> list[Path]:
+        created = []
+        for report, directory in self.targets:
+            try:
+                created += compact_report(directory, report=report)
+            except Exception:
+                continue # <-- já registrado em compact_partition, segue para o próximo relatório
+        return created
+
+    def _loop(self):
+        while not self._stop.is_set():
+            if self.in_idle_window():
+                self.run_once()
+            self._stop.wait(self.interval)
+
+    def start(self) -> 'CompactionService':
+        self._thread = threading.Thread(target=self._loop, name='gold_compaction', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
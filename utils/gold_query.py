@@ -0,0 +1,221 @@
+"""
+Camada SQL embarcada (DuckDB) sobre as tabelas gold
+
+Cada tabela do DATA_PATHS['gold'] e cada saída do PIPELINE_PATHS vira uma view sobre os arquivos Parquet
+(lista vinda do catálogo da tabela ou do manifesto de compactação, nunca uma varredura de diretório pelo
+DuckDB). As consultas rodam vetorizadas, com limite de memória e spill em disco (out of core), e retornam
+pa.Table sem passar por pandas
+
+Classes e funções:
+NAMED_QUERIES: Consultas prontas com parâmetros nomeados ($nome)
+
+GoldQuery(): Conexão DuckDB com as views registradas (query, refresh, close)
+
+query_gold(): Executa uma consulta e retorna pa.Table
+
+main(): CLI
+
+Como usar:
+with GoldQuery() as gq:
+    table = gq.query(NAMED_QUERIES['putaway_sem_load'], {'horas': 2})
+
+python -m utils.gold_query --named putaway_sem_load --param horas=2
+python -m utils.gold_query "SELECT box, count(*) FROM loading WHERE data_hora_load >= $inicio GROUP BY box" --param inicio=2025-01-01
+"""
+
+from pathlib import Path
+import argparse
+import os
+import sys
+import tempfile
+import logging
+import duckdb
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from config.paths import DATA_PATHS, PIPELINE_PATHS
+from utils.gold_compaction import live_files
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_LIMIT = '4GB'
+
+NAMED_QUERIES = {
+    'putaway_sem_load': """
+        SELECT p.box, count(DISTINCT p.olpn) AS olpns
+        FROM putaway p
+        ANTI JOIN loading l USING (olpn)
+        WHERE p.data_hora_putaway >= now()::TIMESTAMP - to_hours(CAST($horas AS INTEGER))
+        GROUP BY p.box
+        ORDER BY olpns DESC
+    """,
+    'lead_putaway_load_box': """
+        SELECT box,
+               count(*) AS olpns,
+               median(date_diff('minute', data_hora_putaway, data_hora_load)) AS mediana_min
+        FROM olpn_lifecycle
+        WHERE data_hora_load >= now()::TIMESTAMP - to_hours(CAST($horas AS INTEGER))
+          AND data_hora_putaway IS NOT NULL
+        GROUP BY box
+        ORDER BY mediana_min DESC
+    """,
+    'fill_rate_setor': """
+        SELECT dia, setor_item,
+               sum(qtd_pcs_expedida) / nullif(sum(qtd_pcs_solicitada), 0) AS fill_rate,
+               sum(linhas_completas) / nullif(sum(linhas), 0) AS fill_rate_linhas
+        FROM expedicao_rollup
+        WHERE dia >= current_date - CAST($dias AS INTEGER)
+        GROUP BY dia, setor_item
+        ORDER BY dia, setor_item
+    """,
+    'olpn_lookup': """
+        SELECT * FROM olpn WHERE olpn = CAST($olpn AS VARCHAR)
+    """,
+}
+
+def _table_sources() -> dict[str, Path]:
+    """
+    Nome da view -> diretório: tabelas do DATA_PATHS['gold'] e saídas do PIPELINE_PATHS
+    """
+    sources = {name: Path(path) for name, path in DATA_PATHS['gold'].items()}
+
+    for name, paths in PIPELINE_PATHS.items():
+        for key in ('output_parquet', 'parquet'):
+            if key in paths:
+                sources.setdefault(name, Path(paths[key]))
+
+    return sources
+
+def _table_files(directory: Path) -> list[Path]:
+    if TableCatalog.exists(directory):
+        return TableCatalog(directory).files()
+    if directory.is_dir():
+        return live_files(directory)
+    return []
+
+def _sql_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+class GoldQuery:
+    """
+    Conexão DuckDB em memória com uma view por tabela gold
+
+    Tabelas sem arquivos não são registradas (consultá-las gera erro de tabela inexistente)
+
+    params:
+    memory_limit: str = DEFAULT_MEMORY_LIMIT | Limite de memória do DuckDB, acima disso operadores fazem spill
+    threads: int | None = None | Threads de execução, None = núcleos da máquina
+    temp_directory: str | Path | None = None | Diretório de spill, por padrão um temporário local (fora do OneDrive)
+    """
+
+    def __init__(
+            self,
+            memory_limit: str = DEFAULT_MEMORY_LIMIT,
+            threads: int | None = None,
+            temp_directory: str | Path | None = None
+    ):
+        self.con = duckdb.connect(database=':memory:')
+        self.con.execute(f'SET memory_limit = {_sql_literal(memory_limit)}')
+        self.con.execute(f'SET threads = {int(threads or os.cpu_count() or 1)}')
+        self.con.execute(f'SET temp_directory = {_sql_literal(Path(temp_directory or Path(tempfile.gettempdir()) / "gold_query_spill").as_posix())}')
+        self.con.execute('SET preserve_insertion_order = false') # <-- libera agregações e joins grandes de manter ordem
+        self.views: dict[str, list[Path]] = {}
+        self.refresh()
+
+    def refresh(self) -> dict[str, list[Path]]:
+        """
+        Recria as views com a lista atual de arquivos (novos snapshots, compactações)
+        """
+        for name in list(self.views):
+            self.con.execute(f'DROP VIEW IF EXISTS "{name}"')
+        self.views = {}
+
+        for name, directory in _table_sources().items():
+            files = _table_files(directory)
+            if not files:
+                continue
+
+            file_list = ', '.join(_sql_literal(f.as_posix()) for f in files)
+            self.con.execute(f'CREATE VIEW "{name}" AS SELECT * FROM read_parquet([{file_list}], union_by_name = true)')
+            self.views[name] = files
+
+        return self.views
+
+    def query(self, sql: str, params: dict | list | None = None) -> pa.Table:
+        """
+        Executa a consulta e retorna pa.Table
+
+        params:
+        sql: str | Consulta SQL, parâmetros nomeados como $nome
+        params: dict | list | None = None | Valores dos parâmetros
+        """
+        try:
+            return self.con.execute(sql, params or {}).fetch_arrow_table()
+        except duckdb.Error as e:
+            logger.error(f'falha na consulta gold: {e}', extra={'job': 'gold_query', 'status': 'failure'})
+            raise
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self) -> 'GoldQuery':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def query_gold(sql: str, params: dict | list | None = None, **kwargs) -> pa.Table:
+    """
+    Abre uma conexão, executa a consulta e fecha. Para várias consultas seguidas prefira GoldQuery
+
+    params:
+    sql: str | Consulta SQL ou nome em NAMED_QUERIES
+    params: dict | list | None = None | Valores dos parâmetros
+    """
+    with GoldQuery(**kwargs) as gq:
+        return gq.query(NAMED_QUERIES.get(sql, sql), params)
+
+def _parse_param(raw: str) -> tuple[str, object]:
+    name, _, value = raw.partition('=')
+    for cast in (int, float):
+        try:
+            return name, cast(value)
+        except ValueError:
+            continue
+    return name, value
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Consultas SQL (DuckDB) sobre as tabelas gold')
+    parser.add_argument('sql', nargs='?', help='consulta SQL (parâmetros como $nome)')
+    parser.add_argument('--named', choices=list(NAMED_QUERIES), help='consulta pronta do NAMED_QUERIES')
+    parser.add_argument('--param', action='append', default=[], help='parâmetro nome=valor (repetível)')
+    parser.add_argument('--output', type=Path, default=None, help='grava o resultado em .parquet ou .csv')
+    parser.add_argument('--memory-limit', default=DEFAULT_MEMORY_LIMIT)
+    parser.add_argument('--list', action='store_true', help='lista as views registradas')
+    args = parser.parse_args(argv)
+
+    with GoldQuery(memory_limit=args.memory_limit) as gq:
+        if args.list:
+            for name, files in sorted(gq.views.items()):
+                print(f'{name:<20} {len(files):>6} arquivos')
+            return 0
+
+        sql = NAMED_QUERIES[args.named] if args.named else args.sql
+        if not sql:
+            parser.error('informe a consulta SQL ou --named')
+
+        table = gq.query(sql, dict(_parse_param(p) for p in args.param))
+
+    if args.output is None:
+        print(table.to_string(preview_cols=20) if table.num_rows <= 50 else table.slice(0, 50).to_string(preview_cols=20))
+        print(f'{table.num_rows} linhas')
+    elif args.output.suffix == '.csv':
+        pacsv.write_csv(table, args.output)
+    else:
+        pq.write_table(table, args.output, compression='zstd')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Leitura da camada gold com memory map, projeção de colunas e filtros empurrados para o Parquet
+
+Os arquivos são abertos via pyarrow.dataset sobre um LocalFileSystem com mmap: as páginas lidas ficam
+no page cache do sistema e são compartilhadas entre processos, em vez de cada job manter uma cópia
+privada. Filtros de período, filial e faixa de BOX são aplicados no scan (row groups descartados pelas
+estatísticas) e só as colunas pedidas são lidas
+
+Classes e funções:
+gold_path(): Resolve o diretório gold de um relatório ou análise (DATA_PATHS['gold'] / PIPELINE_PATHS)
+
+open_gold(): Abre o diretório como pyarrow.dataset.Dataset (pelo catálogo da tabela quando existe)
+
+build_filter(): Monta a expressão de filtro (período, filial, BOX)
+
+read_gold(): Lê a gold filtrada como pa.Table ou DataFrame pandas com colunas Arrow (sem cópia)
+
+lookup_gold(): Busca pontual por olpn/pedido lendo só os row groups apontados pelo índice lateral
+
+Como usar:
+df = read_gold('loading', columns=['olpn', 'data_hora_load', 'box'],
+               date_range=('2025-01-01', '2025-01-02'), box_range=(413, 556), as_pandas=True)
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from config.paths import DATA_PATHS, PIPELINE_PATHS
+from utils.schema_registry import REPORT_ALIASES, SCHEMAS
+from utils.gold_writer import RowGroupIndex
+from utils.gold_compaction import live_files
+from utils.table_catalog import TableCatalog
+
+_MMAP_FS = pafs.LocalFileSystem(use_mmap=True)
+
+def gold_path(report: str) -> Path:
+    """
+    Diretório gold do relatório (DATA_PATHS['gold']) ou saída da análise (PIPELINE_PATHS[...]['output_parquet'])
+    """
+    for name in (report, *[alias for alias, key in REPORT_ALIASES.items() if key == report]): # <-- aceita a chave do PIPELINE_CONFIG ('expedicoes')
+        if name in DATA_PATHS['gold']:
+            return Path(DATA_PATHS['gold'][name])
+
+    pipeline = PIPELINE_PATHS.get(report, {})
+    for key in ('output_parquet', 'parquet'):
+        if key in pipeline:
+            return Path(pipeline[key])
+
+    raise KeyError(f'relatorio sem diretorio gold: {report}')
+
+def open_gold(report_or_path: str | Path, version: int | None = None) -> ds.Dataset:
+    """
+    Abre o diretório (ou arquivo) gold como dataset Parquet com memory map
+
+    params:
+    report_or_path: str | Path | Chave do DATA_PATHS['gold']/PIPELINE_PATHS ou caminho direto
+    version: int | None = None | Versão do catálogo (time travel), None = snapshot atual
+    """
+    path = report_or_path if isinstance(report_or_path, Path) else gold_path(report_or_path)
+
+    if path.is_dir() and TableCatalog.exists(path): # <-- snapshot do catálogo, sem listar o diretório
+        source = [str(f) for f in TableCatalog(path).files(version)]
+    elif path.is_dir(): # <-- só os .parquet vivos do manifesto de compactação, ignora índices laterais e temporários
+        source = [str(f) for f in live_files(path)]
+    else:
+        source = str(path)
+
+    return ds.dataset(source, format='parquet', filesystem=_MMAP_FS)
+
+def _default_date_column(report: str | Path) -> str | None:
+    schema = SCHEMAS.get(report) if isinstance(report, str) else None
+    return schema.event_column if schema else None
+
+def _to_timestamp(value) -> pa.Scalar:
+    if isinstance(value, str):
+        value = pd.to_datetime(value, dayfirst='/' in value).to_pydatetime() # <-- pd.Timestamp não aceita dayfirst
+    elif isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    return pa.scalar(value, type=pa.timestamp('ms')) if isinstance(value, datetime) else pa.scalar(value)
+
+def build_filter(
+        date_column: str | None = None,
+        date_range: tuple | None = None,
+        filial: str | Iterable[str] | None = None,
+        box_range: tuple[int, int] | None = None,
+        extra: ds.Expression | None = None
+) -> ds.Expression | None:
+    """
+    Monta a expressão de filtro do scan
+
+    params:
+    date_column: str | None = None | Coluna de data usada no date_range
+    date_range: tuple | None = None | (início, fim), início inclusivo e fim exclusivo; None em um lado deixa aberto
+    filial: str | Iterable[str] | None = None | Filial ou lista de filiais
+    box_range: tuple[int, int] | None = None | Faixa de BOX inclusiva, igual ao SetorRule.box_range
+    extra: ds.Expression | None = None | Expressão adicional combinada com AND
+    """
+
+    expressions = []
+
+    if date_range is not None:
+        if date_column is None:
+            raise ValueError('date_range exige date_column (ou relatorio com event_column no PIPELINE_CONFIG)')
+        start, end = date_range
+        if start is not None:
+            expressions.append(ds.field(date_column) >= _to_timestamp(start))
+        if end is not None:
+            expressions.append(ds.field(date_column) < _to_timestamp(end))
+
+    if filial is not None:
+        filiais = [filial] if isinstance(filial, (str, int)) else list(filial)
+        expressions.append(ds.field('filial').isin([str(f) for f in filiais]))
+
+    if box_range is not None:
+        ini, fim = box_range
+        expressions.append((ds.field('box') >= ini) & (ds.field('box') <= fim))
+
+    if extra is not None:
+        expressions.append(extra)
+
+    if not expressions:
+        return None
+
+    expression = expressions[0]
+    for other in expressions[1:]:
+        expression = expression & other
+    return expression
+
+def read_gold(
+        report: str | Path,
+        columns: list[str] | None = None,
+        date_range: tuple | None = None,
+        date_column: str | None = None,
+        filial: str | Iterable[str] | None = None,
+        box_range: tuple[int, int] | None = None,
+        filter: ds.Expression | None = None,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Lê a gold com projeção e filtros aplicados no scan
+
+    Com as_pandas=True retorna um DataFrame com colunas pd.ArrowDtype, que apontam para os buffers
+    Arrow (mapeados do disco) em vez de copiar para numpy
+
+    params:
+    report: str | Path | Chave do DATA_PATHS['gold']/PIPELINE_PATHS ou caminho direto
+    columns: list[str] | None = None | Colunas lidas, None lê todas
+    date_range: tuple | None = None | (início, fim) sobre date_column
+    date_column: str | None = None | Coluna de data, por padrão o event_column do relatório
+    filial: str | Iterable[str] | None = None | Filtro de filial
+    box_range: tuple[int, int] | None = None | Faixa de BOX inclusiva
+    filter: ds.Expression | None = None | Filtro adicional
+    as_pandas: bool = False | Retorna DataFrame (zero cópia) em vez de pa.Table
+    """
+
+    dataset = open_gold(report)
+    expression = build_filter(
+        date_column=date_column or _default_date_column(report),
+        date_range=date_range,
+        filial=filial,
+        box_range=box_range,
+        extra=filter
+    )
+
+    table = dataset.to_table(columns=columns, filter=expression)
+
+    if as_pandas:
+        return table.to_pandas(types_mapper=pd.ArrowDtype, split_blocks=True)
+
+    return table
+
+def lookup_gold(
+        report: str | Path,
+        column: str,
+        values: Iterable,
+        columns: list[str] | None = None,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Busca pontual por chave (olpn, pedido). Em cada arquivo só os row groups apontados pelo índice
+    lateral (RowGroupIndex) são lidos; arquivos sem índice são lidos inteiros
+
+    params:
+    report: str | Path | Chave do DATA_PATHS['gold']/PIPELINE_PATHS ou caminho direto
+    column: str | Coluna da chave
+    values: Iterable | Valores procurados
+    columns: list[str] | None = None | Colunas retornadas, None retorna todas
+    as_pandas: bool = False | Retorna DataFrame (zero cópia) em vez de pa.Table
+    """
+
+    values = list(values)
+    read_columns = None if columns is None else list(dict.fromkeys([*columns, column]))
+    tables = []
+
+    for file in open_gold(report).files:
+        parquet = pq.ParquetFile(file, memory_map=True)
+        index = RowGroupIndex.load(Path(file))
+
+        if index is None:
+            row_groups = list(range(parquet.num_row_groups))
+        else:
+            row_groups = index.candidate_row_groups(column, values, parquet.metadata)
+
+        if not row_groups:
+            continue
+
+        table = parquet.read_row_groups(row_groups, columns=read_columns)
+        keys = table.column(column).cast(pa.string())
+        tables.append(table.filter(pc.is_in(keys, value_set=pa.array([str(v) for v in values], type=pa.string()))))
+
+    if tables:
+        table = pa.concat_tables(tables, promote_options='default')
+    else:
+        table = open_gold(report).schema.empty_table()
+        table = table.select(read_columns) if read_columns else table
+
+    if columns is not None:
+        table = table.select(columns)
+
+    if as_pandas:
+        return table.to_pandas(types_mapper=pd.ArrowDtype, split_blocks=True)
+
+    return table
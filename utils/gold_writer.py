@@ -0,0 +1,291 @@
+"""
+Política de escrita dos arquivos da camada gold: ordenação, tamanho de row group, estatísticas e índice lateral
+
+Cada arquivo gold é gravado ordenado pela coluna de evento do relatório (event_column do PIPELINE_CONFIG),
+com row groups dimensionados para poda por estatística, page index e estatísticas por coluna. Ao lado do
+Parquet fica um índice '<arquivo>.rgindex.json' com um filtro de bloom por row group para as colunas de
+busca pontual (olpn, pedido): a consulta por chave abre só os row groups que podem conter o valor
+
+Classes e funções:
+GoldLayout(): Política de layout de um relatório (ordenação, colunas indexadas, tamanho do row group)
+
+layout_for(): Monta a política a partir do schema do relatório
+
+RowGroupIndex(): Índice lateral (bloom por row group), construção, gravação, leitura e consulta
+
+write_gold(): Grava a tabela com a política e o índice lateral, de forma atômica
+
+Como usar:
+write_gold(df, DATA_PATHS['gold']['loading'] / 'loading_20250101.parquet', report='loading')
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+import base64
+import json
+import math
+import os
+import uuid
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from utils.schema_registry import SCHEMAS
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.rgindex.json'
+INDEX_TOKEN_KEY = b'rgindex_token' # <-- chave do metadado Parquet que amarra o arquivo ao seu índice
+INDEX_CANDIDATES = ('olpn', 'pedido') # <-- colunas de busca pontual indexadas quando existem no relatório
+ROW_GROUP_TARGET_BYTES = 32 * 1024 * 1024 # <-- ~32 MB em memória por row group, bom equilíbrio entre poda e overhead
+ROW_GROUP_MIN_ROWS = 16_384
+ROW_GROUP_MAX_ROWS = 1_048_576
+BLOOM_FPP = 0.01 # <-- 1% de falso positivo por row group
+
+@dataclass(frozen=True)
+class GoldLayout:
+    """
+    Política de layout de um arquivo gold
+
+    params:
+    sort_by: tuple[str, ...] | Colunas de ordenação (a primeira é a coluna de evento)
+    index_columns: tuple[str, ...] | Colunas com filtro de bloom no índice lateral
+    row_group_rows: int | None = None | Linhas por row group, None calcula pelo ROW_GROUP_TARGET_BYTES
+    """
+    sort_by: tuple[str, ...] = ()
+    index_columns: tuple[str, ...] = ()
+    row_group_rows: int | None = None
+
+    def rows_per_group(self, table: pa.Table) -> int:
+        """
+        Linhas por row group: fixo quando configurado, senão pelo tamanho médio da linha
+        """
+        if self.row_group_rows:
+            return self.row_group_rows
+
+        if table.num_rows == 0:
+            return ROW_GROUP_MIN_ROWS
+
+        row_bytes = max(1, table.nbytes // table.num_rows)
+        return int(min(ROW_GROUP_MAX_ROWS, max(ROW_GROUP_MIN_ROWS, ROW_GROUP_TARGET_BYTES // row_bytes)))
+
+def layout_for(report: str | None, columns=None) -> GoldLayout:
+    """
+    Política padrão do relatório: ordena pelo event_column e indexa olpn/pedido quando presentes
+
+    params:
+    report: str | None | Chave do PIPELINE_CONFIG (relatórios sem schema usam só as colunas recebidas)
+    columns: Iterable[str] | None = None | Colunas da tabela gravada, limita a política ao que existe
+    """
+    schema = SCHEMAS.get(report) if report else None
+    available = set(columns) if columns is not None else set(schema.columns if schema else ())
+
+    sort_by = (schema.event_column,) if schema and schema.event_column in available else ()
+    index_columns = tuple(c for c in INDEX_CANDIDATES if c in available)
+
+    return GoldLayout(sort_by=sort_by, index_columns=index_columns)
+
+def _hash_values(values: pa.Array | pa.ChunkedArray) -> np.ndarray:
+    """
+    Hash uint64 dos valores não nulos, como texto (olpn/pedido podem chegar como número ou string)
+    """
+    values = pc.drop_null(values.cast(pa.string()))
+    return pd.util.hash_array(np.asarray(values.to_numpy(zero_copy_only=False), dtype=object), categorize=False)
+
+def _bloom_positions(hashes: np.ndarray, num_bits: int, num_hashes: int) -> np.ndarray:
+    h1 = hashes & np.uint64(0xFFFFFFFF)
+    h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+    steps = np.arange(num_hashes, dtype=np.uint64)
+    return ((h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(num_bits)).ravel() # <-- double hashing
+
+class RowGroupIndex:
+    """
+    Índice lateral de um arquivo gold: para cada coluna indexada, um filtro de bloom por row group
+
+    O índice guarda um token também gravado nos metadados do Parquet; se não bater com o arquivo (índice
+    antigo ou arquivo reescrito), a consulta devolve todos os row groups em vez de arriscar um falso negativo
+
+    params:
+    token: str | Token gravado no Parquet indexado
+    num_rows: int | Linhas do arquivo indexado
+    row_groups: list[int] | Linhas de cada row group
+    blooms: dict[str, list[dict]] | Coluna -> [{'bits': bytes, 'num_bits': int, 'num_hashes': int}] por row group
+    """
+
+    def __init__(self, token: str, num_rows: int, row_groups: list[int], blooms: dict[str, list[dict]]):
+        self.token = token
+        self.num_rows = num_rows
+        self.row_groups = row_groups
+        self.blooms = blooms
+
+    @classmethod
+    def build(cls, table: pa.Table, row_groups: list[int], columns, token: str) -> 'RowGroupIndex':
+        """
+        Constrói o índice a partir da tabela gravada e das linhas de cada row group
+        """
+        blooms = {}
+        for col in columns:
+            filters, offset = [], 0
+            for rows in row_groups:
+                hashes = np.unique(_hash_values(table.column(col).slice(offset, rows)))
+                offset += rows
+
+                num_bits = max(64, math.ceil(-len(hashes) * math.log(BLOOM_FPP) / math.log(2) ** 2))
+                num_bits = (num_bits + 7) // 8 * 8
+                num_hashes = max(1, round(num_bits / max(1, len(hashes)) * math.log(2)))
+
+                bits = np.zeros(num_bits, dtype=bool)
+                if len(hashes):
+                    bits[_bloom_positions(hashes, num_bits, num_hashes)] = True
+
+                filters.append({'bits': np.packbits(bits).tobytes(), 'num_bits': num_bits, 'num_hashes': num_hashes})
+            blooms[col] = filters
+
+        return cls(token, sum(row_groups), list(row_groups), blooms)
+
+    @staticmethod
+    def path_for(parquet_path: Path) -> Path:
+        return Path(parquet_path).with_name(Path(parquet_path).name + INDEX_SUFFIX)
+
+    def save(self, path: Path):
+        """
+        Grava o índice em JSON de forma atômica
+        """
+        payload = {
+            'token': self.token,
+            'num_rows': self.num_rows,
+            'row_groups': self.row_groups,
+            'blooms': {
+                col: [{**f, 'bits': base64.b64encode(f['bits']).decode('ascii')} for f in filters]
+                for col, filters in self.blooms.items()
+            }
+        }
+
+        tmp_path = Path(path).with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, parquet_path: Path) -> 'RowGroupIndex | None':
+        """
+        Lê o índice lateral do arquivo, None se não existir ou estiver ilegível
+        """
+        path = cls.path_for(parquet_path)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f'indice lateral ilegivel {path}: {e}', extra={'job': 'gold_index', 'status': 'failure'})
+            return None
+
+        blooms = {
+            col: [{**f, 'bits': base64.b64decode(f['bits'])} for f in filters]
+            for col, filters in payload['blooms'].items()
+        }
+        return cls(payload['token'], payload['num_rows'], payload['row_groups'], blooms)
+
+    def candidate_row_groups(self, column: str, values, metadata: pq.FileMetaData | None = None) -> list[int]:
+        """
+        Row groups que podem conter algum dos valores (pode haver falso positivo, nunca falso negativo)
+
+        params:
+        column: str | Coluna indexada
+        values: Iterable | Valores procurados
+        metadata: pq.FileMetaData | None = None | Metadados do Parquet para validar o índice
+        """
+        all_groups = list(range(len(self.row_groups)))
+
+        if column not in self.blooms:
+            return all_groups
+
+        if metadata is not None:
+            token = (metadata.metadata or {}).get(INDEX_TOKEN_KEY, b'').decode()
+            if token != self.token or metadata.num_row_groups != len(self.row_groups):
+                return all_groups
+
+        hashes = np.unique(_hash_values(pa.array([str(v) for v in values], type=pa.string())))
+        if not len(hashes):
+            return []
+
+        candidates = []
+        for rg, bloom in enumerate(self.blooms[column]):
+            bits = np.unpackbits(np.frombuffer(bloom['bits'], dtype=np.uint8))
+            positions = _bloom_positions(hashes, bloom['num_bits'], bloom['num_hashes']).reshape(len(hashes), -1)
+            if bits[positions].all(axis=1).any():
+                candidates.append(rg)
+
+        return candidates
+
+def write_gold(
+        data: pa.Table | pd.DataFrame,
+        path: str | Path,
+        report: str | None = None,
+        layout: GoldLayout | None = None,
+        compression: str = 'zstd',
+        catalog: TableCatalog | None = None
+) -> Path:
+    """
+    Grava um arquivo gold ordenado, com row groups dimensionados, page index, estatísticas e índice lateral
+
+    A escrita é atômica: Parquet e índice vão para arquivos temporários e entram no lugar com os.replace
+
+    params:
+    data: pa.Table | pd.DataFrame | Dados tratados
+    path: str | Path | Arquivo Parquet de destino
+    report: str | None = None | Chave do PIPELINE_CONFIG, define o schema e a política padrão
+    layout: GoldLayout | None = None | Política explícita (análises sem schema, ex: bottleneck_box)
+    compression: str = 'zstd' | Codec do Parquet
+    catalog: TableCatalog | None = None | Catálogo da tabela, recebe o commit do arquivo novo
+    """
+
+    path = Path(path)
+    schema = SCHEMAS.get(report) if report else None
+
+    if isinstance(data, pd.DataFrame):
+        table = schema.to_arrow(data) if schema else pa.Table.from_pandas(data, preserve_index=False)
+    else:
+        table = data
+
+    layout = layout or layout_for(report, table.column_names)
+
+    if layout.sort_by and table.num_rows:
+        table = table.sort_by([(c, 'ascending') for c in layout.sort_by])
+
+    sorting_columns = [pq.SortingColumn(table.schema.get_field_index(c)) for c in layout.sort_by]
+
+    token = uuid.uuid4().hex
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), INDEX_TOKEN_KEY: token.encode()})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+
+    pq.write_table(
+        table,
+        tmp_path,
+        row_group_size=layout.rows_per_group(table),
+        compression=compression,
+        write_statistics=True,
+        write_page_index=True,
+        sorting_columns=sorting_columns or None
+    )
+
+    if layout.index_columns:
+        metadata = pq.read_metadata(tmp_path)
+        row_groups = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        RowGroupIndex.build(table, row_groups, layout.index_columns, token).save(RowGroupIndex.path_for(path))
+    else:
+        RowGroupIndex.path_for(path).unlink(missing_ok=True)
+
+    os.replace(tmp_path, path) # <-- entre os dois replaces o token do índice não bate com o parquet antigo, a consulta cai no scan completo
+
+    if catalog is not None:
+        catalog.commit(add=[path], operation='append')
+
+    return path
@@ -0,0 +1,55 @@
+"""
+Funções comuns das tabelas mantidas de forma incremental (olpn_lifecycle, expedicao_rollup, cancel_cube)
+
+O estado dessas tabelas é dividido em arquivos por hash da chave (bucket) e os agregados em um arquivo por mês,
+então cada delta reescreve só os buckets e meses que tocou. As três usam a mesma regra de bucket: mudar o hash
+redistribui as chaves e exige recriar o estado
+
+Classes e funções:
+bucket_ids(): Bucket de cada chave (hash estável do texto da chave)
+
+month_keys(): Mês (AAAAMM) de cada dia, nome do arquivo mensal
+
+to_date(): Limite de período (texto ISO ou dd/mm/aaaa, date, datetime) como date
+
+Como usar:
+for bucket in np.unique(bucket_ids(delta.column('pedido'), 32)):
+    ...
+"""
+
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+def bucket_ids(keys: pa.ChunkedArray | pa.Array, buckets: int) -> np.ndarray:
+    """
+    Bucket (0 a buckets - 1) de cada chave, pelo hash do texto da chave
+
+    params:
+    keys: pa.ChunkedArray | pa.Array | Coluna da chave
+    buckets: int | Quantidade de arquivos do estado
+    """
+    values = np.asarray(keys.cast(pa.string()).to_numpy(zero_copy_only=False), dtype=object) # <-- mesmo bucket para 123 e '123'
+    return (pd.util.hash_array(values, categorize=False) % np.uint64(buckets)).astype(np.int32)
+
+def month_keys(days: pa.ChunkedArray | pa.Array) -> np.ndarray:
+    """
+    Mês AAAAMM de cada dia (date32 ou timestamp)
+
+    params:
+    days: pa.ChunkedArray | pa.Array | Coluna de dia
+    """
+    return np.asarray(pc.strftime(pc.cast(days, pa.timestamp('s')), format='%Y%m').to_numpy(zero_copy_only=False), dtype=object)
+
+def to_date(value) -> date:
+    """
+    Limite de período como date: texto com '/' é lido como dia primeiro (dd/mm/aaaa), demais como ISO
+
+    params:
+    value: str | date | datetime | Limite informado pelo usuário
+    """
+    if isinstance(value, str):
+        return pd.to_datetime(value, dayfirst='/' in value).date()
+    return value.date() if isinstance(value, datetime) else value
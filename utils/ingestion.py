@@ -0,0 +1,122 @@
+"""
+Ingestão tipada dos exports CSV direto para a gold Parquet
+
+Qualquer relatório de ingestão do PIPELINE_CONFIG (configs com 'rename_columns') segue o mesmo caminho: leitura
+paralela e tipada pelo schema do relatório (utils.parallel_reader), remoção de duplicados da chave dentro do
+arquivo (a última linha vence) e gravação ordenada com índice lateral (utils.gold_writer). Cada export vira um
+arquivo gold com o mesmo nome, então reingerir a mesma janela sobrescreve o arquivo em vez de duplicar linhas.
+Com catálogo na tabela o arquivo entra por commit (utils.table_catalog). Leitura e gravação são medidas como
+etapas 'parse' e 'merge' do METRICS
+
+Classes e funções:
+dedup_keys(): Mantém a última linha de cada chave (key_columns) da tabela
+
+ingest_file(): Lê, tipa, deduplica e grava um export na gold
+
+ingest_files(): Ingestão de uma lista de exports (ex: retorno do dedup_temp_dir)
+
+Como usar:
+novos = dedup_temp_dir(TEMP_DIR['BRONZE']['recebimento'], DATA_PATHS['bronze']['recebimento'], 'recebimento')
+ingest_files('recebimento', novos)
+"""
+
+from pathlib import Path
+import logging
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from utils.datetime_parser import QUARANTINE_COLUMN
+from utils.gold_reader import gold_path
+from utils.gold_writer import write_gold
+from utils.metrics import METRICS
+from utils.parallel_reader import read_report_parallel
+from utils.schema_registry import get_schema
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+ROW_ID = '__row'
+
+def dedup_keys(table: pa.Table, key_columns: list[str] | tuple[str, ...]) -> pa.Table:
+    """
+    Remove linhas repetidas da chave mantendo a última ocorrência, preservando a ordem do arquivo
+
+    params:
+    table: pa.Table | Tabela tipada do relatório
+    key_columns: list[str] | tuple[str, ...] | Colunas da chave (key_columns do PIPELINE_CONFIG)
+    """
+
+    if not key_columns or table.num_rows == 0:
+        return table
+
+    key_columns = list(key_columns)
+    numbered = table.select(key_columns).append_column(ROW_ID, pa.array(np.arange(table.num_rows, dtype=np.int64)))
+    last = numbered.group_by(key_columns).aggregate([(ROW_ID, 'max')]).column(f'{ROW_ID}_max')
+
+    if len(last) == table.num_rows:
+        return table
+
+    return table.take(pc.take(last, pc.sort_indices(last))) # <-- posições da última linha de cada chave, em ordem de arquivo
+
+def ingest_file(report: str, csv_path: str | Path, gold_dir: str | Path | None = None) -> Path:
+    """
+    Ingestão de um export: gold_dir/<nome do export>.parquet
+
+    params:
+    report: str | Chave do PIPELINE_CONFIG
+    csv_path: str | Path | Export CSV baixado do Cognos
+    gold_dir: str | Path | None = None | Diretório gold, por padrão o do relatório (DATA_PATHS['gold'])
+    """
+
+    csv_path = Path(csv_path)
+    gold_dir = Path(gold_dir or gold_path(report))
+    schema = get_schema(report)
+
+    with METRICS.stage(report, None, 'parse') as rec:
+        table = read_report_parallel(csv_path, report)
+        rec.bytes = csv_path.stat().st_size
+        rec.rows = rows = table.num_rows
+
+    table = dedup_keys(table, schema.key_columns)
+
+    if QUARANTINE_COLUMN in table.column_names:
+        quarantined = table.num_rows - table.column(QUARANTINE_COLUMN).null_count
+        if quarantined:
+            logger.warning(
+                f'{csv_path.name}: {quarantined} linhas com data invalida em {QUARANTINE_COLUMN}',
+                extra={'job': 'ingestion', 'status': 'failure'}
+            )
+
+    catalog = TableCatalog(gold_dir) if TableCatalog.exists(gold_dir) else None
+    with METRICS.stage(report, None, 'merge') as rec:
+        path = write_gold(table, gold_dir / f'{csv_path.stem}.parquet', report=report, catalog=catalog)
+        rec.bytes = path.stat().st_size
+        rec.rows = table.num_rows
+
+    logger.info(
+        f'{report} {csv_path.name}: {table.num_rows} linhas ({rows - table.num_rows} duplicadas)',
+        extra={'job': 'ingestion', 'status': 'sucess'}
+    )
+
+    return path
+
+def ingest_files(report: str, files: list[Path], gold_dir: str | Path | None = None) -> list[Path]:
+    """
+    Ingestão dos exports em ordem; falha em um arquivo não interrompe os demais
+
+    params:
+    report: str | Chave do PIPELINE_CONFIG
+    files: list[Path] | Exports a ingerir
+    gold_dir: str | Path | None = None | Diretório gold, por padrão o do relatório
+    """
+
+    written = []
+    for csv_path in files:
+        try:
+            written.append(ingest_file(report, csv_path, gold_dir))
+        except Exception as e:
+            logger.error(
+                f'falha na ingestao de {Path(csv_path).name}: {e}',
+                extra={'job': 'ingestion', 'status': 'failure'}
+            )
+    return written
@@ -0,0 +1,114 @@
+"""
+Seleção em lote das listbox de tipo de pedido dos prompts do Cognos (olpn, picking, putaway, packing, loading)
+
+A leitura de aria-label/aria-checked e os cliques acontecem em um único script avaliado no browser,
+em vez de uma ida e volta por linha. A última seleção aplicada é lembrada por relatório e prompt (url e nome
+do frame mais o contador de navegações da página), seleções iguais não tocam o browser
+
+Classes e funções:
+apply_listbox_selection(): Aplica a seleção desejada na listbox, clicando apenas nas linhas divergentes
+
+invalidate_selection(): Esquece a seleção lembrada (ex: após recarregar a página do prompt)
+
+Como usar:
+apply_listbox_selection(frame, 'olpn', ELEMENTS['ELEMENTS_OLPN'])
+"""
+
+from collections.abc import Iterable
+import logging
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_SELECTION_CACHE: dict[str, tuple[tuple, frozenset[str]]] = {} # <-- relatório -> (chave do prompt, seleção aplicada)
+_NAVIGATIONS: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary() # <-- page -> navegações de frame vistas
+
+_BULK_SELECT_JS = """
+(rows, args) => {
+    const wanted = new Set(args.wanted);
+    let toggled = 0;
+    let selected = 0;
+    for (const row of rows) {
+        const label = row.getAttribute(args.labelAttr);
+        const isChecked = row.getAttribute(args.checkedAttr) === 'true';
+        const want = wanted.has(label);
+        if (want !== isChecked) {
+            row.click();
+            toggled++;
+        }
+        if (want) selected++;
+    }
+    return {total: rows.length, toggled: toggled, selected: selected};
+}
+"""
+
+def _count_navigation(page) -> None:
+    _NAVIGATIONS[page] = _NAVIGATIONS.get(page, 0) + 1
+
+def _prompt_key(frame) -> tuple:
+    """
+    Chave do prompt: url e nome do frame e quantas navegações a página já teve.
+    Recarregar o prompt (mesmo objeto Frame, mesma url) muda o contador e invalida a seleção lembrada
+    """
+    page = frame.page
+    if page not in _NAVIGATIONS:
+        _NAVIGATIONS[page] = 0
+        page.on('framenavigated', lambda _: _count_navigation(page))
+
+    return (getattr(frame, 'url', None) or page.url, getattr(frame, 'name', None), _NAVIGATIONS[page]) # <-- Locator não tem url/name
+
+def invalidate_selection(report: str | None = None) -> None:
+    """
+    Remove a seleção lembrada de um relatório, ou de todos quando report=None
+    """
+    if report is None:
+        _SELECTION_CACHE.clear()
+    else:
+        _SELECTION_CACHE.pop(report, None)
+
+def apply_listbox_selection(
+        frame,
+        report: str,
+        elements: dict,
+        list_itens: Iterable[str] | None = None
+) -> dict:
+    """
+    Marca na listbox exatamente os itens de list_itens e desmarca o resto, em uma única chamada ao browser
+
+    Retorna um dicionário com total de linhas, linhas clicadas e linhas selecionadas.
+    Se a mesma seleção já foi aplicada neste prompt, retorna sem acessar o browser
+
+    params:
+    frame: Frame | Locator | Frame do prompt do relatório (ELEMENTS['frame'])
+    report: str | Nome do relatório, chave da seleção lembrada
+    elements: dict | Bloco do ELEMENTS do relatório (ex: ELEMENTS['ELEMENTS_OLPN'])
+    list_itens: Iterable[str] | None = None | Itens desejados, por padrão elements['list_itens']
+    """
+
+    wanted = frozenset(list_itens if list_itens is not None else elements['list_itens'])
+    prompt_key = _prompt_key(frame)
+
+    if _SELECTION_CACHE.get(report) == (prompt_key, wanted):
+        return {'total': None, 'toggled': 0, 'selected': len(wanted), 'cached': True}
+
+    rows = frame.locator(elements['element_listbox']).locator(elements['elements_listbox'])
+
+    result = rows.evaluate_all(
+        _BULK_SELECT_JS,
+        {
+            'wanted': sorted(wanted),
+            'labelAttr': elements['element_get_item'],
+            'checkedAttr': elements['element_get_checked']
+        }
+    )
+
+    if result['selected'] < len(wanted):
+        logger.warning(
+            f'{report}: {len(wanted) - result["selected"]} itens de list_itens nao encontrados na listbox',
+            extra={'job': 'apply_listbox_selection', 'status': 'failure'}
+        )
+
+    _SELECTION_CACHE[report] = (prompt_key, wanted)
+    result['cached'] = False
+
+    return result
@@ -0,0 +1,214 @@
+"""
+Métricas de desempenho do pipeline por relatório, filial e etapa
+
+Classes e funções:
+STAGES: Etapas padronizadas da extração e do tratamento
+
+StageRecord(): Medição de uma execução de etapa (tempo, bytes, linhas, pico de RSS)
+
+PipelineMetrics(): Registro em memória das medições, exporta texto OpenMetrics e histórico em Parquet
+
+start_metrics_server(): Publica o endpoint /metrics local (Prometheus/OpenMetrics)
+
+METRICS: Registro global usado pelas classes de extração
+
+Como usar:
+with METRICS.stage('olpn', '1200', 'download') as rec:
+    path = download_report(...)
+    rec.bytes = path.stat().st_size
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import threading
+import time
+import os
+import sys
+import logging
+
+try:
+    import psutil
+except ImportError: # <-- psutil é opcional, usado só no Windows (sem resource), sem ele o pico de RSS fica vazio
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('browser_start', 'prompt_fill', 'render', 'download', 'parse', 'merge') # <-- browser_start inclui a autenticação por cookies
+
+def _peak_rss() -> int | None:
+    """
+    Pico de memória residente do processo em bytes: ru_maxrss no POSIX, peak_wset (psutil) no Windows
+    """
+    try:
+        import resource
+    except ImportError: # <-- Windows
+        if psutil is None:
+            return None
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 # <-- ru_maxrss em bytes no macOS, em KiB no Linux
+
+@dataclass
+class StageRecord:
+    """
+    Medição de uma execução de etapa
+
+    params:
+    report: str | Relatório (chave do PIPELINE_CONFIG)
+    filial: str | None | Filial, None para etapas sem filial (ex: merge)
+    stage: str | Etapa, preferencialmente um dos STAGES
+    """
+    report: str
+    filial: str | None
+    stage: str
+    started_at: datetime = field(default_factory=datetime.now)
+    seconds: float = 0.0
+    bytes: int = 0
+    rows: int = 0
+    peak_rss: int | None = None
+    status: str = 'sucess'
+
+class PipelineMetrics:
+    """
+    Registro das medições. Mantém agregados para o endpoint OpenMetrics e a lista de medições
+    ainda não gravadas no histórico Parquet
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: list[StageRecord] = []
+        self._totals: dict[tuple[str, str, str], list] = {} # <-- (report, filial, stage) -> [count, seconds, bytes, rows, peak_rss, failures]
+
+    @contextmanager
+    def stage(self, report: str, filial: str | None, stage: str):
+        """
+        Mede o bloco como uma execução da etapa; o chamador pode preencher rec.bytes e rec.rows
+        """
+        rec = StageRecord(report=report, filial=None if filial is None else str(filial), stage=stage)
+        start = time.perf_counter()
+
+        try:
+            yield rec
+        except Exception:
+            rec.status = 'failure'
+            raise
+        finally:
+            rec.seconds = time.perf_counter() - start
+            rec.peak_rss = _peak_rss()
+            self.record(rec)
+
+    def record(self, rec: StageRecord) -> None:
+        key = (rec.report, rec.filial or '', rec.stage)
+
+        with self._lock:
+            self._pending.append(rec)
+            total = self._totals.setdefault(key, [0, 0.0, 0, 0, 0, 0])
+            total[0] += 1
+            total[1] += rec.seconds
+            total[2] += rec.bytes
+            total[3] += rec.rows
+            total[4] = max(total[4], rec.peak_rss or 0)
+            total[5] += rec.status != 'sucess'
+
+    def render_openmetrics(self) -> str:
+        """
+        Texto no formato OpenMetrics com os agregados desde o início do processo
+        """
+        families = (
+            ('wdc_stage_seconds', 'counter', 'Tempo de parede acumulado por etapa', 1),
+            ('wdc_stage_runs', 'counter', 'Execuções por etapa', 0),
+            ('wdc_stage_failures', 'counter', 'Execuções com erro por etapa', 5),
+            ('wdc_stage_bytes', 'counter', 'Bytes processados por etapa', 2),
+            ('wdc_stage_rows', 'counter', 'Linhas processadas por etapa', 3),
+            ('wdc_stage_peak_rss_bytes', 'gauge', 'Maior pico de RSS observado ao fim da etapa', 4),
+        )
+
+        with self._lock:
+            totals = {k: list(v) for k, v in self._totals.items()}
+
+        lines = []
+        for name, kind, help_text, idx in families:
+            lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'# HELP {name} {help_text}')
+            suffix = '_total' if kind == 'counter' else ''
+            for (report, filial, stage), values in sorted(totals.items()):
+                labels = f'report="{report}",filial="{filial}",stage="{stage}"'
+                lines.append(f'{name}{suffix}{{{labels}}} {values[idx]}')
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def flush_history(self, history_dir: Path) -> Path | None:
+        """
+        Grava as medições pendentes em um Parquet compacto (um arquivo por flush) e limpa a lista
+
+        params:
+        history_dir: Path | Diretório do histórico (METRICS_DIR)
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        if not pending:
+            return None
+
+        table = pa.Table.from_pylist(
+            [asdict(rec) for rec in pending],
+            schema=pa.schema([
+                ('report', pa.dictionary(pa.int8(), pa.string())),
+                ('filial', pa.dictionary(pa.int16(), pa.string())),
+                ('stage', pa.dictionary(pa.int8(), pa.string())),
+                ('started_at', pa.timestamp('ms')),
+                ('seconds', pa.float32()),
+                ('bytes', pa.int64()),
+                ('rows', pa.int64()),
+                ('peak_rss', pa.int64()),
+                ('status', pa.dictionary(pa.int8(), pa.string())),
+            ])
+        )
+
+        history_dir = Path(history_dir)
+        history_dir.mkdir(parents=True, exist_ok=True)
+        path = history_dir / f'metrics_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.parquet'
+        pq.write_table(table, path, compression='zstd')
+
+        return path
+
+METRICS = PipelineMetrics()
+
+def start_metrics_server(port: int = 9464, host: str = '127.0.0.1', metrics: PipelineMetrics = METRICS) -> ThreadingHTTPServer:
+    """
+    Publica GET /metrics em uma thread daemon. Retorna o servidor (server.shutdown() encerra)
+
+    params:
+    port: int = 9464 | Porta local
+    host: str = '127.0.0.1' | Interface, por padrão apenas local
+    metrics: PipelineMetrics = METRICS | Registro exportado
+    """
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+
+            body = metrics.render_openmetrics().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # <-- sem log de acesso na saída padrão
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name='metrics_server', daemon=True).start()
+
+    return server
@@ -0,0 +1,156 @@
+"""
+Tabela larga do ciclo de vida do oLPN, mantida de forma incremental
+
+Uma linha por olpn com a data/hora de cada etapa (status oLPN, picking, packing, putaway, loading) e os
+atributos mais recentes (pedido, filial, box, tipo de pedido, status). A tabela é dividida em
+PIPELINE_CONFIG['olpn_lifecycle']['buckets'] arquivos pelo hash do olpn: cada delta reescreve só os
+buckets dos olpns tocados, sem refazer o join completo dos relatórios. Análises de time lead e gargalo
+passam a ler uma única tabela
+
+Classes e funções:
+LIFECYCLE_SCHEMA: Schema pyarrow da tabela larga
+
+stage_frame(): Reduz o delta de um relatório a uma linha por olpn no formato da tabela larga
+
+upsert_lifecycle(): Aplica os deltas dos relatórios nos buckets tocados
+
+Como usar:
+upsert_lifecycle({'picking': df_picking_tratado, 'loading': df_loading_tratado})
+"""
+
+from datetime import datetime
+from pathlib import Path
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from config.paths import PIPELINE_PATHS
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.schema_registry import DATETIME_ARROW_TYPE, SCHEMAS
+from utils.gold_writer import GoldLayout, write_gold
+from utils.incremental import bucket_ids
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['olpn_lifecycle']
+STAGES: dict[str, str] = CONFIG['stages']
+ATTRIBUTES: list[str] = CONFIG['attribute_columns']
+KEY = CONFIG['key_columns'][0]
+UPDATED_COLUMN = 'atualizado_em'
+
+def _attribute_type(column: str) -> pa.DataType:
+    for schema in SCHEMAS.values(): # <-- tipo do primeiro relatório que tem a coluna
+        if column in schema.arrow_schema.names:
+            return schema.arrow_schema.field(column).type
+    return pa.string()
+
+LIFECYCLE_SCHEMA = pa.schema(
+    [pa.field(KEY, pa.string())]
+    + [pa.field(col, DATETIME_ARROW_TYPE) for col in STAGES.values()]
+    + [pa.field(col, _attribute_type(col)) for col in ATTRIBUTES]
+    + [pa.field(UPDATED_COLUMN, DATETIME_ARROW_TYPE)]
+)
+LIFECYCLE_LAYOUT = GoldLayout(index_columns=(KEY,))
+
+def _conform(table: pa.Table) -> pa.Table:
+    """
+    Coloca a tabela no LIFECYCLE_SCHEMA (colunas ausentes viram nulas)
+    """
+    columns = []
+    for field in LIFECYCLE_SCHEMA:
+        if field.name in table.column_names:
+            columns.append(table.column(field.name).cast(field.type))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=LIFECYCLE_SCHEMA)
+
+def _collapse(table: pa.Table) -> pa.Table:
+    """
+    Uma linha por olpn: maior data de cada etapa e último atributo não nulo (linhas posteriores vencem)
+    """
+    aggregations = [(col, 'max') for col in STAGES.values()]
+    aggregations += [(col, 'last') for col in ATTRIBUTES]
+    aggregations += [(UPDATED_COLUMN, 'max')]
+
+    grouped = table.group_by(KEY, use_threads=False).aggregate(aggregations) # <-- sem threads o 'last' respeita a ordem
+    names = {f'{col}_{fn}': col for col, fn in aggregations}
+    grouped = grouped.rename_columns([names.get(c, c) for c in grouped.column_names])
+
+    return grouped.select(LIFECYCLE_SCHEMA.names)
+
+def stage_frame(report: str, delta: pa.Table | pd.DataFrame, updated_at: datetime | None = None) -> pa.Table:
+    """
+    Reduz o delta tratado de um relatório a uma linha por olpn no formato da tabela larga
+
+    params:
+    report: str | Relatório da etapa (chave de PIPELINE_CONFIG['olpn_lifecycle']['stages'])
+    delta: pa.Table | pd.DataFrame | Linhas novas do relatório, já tratadas pelo schema
+    updated_at: datetime | None = None | Momento da atualização, por padrão agora
+    """
+
+    if isinstance(delta, pd.DataFrame):
+        delta = pa.Table.from_pandas(delta, preserve_index=False)
+
+    stage_column = STAGES[report]
+    keep = [c for c in [KEY, stage_column, *ATTRIBUTES] if c in delta.column_names]
+    table = delta.select(keep)
+    table = table.filter(pc.is_valid(table.column(KEY)))
+
+    table = table.append_column(
+        UPDATED_COLUMN,
+        pa.array(np.full(table.num_rows, np.datetime64(updated_at or datetime.now(), 'ms')), type=DATETIME_ARROW_TYPE)
+    )
+
+    return _collapse(_conform(table))
+
+def _bucket_path(output_dir: Path, bucket: int) -> Path:
+    return output_dir / f'bucket_{bucket:03d}.parquet'
+
+def upsert_lifecycle(
+        deltas: dict[str, pa.Table | pd.DataFrame],
+        output_dir: Path | None = None,
+        buckets: int = CONFIG['buckets']
+) -> dict[str, int]:
+    """
+    Aplica os deltas dos relatórios na tabela larga, reescrevendo apenas os buckets dos olpns tocados
+
+    Retorna {'olpns': olpns no delta, 'buckets': buckets reescritos}
+
+    params:
+    deltas: dict[str, pa.Table | pd.DataFrame] | Relatório -> linhas novas já tratadas
+    output_dir: Path | None = None | Diretório da tabela, por padrão PIPELINE_PATHS['olpn_lifecycle']['output_parquet']
+    buckets: int = CONFIG['buckets'] | Quantidade de arquivos da tabela (não mudar depois da primeira carga)
+    """
+
+    output_dir = Path(output_dir or PIPELINE_PATHS['olpn_lifecycle']['output_parquet'])
+    updated_at = datetime.now()
+
+    frames = [stage_frame(report, delta, updated_at) for report, delta in deltas.items() if report in STAGES]
+    frames = [f for f in frames if f.num_rows]
+    if not frames:
+        return {'olpns': 0, 'buckets': 0}
+
+    delta = _collapse(pa.concat_tables(frames))
+    key_buckets = bucket_ids(delta.column(KEY), buckets)
+    catalog = TableCatalog(output_dir) if TableCatalog.exists(output_dir) else None
+
+    touched = np.unique(key_buckets)
+    for bucket in touched:
+        path = _bucket_path(output_dir, int(bucket))
+        part = delta.filter(pa.array(key_buckets == bucket))
+
+        if path.exists():
+            existing = _conform(pq.read_table(path, memory_map=True))
+            part = _collapse(pa.concat_tables([existing, part])) # <-- existente primeiro, o delta vence no 'last'
+
+        write_gold(part, path, layout=LIFECYCLE_LAYOUT, catalog=catalog)
+
+    logger.info(
+        f'ciclo de vida do olpn: {delta.num_rows} olpns em {len(touched)} buckets',
+        extra={'job': 'olpn_lifecycle', 'status': 'sucess'}
+    )
+
+    return {'olpns': delta.num_rows, 'buckets': int(len(touched))}
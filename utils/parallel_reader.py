@@ -0,0 +1,147 @@
+"""
+Leitura paralela dos exports CSV (UTF-16) em vários núcleos
+
+O processo principal decodifica o arquivo em blocos, corta cada bloco no fim de um registro
+(último '\\n' fora de aspas) e envia o texto para um pool de processos. Cada processo lê e tipa
+o bloco com o schema do relatório (utils.schema_registry) e devolve uma tabela pyarrow.
+As tabelas voltam na ordem original do arquivo
+
+Classes e funções:
+iter_report_batches(): Gera os record batches do arquivo, em ordem, com no máximo N blocos em memória
+
+read_report_parallel(): Lê o arquivo inteiro como pa.Table
+
+Como usar:
+table = read_report_parallel(TEMP_DIR['BRONZE']['olpn'] / 'olpn.csv', 'olpn')
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+from utils.schema_registry import get_schema
+
+DEFAULT_BLOCK_CHARS = 16 * 1024 * 1024 # <-- ~16M caracteres por bloco (~32 MB em UTF-16)
+
+def _parse_block(report: str, header: str, text: str) -> pa.Table:
+    """
+    Executado no processo filho: lê o bloco com o cabeçalho original e aplica o schema
+    """
+    schema = get_schema(report)
+    kwargs = schema.read_csv_kwargs
+    kwargs.pop('encoding')
+
+    df = pd.read_csv(io.StringIO(header + text), **kwargs)
+    return schema.to_arrow(schema.apply(df))
+
+def _record_end(text: str, in_quotes: bool = False) -> tuple[int, bool]:
+    """
+    Uma passada no texto a partir do estado de aspas do início: retorna a posição logo após o último '\n'
+    fora de aspas (-1 se não houver) e se o texto termina dentro de um campo entre aspas.
+    Aspas escapadas ("") só invertem o estado duas vezes, mesmo quando caem em blocos diferentes
+    """
+    end = -1
+    pos = 0
+
+    while True:
+        quote = text.find('"', pos)
+        stop = len(text) if quote == -1 else quote
+
+        if not in_quotes:
+            newline = text.rfind('\n', pos, stop)
+            if newline != -1:
+                end = newline + 1
+
+        if quote == -1:
+            return end, in_quotes
+
+        in_quotes = not in_quotes
+        pos = quote + 1
+
+def _iter_blocks(path: Path, encoding: str, block_chars: int) -> Iterator[tuple[str, str]]:
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        header = f.readline()
+        pending = ''
+        in_quotes = False # <-- estado das aspas no fim do texto já varrido, cada caractere é varrido uma vez
+
+        while True:
+            data = f.read(block_chars)
+            if not data:
+                break
+
+            end, in_quotes = _record_end(data, in_quotes)
+
+            if end == -1: # <-- registro maior que o bloco, acumula
+                pending += data
+                continue
+
+            yield header, pending + data[:end]
+            pending = data[end:]
+
+        if pending.strip():
+            yield header, pending
+
+def _iter_tables(path: Path, report: str, max_workers: int | None, block_chars: int) -> Iterator[pa.Table]:
+    schema = get_schema(report)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = deque()
+
+        for header, text in _iter_blocks(Path(path), schema.encoding, block_chars):
+            in_flight.append(pool.submit(_parse_block, report, header, text))
+
+            if len(in_flight) >= 2 * max_workers: # <-- limita os blocos em memória
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def iter_report_batches(
+        path: str | Path,
+        report: str,
+        max_workers: int | None = None,
+        block_chars: int = DEFAULT_BLOCK_CHARS
+) -> Iterator[pa.RecordBatch]:
+    """
+    Lê e tipa o arquivo em paralelo, gerando record batches na ordem do arquivo
+
+    No máximo 2 * max_workers blocos ficam em processamento ao mesmo tempo, a memória não cresce com o arquivo.
+    A coluna de quarentena só aparece nos batches de blocos com datas inválidas
+
+    params:
+    path: str | Path | Export CSV do relatório
+    report: str | Chave do PIPELINE_CONFIG (define encoding, separador e tipagem)
+    max_workers: int | None = None | Processos do pool, por padrão os núcleos da máquina
+    block_chars: int = DEFAULT_BLOCK_CHARS | Caracteres decodificados por bloco
+    """
+
+    for table in _iter_tables(Path(path), report, max_workers, block_chars):
+        yield from table.to_batches()
+
+def read_report_parallel(
+        path: str | Path,
+        report: str,
+        max_workers: int | None = None,
+        block_chars: int = DEFAULT_BLOCK_CHARS
+) -> pa.Table:
+    """
+    Lê o arquivo inteiro em paralelo e retorna uma pa.Table com o schema do relatório
+
+    params:
+    path: str | Path | Export CSV do relatório
+    report: str | Chave do PIPELINE_CONFIG
+    max_workers: int | None = None | Processos do pool
+    block_chars: int = DEFAULT_BLOCK_CHARS | Caracteres decodificados por bloco
+    """
+
+    tables = list(_iter_tables(Path(path), report, max_workers, block_chars))
+
+    if not tables:
+        return get_schema(report).arrow_schema.empty_table()
+
+    return pa.concat_tables(tables, promote_options='default') # <-- promove a coluna de quarentena ausente em alguns blocos
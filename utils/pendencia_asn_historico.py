@@ -0,0 +1,259 @@
+"""
+Histórico da pendência de fechamento de ASN (1.05) por diferença entre snapshots
+
+O relatório é uma foto do estado atual (ASNs pendentes), não um log de eventos. Em vez de guardar cada foto
+inteira, cada extração é comparada com o estado atual por asn+item: linhas novas abrem uma versão, linhas
+alteradas (compare_columns) fecham a versão anterior e abrem outra, linhas que sumiram da foto são encerradas.
+Só as versões encerradas são gravadas no histórico (valido_desde, valido_ate, encerrado_por); o estado atual
+fica em um único arquivo com as versões abertas e a data em que a pendência começou (pendente_desde), então
+"pendente desde quando" lê um arquivo e "o que estava pendente em X" poda o histórico pelas estatísticas
+de validade
+
+Classes e funções:
+HISTORY_SCHEMA: Schema pyarrow do estado atual e do histórico
+
+apply_snapshot(): Compara uma foto nova com o estado atual e grava inserções, alterações e encerramentos
+
+pending_since(): Pendências atuais com a data de início, opcionalmente só as mais antigas que N dias
+
+pending_at(): Pendências abertas em um instante (estado atual + histórico)
+
+Como usar:
+apply_snapshot(read_report_parallel(csv_path, 'pendencia_asn'), snapshot_at=datetime(2025, 1, 10, 8))
+antigas = pending_since(min_days=3, as_pandas=True)
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import os
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from config.paths import PIPELINE_PATHS
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.gold_reader import open_gold
+from utils.gold_writer import GoldLayout, write_gold
+from utils.ingestion import dedup_keys
+from utils.schema_registry import DATETIME_ARROW_TYPE, get_schema
+from utils.table_catalog import TableCatalog
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['pendencia_asn_historico']
+KEYS: list[str] = CONFIG['key_columns']
+COMPARE: list[str] = CONFIG['compare_columns']
+SOURCE = get_schema('pendencia_asn')
+
+VALID_FROM = 'valido_desde'
+VALID_TO = 'valido_ate'
+PENDING_SINCE = 'pendente_desde'
+CLOSED_BY = 'encerrado_por' # <-- 'update' (nova versão) ou 'close' (saiu da pendência)
+
+HISTORY_SCHEMA = pa.schema(
+    list(SOURCE.schema_for(SOURCE.columns))
+    + [
+        pa.field(VALID_FROM, DATETIME_ARROW_TYPE),
+        pa.field(VALID_TO, DATETIME_ARROW_TYPE),
+        pa.field(PENDING_SINCE, DATETIME_ARROW_TYPE),
+        pa.field(CLOSED_BY, pa.string())
+    ]
+)
+
+CURRENT_DIR = PIPELINE_PATHS['pendencia_asn_historico']['current']
+HISTORY_DIR = PIPELINE_PATHS['pendencia_asn_historico']['output_parquet']
+CURRENT_FILE = 'pendencia_atual.parquet'
+STATE_FILE = '_estado.json'
+
+CURRENT_LAYOUT = GoldLayout(sort_by=tuple(KEYS))
+HISTORY_LAYOUT = GoldLayout(sort_by=(VALID_TO, *KEYS))
+
+def _conform(table: pa.Table) -> pa.Table:
+    """
+    Coloca a tabela no HISTORY_SCHEMA (colunas ausentes viram nulas)
+    """
+    columns = []
+    for field in HISTORY_SCHEMA:
+        if field.name in table.column_names:
+            columns.append(table.column(field.name).cast(field.type))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=HISTORY_SCHEMA)
+
+def _fill(table: pa.Table, column: str, value) -> pa.Table:
+    field = HISTORY_SCHEMA.field(column)
+    return table.set_column(table.schema.get_field_index(column), field, pa.array([value] * table.num_rows, type=field.type))
+
+def _diff_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Chave, hash das compare_columns e posição da linha, base do merge entre estado atual e foto nova
+    """
+    frame = table.select(KEYS).to_pandas()
+    frame['_hash'] = pd.array(pd.util.hash_pandas_object(table.select(COMPARE).to_pandas(), index=False), dtype='UInt64')
+    frame['_pos'] = pd.array(np.arange(table.num_rows, dtype=np.int64), dtype='Int64') # <-- tipos nulos sobrevivem ao merge outer sem virar float
+    return frame
+
+def _read_state(current_dir: Path) -> datetime | None:
+    path = Path(current_dir) / STATE_FILE
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return datetime.fromisoformat(json.load(f)['snapshot_at'])
+
+def _write_state(current_dir: Path, snapshot_at: datetime, counts: dict[str, int]):
+    path = Path(current_dir) / STATE_FILE
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'snapshot_at': snapshot_at.isoformat(), **counts}, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _read_current(current_dir: Path) -> pa.Table:
+    path = Path(current_dir) / CURRENT_FILE
+    if not path.exists():
+        return HISTORY_SCHEMA.empty_table()
+    return _conform(pq.read_table(path, memory_map=True))
+
+def apply_snapshot(
+        snapshot: pd.DataFrame | pa.Table,
+        snapshot_at: datetime | None = None,
+        current_dir: Path = CURRENT_DIR,
+        history_dir: Path = HISTORY_DIR
+) -> dict[str, int]:
+    """
+    Aplica uma foto nova da pendência: grava as versões encerradas no histórico e reescreve o estado atual
+
+    Retorna {'inserts', 'updates', 'closes', 'unchanged'}. Foto com instante anterior ou igual ao da
+    última aplicada é ignorada (fecharia intervalos fora de ordem)
+
+    params:
+    snapshot: pd.DataFrame | pa.Table | Foto completa tratada pelo schema do 'pendencia_asn'
+    snapshot_at: datetime | None = None | Instante da extração, por padrão agora
+    current_dir: Path = CURRENT_DIR | Diretório do estado atual
+    history_dir: Path = HISTORY_DIR | Diretório do histórico de versões encerradas
+    """
+
+    snapshot_at = (snapshot_at or datetime.now()).replace(microsecond=0)
+    current_dir, history_dir = Path(current_dir), Path(history_dir)
+
+    last = _read_state(current_dir)
+    if last is not None and snapshot_at <= last:
+        logger.warning(
+            f'foto da pendencia de {snapshot_at} nao e posterior a ultima aplicada ({last}), ignorada',
+            extra={'job': 'pendencia_asn_historico', 'status': 'failure'}
+        )
+        return {'inserts': 0, 'updates': 0, 'closes': 0, 'unchanged': 0}
+
+    if isinstance(snapshot, pd.DataFrame):
+        snapshot = SOURCE.to_arrow(snapshot)
+
+    valid_keys = pc.is_valid(snapshot.column(KEYS[0]))
+    for key in KEYS[1:]:
+        valid_keys = pc.and_(valid_keys, pc.is_valid(snapshot.column(key)))
+    new = _conform(dedup_keys(snapshot.filter(valid_keys), KEYS))
+    current = _read_current(current_dir)
+
+    merged = _diff_frame(current).merge(_diff_frame(new), on=KEYS, how='outer', suffixes=('_cur', '_new'), indicator=True)
+    both = (merged['_merge'] == 'both').to_numpy()
+    changed = both & (merged['_hash_cur'] != merged['_hash_new']).to_numpy(dtype=bool, na_value=False)
+    kept = both & ~changed
+    closed = (merged['_merge'] == 'left_only').to_numpy()
+    inserted = (merged['_merge'] == 'right_only').to_numpy()
+
+    pos_cur = merged['_pos_cur'].to_numpy(dtype=np.int64, na_value=-1)
+    pos_new = merged['_pos_new'].to_numpy(dtype=np.int64, na_value=-1)
+
+    def take(table: pa.Table, positions: np.ndarray, mask: np.ndarray) -> pa.Table:
+        return table.take(pa.array(positions[mask]))
+
+    counts = {
+        'inserts': int(inserted.sum()),
+        'updates': int(changed.sum()),
+        'closes': int(closed.sum()),
+        'unchanged': int(kept.sum())
+    }
+
+    if counts['updates'] or counts['closes']:
+        ended = pa.concat_tables([
+            _fill(take(current, pos_cur, changed), CLOSED_BY, 'update'),
+            _fill(take(current, pos_cur, closed), CLOSED_BY, 'close')
+        ])
+        ended = _fill(ended, VALID_TO, snapshot_at)
+        catalog = TableCatalog(history_dir) if TableCatalog.exists(history_dir) else None
+        write_gold(ended, history_dir / f'diff_{snapshot_at:%Y%m%d_%H%M%S}.parquet', layout=HISTORY_LAYOUT, catalog=catalog)
+
+    if counts['inserts'] or counts['updates'] or counts['closes'] or last is None:
+        updated = _fill(take(new, pos_new, changed), VALID_FROM, snapshot_at)
+        updated = updated.set_column( # <-- nova versão, mesma pendência: mantém o início original
+            updated.schema.get_field_index(PENDING_SINCE),
+            HISTORY_SCHEMA.field(PENDING_SINCE),
+            take(current, pos_cur, changed).column(PENDING_SINCE)
+        )
+        inserts = _fill(_fill(take(new, pos_new, inserted), VALID_FROM, snapshot_at), PENDING_SINCE, snapshot_at)
+
+        state = pa.concat_tables([take(current, pos_cur, kept), updated, inserts])
+        write_gold(state, current_dir / CURRENT_FILE, layout=CURRENT_LAYOUT)
+
+    _write_state(current_dir, snapshot_at, counts)
+
+    logger.info(
+        f'pendencia asn {snapshot_at:%d/%m/%Y %H:%M:%S}: {counts["inserts"]} novas, {counts["updates"]} alteradas, '
+        f'{counts["closes"]} encerradas, {counts["unchanged"]} sem alteracao',
+        extra={'job': 'pendencia_asn_historico', 'status': 'sucess'}
+    )
+
+    return counts
+
+def pending_since(
+        min_days: float | None = None,
+        current_dir: Path = CURRENT_DIR,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Pendências atuais com pendente_desde, lendo só o arquivo do estado atual
+
+    params:
+    min_days: float | None = None | Só pendências abertas há pelo menos N dias
+    current_dir: Path = CURRENT_DIR | Diretório do estado atual
+    as_pandas: bool = False | Retorna DataFrame em vez de pa.Table
+    """
+
+    table = _read_current(current_dir).drop_columns([VALID_TO, CLOSED_BY])
+    if min_days is not None:
+        limit = pa.scalar(datetime.now() - timedelta(days=min_days), type=DATETIME_ARROW_TYPE)
+        table = table.filter(pc.less_equal(table.column(PENDING_SINCE), limit))
+
+    return table.to_pandas(types_mapper=pd.ArrowDtype) if as_pandas else table
+
+def pending_at(
+        as_of: datetime,
+        current_dir: Path = CURRENT_DIR,
+        history_dir: Path = HISTORY_DIR,
+        as_pandas: bool = False
+) -> pa.Table | pd.DataFrame:
+    """
+    Versões abertas no instante: valido_desde <= as_of < valido_ate (valido_ate nulo = ainda aberta)
+
+    params:
+    as_of: datetime | Instante consultado
+    current_dir: Path = CURRENT_DIR | Diretório do estado atual
+    history_dir: Path = HISTORY_DIR | Diretório do histórico
+    as_pandas: bool = False | Retorna DataFrame em vez de pa.Table
+    """
+
+    instant = pa.scalar(as_of, type=DATETIME_ARROW_TYPE)
+    current = _read_current(current_dir)
+    parts = [current.filter(pc.less_equal(current.column(VALID_FROM), instant))]
+
+    history_dir = Path(history_dir)
+    if history_dir.is_dir():
+        history = open_gold(history_dir)
+        if history.files:
+            expression = (ds.field(VALID_FROM) <= instant) & (ds.field(VALID_TO) > instant) # <-- poda arquivos e row groups pela validade
+            parts.append(_conform(history.to_table(filter=expression)))
+
+    table = pa.concat_tables(parts)
+    return table.to_pandas(types_mapper=pd.ArrowDtype) if as_pandas else table
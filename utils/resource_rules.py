@@ -0,0 +1,145 @@
+"""
+Interceptação de requisições das páginas de relatório do Cognos
+
+Bloqueia tipos de recurso e domínios desnecessários para baixar o CSV e serve os arquivos estáticos
+do Cognos (js/css) a partir de um cache em disco compartilhado entre contextos do browser.
+Com rotas ativas o playwright desliga o cache HTTP do Chromium, por isso o cache próprio
+
+Classes e funções:
+StaticAssetCache(): Cache em disco de respostas estáticas, endereçado pelo hash da versão e da url, com validade
+
+install_resource_rules(): Registra a rota de bloqueio/cache na página do relatório, conforme RESOURCE_RULES[link_key]
+"""
+
+from pathlib import Path
+from urllib.parse import urlsplit
+import hashlib
+import json
+import os
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHEABLE_RESOURCE_TYPES = {'script', 'stylesheet'}
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'set-cookie'} # <-- body salvo já vem descompactado
+ASSET_MAX_AGE_SECONDS = 24 * 60 * 60 # <-- atualização do Cognos sem mudança de url chega em no máximo um dia
+
+class StaticAssetCache:
+    """
+    Cache em disco de respostas estáticas. Cada url vira <hash>.body + <hash>.json (status, headers e horário)
+
+    Entradas mais velhas que max_age_seconds são tratadas como ausentes e rebaixadas do servidor; trocar
+    a version (ex: 'static_cache_version' do RESOURCE_RULES) invalida todo o cache de uma vez
+
+    params:
+    cache_dir: Path | Diretório do cache (BROWSER_ASSET_CACHE)
+    version: str = '' | Versão do cache, entra no hash da url
+    max_age_seconds: float = ASSET_MAX_AGE_SECONDS | Validade de cada entrada
+    """
+
+    def __init__(self, cache_dir: Path, version: str = '', max_age_seconds: float = ASSET_MAX_AGE_SECONDS):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.version = version
+        self.max_age_seconds = max_age_seconds
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha1(f'{self.version}|{url}'.encode('utf-8')).hexdigest()
+        return self.cache_dir / f'{key}.body', self.cache_dir / f'{key}.json'
+
+    def get(self, url: str) -> tuple[dict, bytes] | None:
+        body_path, meta_path = self._paths(url)
+
+        if not meta_path.exists():
+            return None
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if time.time() - meta.get('cached_at', 0) > self.max_age_seconds:
+                return None # <-- expirado, o put da nova resposta sobrescreve
+            return meta, body_path.read_bytes()
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, url: str, status: int, headers: dict, body: bytes) -> None:
+        body_path, meta_path = self._paths(url)
+
+        # body primeiro, meta por último: meta existente garante body completo
+        tmp_body = body_path.with_suffix('.body.tmp')
+        tmp_body.write_bytes(body)
+        os.replace(tmp_body, body_path)
+
+        tmp_meta = meta_path.with_suffix('.json.tmp')
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({'status': status, 'headers': headers, 'cached_at': time.time()}, f)
+        os.replace(tmp_meta, meta_path)
+
+def _matches_domain(host: str, domains: list[str]) -> bool:
+    return any(host == d or host.endswith(f'.{d}') for d in domains)
+
+def install_resource_rules(page, link_key: str | None, rules: dict, cache_dir: Path | None = None) -> None:
+    """
+    Registra na página a rota que bloqueia recursos e serve estáticos do cache. Deve ser chamada depois
+    do login: rota no contexto inteiro também pegaria o LOGIN_CSI/Azure AD e outras abas
+
+    params:
+    page: Page | Página playwright do relatório, já autenticada
+    link_key: str | None | Chave do LINKS que será acessada, define qual regra aplicar
+    rules: dict | Dicionário no formato do RESOURCE_RULES
+    cache_dir: Path | None = None | Diretório do cache de estáticos, None desliga o cache
+    """
+
+    rule = rules.get(link_key) or rules['default']
+
+    blocked_types = set(rule.get('block_resource_types', []))
+    blocked_domains = list(rule.get('block_domains', []))
+    cache_patterns = [re.compile(p) for p in rule.get('static_cache_patterns', [])]
+
+    if not blocked_types and not blocked_domains and not cache_patterns:
+        return # <-- sem rota registrada o Chromium mantém o cache HTTP nativo
+
+    cache = StaticAssetCache(cache_dir, version=str(rule.get('static_cache_version', ''))) if cache_dir and cache_patterns else None
+
+    def handler(route, request):
+        resource_type = request.resource_type
+
+        if resource_type in blocked_types or _matches_domain(urlsplit(request.url).hostname or '', blocked_domains):
+            route.abort()
+            return
+
+        cacheable = (
+            cache is not None
+            and request.method == 'GET'
+            and resource_type in CACHEABLE_RESOURCE_TYPES
+            and any(p.search(request.url) for p in cache_patterns)
+        )
+
+        if not cacheable:
+            route.continue_()
+            return
+
+        cached = cache.get(request.url)
+        if cached is not None:
+            meta, body = cached
+            route.fulfill(status=meta['status'], headers=meta['headers'], body=body)
+            return
+
+        response = route.fetch()
+        body = response.body()
+
+        if response.status == 200:
+            try:
+                headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+                cache.put(request.url, response.status, headers, body)
+            except OSError as e:
+                logger.warning(
+                    f'falha ao gravar cache estatico {request.url}: {e}',
+                    extra={'job': 'install_resource_rules', 'status': 'failure'}
+                )
+
+        route.fulfill(response=response, body=body)
+
+    page.route('**/*', handler)
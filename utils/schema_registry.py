@@ -0,0 +1,224 @@
+"""
+Registro de schemas tipados compilado a partir do PIPELINE_CONFIG
+
+Cada relatório de ingestão (configs com 'rename_columns') vira um ReportSchema validado no import:
+colunas de column_types, datetime_columns e key_columns precisam existir após o rename, e uma coluna
+não pode ser removida e renomeada ao mesmo tempo. Leitores, escritores e merges compartilham os mesmos
+mapas pré-calculados em vez de remontar dicionários de dtype a cada chunk
+
+Classes e funções:
+SchemaConfigError(): Erro de configuração do PIPELINE_CONFIG detectado no import
+
+ReportSchema(): Schema compilado de um relatório (rename, remoção, dtypes, datas, chaves, schema pyarrow)
+
+REPORT_ALIASES: Nome do relatório nos paths -> chave do PIPELINE_CONFIG (ex: 'expedicao' -> 'expedicoes')
+
+SCHEMAS: Dicionário relatório -> ReportSchema (chaves do PIPELINE_CONFIG e aliases)
+
+get_schema(): Retorna o schema de um relatório
+
+Como usar:
+schema = get_schema('olpn')
+for chunk in pd.read_csv(path, chunksize=CHUNKSIZE, **schema.read_csv_kwargs):
+    table = schema.to_arrow(schema.apply(chunk))
+"""
+
+from dataclasses import dataclass, field
+import pandas as pd
+import pyarrow as pa
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.datetime_parser import DEFAULT_DATETIME_FORMATS, QUARANTINE_COLUMN, parse_datetimes
+
+ARROW_TYPES = { # <-- dtype pandas do PIPELINE_CONFIG -> tipo pyarrow
+    'Int64': pa.int64(),
+    'string': pa.string(),
+    'Float64': pa.float64(),
+    'float64': pa.float64(),
+    'boolean': pa.bool_(),
+}
+DATETIME_ARROW_TYPE = pa.timestamp('ms')
+REPORT_ALIASES = { # <-- nome usado no DATA_PATHS/FILE_ROUTER -> chave do PIPELINE_CONFIG, quando diferem
+    'expedicao': 'expedicoes',
+}
+
+class SchemaConfigError(ValueError):
+    """
+    PIPELINE_CONFIG com coluna tipada, datada ou chave que não existe após o rename
+    """
+
+@dataclass(frozen=True)
+class ReportSchema:
+    """
+    Schema compilado de um relatório. Todos os mapas são calculados uma vez, no import
+
+    params:
+    name: str | Chave do PIPELINE_CONFIG
+    remove_columns: frozenset[str] | Colunas brutas descartadas
+    rename_columns: dict[str, str] | Coluna bruta -> coluna tratada
+    dtypes: dict[str, str] | Coluna tratada -> dtype pandas (todas as colunas não datetime, 'string' quando fora do column_types)
+    datetime_columns: tuple[str, ...] | Colunas tratadas do tipo data/hora
+    datetime_formats: dict[str, tuple[str, ...]] | Coluna de data -> formatos strptime (formato do config primeiro, padrões como reserva)
+    key_columns: tuple[str, ...] | Chave de deduplicação no merge com a gold
+    event_column: str | None | Coluna de data/hora do evento (filtros de período e ordenação da gold)
+    encoding: str | Encoding do arquivo bruto
+    sep: str | Separador do arquivo bruto
+    arrow_schema: pa.Schema | Schema pyarrow das colunas tratadas, na ordem do rename_columns, mais a coluna de quarentena
+    """
+    name: str
+    remove_columns: frozenset[str]
+    rename_columns: dict[str, str]
+    dtypes: dict[str, str]
+    datetime_columns: tuple[str, ...]
+    datetime_formats: dict[str, tuple[str, ...]]
+    key_columns: tuple[str, ...]
+    event_column: str | None
+    encoding: str
+    sep: str
+    arrow_schema: pa.Schema
+    raw_dtypes: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def columns(self) -> list[str]:
+        return [c for c in self.arrow_schema.names if c != QUARANTINE_COLUMN]
+
+    @property
+    def read_csv_kwargs(self) -> dict:
+        """
+        Argumentos do pd.read_csv: encoding, separador, colunas removidas não são lidas e colunas
+        inteiras/texto já saem tipadas da leitura
+        """
+        remove = self.remove_columns
+        return {
+            'sep': self.sep,
+            'encoding': self.encoding,
+            'usecols': lambda c: c not in remove,
+            'dtype': self.raw_dtypes
+        }
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Remove, renomeia e tipa um DataFrame bruto (ou chunk) com os mapas pré-calculados
+        """
+        drop = [c for c in df.columns if c in self.remove_columns]
+        if drop:
+            df = df.drop(columns=drop)
+
+        df = df.rename(columns=self.rename_columns)
+
+        casts = {c: t for c, t in self.dtypes.items() if c in df.columns and str(df[c].dtype) != t}
+        if casts:
+            df = df.astype(casts)
+
+        return parse_datetimes(df, self.datetime_formats)
+
+    def schema_for(self, columns) -> pa.Schema:
+        """
+        Subconjunto do schema com as colunas presentes, na ordem recebida
+        """
+        return pa.schema([self.arrow_schema.field(c) for c in columns if c in self.arrow_schema.names])
+
+    def to_arrow(self, df: pd.DataFrame) -> pa.Table:
+        """
+        Converte o DataFrame tratado em tabela pyarrow com o schema do relatório
+        """
+        schema = self.schema_for(df.columns)
+        return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+def _compile(name: str, config: dict) -> ReportSchema:
+    rename = dict(config.get('rename_columns', {}))
+    remove = frozenset(config.get('remove_columns', []))
+    column_types = dict(config.get('column_types', {}))
+    datetime_columns = tuple(config.get('datetime_columns', []))
+    key_columns = tuple(config.get('key_columns', []))
+    configured_formats = dict(config.get('datetime_formats', {}))
+    event_column = config.get('event_column')
+    output_columns = list(dict.fromkeys(rename.values()))
+
+    errors = []
+
+    removed_and_renamed = sorted(remove & set(rename))
+    if removed_and_renamed:
+        errors.append(f'colunas removidas e renomeadas ao mesmo tempo: {removed_and_renamed}')
+
+    duplicated = sorted({c for c in rename.values() if list(rename.values()).count(c) > 1})
+    if duplicated:
+        errors.append(f'mais de uma coluna renomeada para: {duplicated}')
+
+    for label, columns in (('column_types', column_types), ('datetime_columns', datetime_columns), ('key_columns', key_columns)):
+        missing = [c for c in columns if c not in output_columns]
+        if missing:
+            errors.append(f'{label} com colunas inexistentes após o rename: {missing}')
+
+    if event_column is not None and event_column not in datetime_columns:
+        errors.append(f'event_column {event_column!r} fora de datetime_columns')
+
+    missing_formats = [c for c in configured_formats if c not in datetime_columns]
+    if missing_formats:
+        errors.append(f'datetime_formats com colunas fora de datetime_columns: {missing_formats}')
+
+    unknown_types = sorted({t for t in column_types.values() if t not in ARROW_TYPES})
+    if unknown_types:
+        errors.append(f'dtypes sem mapeamento pyarrow: {unknown_types}')
+
+    overlap = sorted(set(column_types) & set(datetime_columns))
+    if overlap:
+        errors.append(f'colunas em column_types e datetime_columns: {overlap}')
+
+    if errors:
+        raise SchemaConfigError(f"PIPELINE_CONFIG['{name}']: " + '; '.join(errors))
+
+    dtypes = { # <-- coluna renomeada sem column_types é texto na leitura e no schema, nunca inferida pelo pandas
+        col: column_types.get(col, 'string')
+        for col in output_columns
+        if col not in datetime_columns
+    }
+
+    fields = []
+    for col in output_columns:
+        if col in datetime_columns:
+            fields.append(pa.field(col, DATETIME_ARROW_TYPE))
+        else:
+            fields.append(pa.field(col, ARROW_TYPES[dtypes[col]]))
+    fields.append(pa.field(QUARANTINE_COLUMN, pa.string()))
+
+    datetime_formats = {
+        col: tuple(dict.fromkeys(([configured_formats[col]] if col in configured_formats else []) + list(DEFAULT_DATETIME_FORMATS)))
+        for col in datetime_columns
+    }
+
+    raw_by_output = {out: raw for raw, out in rename.items()}
+    raw_dtypes = {raw_by_output[c]: t for c, t in dtypes.items()}
+    raw_dtypes.update({raw_by_output[c]: 'string' for c in datetime_columns})
+
+    return ReportSchema(
+        name=name,
+        remove_columns=remove,
+        rename_columns=rename,
+        dtypes=dtypes,
+        datetime_columns=datetime_columns,
+        datetime_formats=datetime_formats,
+        key_columns=key_columns,
+        event_column=event_column,
+        encoding=config['encoding'],
+        sep=config['sep'],
+        arrow_schema=pa.schema(fields),
+        raw_dtypes=raw_dtypes
+    )
+
+SCHEMAS: dict[str, ReportSchema] = {
+    name: _compile(name, config)
+    for name, config in PIPELINE_CONFIG.items()
+    if 'rename_columns' in config # <-- configs de análise (bottleneck_*, time_lead_olpn) não são relatórios de ingestão
+}
+
+for alias, name in REPORT_ALIASES.items(): # <-- nome do DATA_PATHS/FILE_ROUTER aponta para o mesmo schema
+    SCHEMAS.setdefault(alias, SCHEMAS[name])
+
+def get_schema(report: str) -> ReportSchema:
+    """
+    Retorna o schema compilado de um relatório (chave do PIPELINE_CONFIG)
+    """
+    try:
+        return SCHEMAS[report]
+    except KeyError:
+        raise KeyError(f'relatorio sem schema registrado: {report}') from None
@@ -0,0 +1,312 @@
+"""
+Catálogo de tabelas da arquitetura medalhão: manifesto de arquivos com snapshots versionados
+
+Cada tabela (diretório do DATA_PATHS) ganha uma pasta '_catalog' com um JSON por snapshot (v00000001.json, ...).
+O snapshot lista os arquivos vivos com linhas, bytes e min/max por coluna (das estatísticas do Parquet) e a
+versão do schema. Leitores planejam o scan a partir do snapshot, sem listar diretórios no OneDrive, e podem ler
+uma versão anterior (time travel). O commit é atômico: o snapshot é gravado em um temporário e publicado com
+os.link (falha se a versão já existe), leitores nunca veem um JSON pela metade, dois escritores concorrentes
+nunca gravam a mesma versão e o perdedor refaz o commit sobre a versão vencedora
+
+Classes e funções:
+CommitConflict(): Versão já gravada por outro escritor (tratada internamente com nova tentativa)
+
+TableCatalog(): Catálogo de uma tabela (snapshot atual, commit, planejamento de scan, expiração)
+
+file_entry(): Metadados de um arquivo Parquet para o snapshot (linhas, bytes, min/max por coluna)
+
+Como usar:
+catalog = TableCatalog(DATA_PATHS['gold']['olpn'])
+catalog.commit(add=[novo_arquivo], operation='append')
+files = catalog.plan({'data_hora_ultimo_update_olpn': ('2025-01-01', '2025-01-02')})
+"""
+
+from datetime import date, datetime
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import time
+import logging
+import pyarrow.parquet as pq
+from utils.datetime_parser import DEFAULT_DATETIME_FORMATS
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = '_catalog'
+LATEST_HINT = '_latest'
+SNAPSHOT_PATTERN = 'v{:08d}.json'
+COMMIT_RETRIES = 10
+ISO_STAT = re.compile(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2}(\.\d+)?)?$') # <-- estatística de data/hora gravada pelo _json_value
+
+class CommitConflict(RuntimeError):
+    """
+    Outro escritor gravou a versão antes deste commit
+    """
+
+def _json_value(value):
+    """
+    Valor de estatística serializável e comparável (datas viram ISO, que ordena como texto)
+    """
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+def _timestamp_text(value) -> str | None:
+    """
+    Data ou data/hora como texto ISO completo ('AAAA-MM-DD HH:MM:SS'), None se o valor não for uma data
+    """
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time()).isoformat(sep=' ')
+    if not isinstance(value, str):
+        return None
+
+    value = value.strip()
+    try:
+        return datetime.fromisoformat(value).isoformat(sep=' ')
+    except ValueError:
+        pass
+    for fmt in DEFAULT_DATETIME_FORMATS: # <-- limites no formato do Cognos (dd/mm/aaaa)
+        try:
+            return datetime.strptime(value, fmt).isoformat(sep=' ')
+        except ValueError:
+            continue
+    return None
+
+def _schema_fingerprint(schema) -> str:
+    return hashlib.sha1(str(schema.remove_metadata()).encode('utf-8')).hexdigest()[:12]
+
+def file_entry(path: Path, root: Path) -> dict:
+    """
+    Monta a entrada do snapshot de um arquivo Parquet lendo apenas o rodapé
+
+    params:
+    path: Path | Arquivo Parquet
+    root: Path | Diretório da tabela (o caminho é gravado relativo a ele)
+    """
+
+    path = Path(path)
+    metadata = pq.read_metadata(path)
+    stats: dict[str, list] = {}
+
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        for i in range(row_group.num_columns):
+            column = row_group.column(i)
+            s = column.statistics
+            name = column.path_in_schema
+
+            if s is None or not s.has_min_max:
+                stats[name] = None
+                continue
+
+            if name in stats and stats[name] is None: # <-- algum row group sem estatística: coluna não poda
+                continue
+
+            lo, hi = _json_value(s.min), _json_value(s.max)
+            if name not in stats:
+                stats[name] = [lo, hi]
+            else:
+                stats[name] = [min(stats[name][0], lo), max(stats[name][1], hi)]
+
+    return {
+        'path': path.relative_to(root).as_posix(),
+        'rows': metadata.num_rows,
+        'bytes': path.stat().st_size,
+        'stats': {k: v for k, v in stats.items() if v is not None}
+    }
+
+class TableCatalog:
+    """
+    Catálogo de snapshots de uma tabela
+
+    Snapshot: {'version', 'parent', 'committed_at', 'operation', 'schema_version', 'schema_fingerprint', 'files': [...]}
+
+    params:
+    table_dir: Path | Diretório da tabela (ex: DATA_PATHS['gold']['loading'])
+    """
+
+    def __init__(self, table_dir: Path):
+        self.table_dir = Path(table_dir)
+        self.catalog_dir = self.table_dir / CATALOG_DIR
+
+    @classmethod
+    def exists(cls, table_dir: Path) -> bool:
+        return (Path(table_dir) / CATALOG_DIR).is_dir()
+
+    def _snapshot_path(self, version: int) -> Path:
+        return self.catalog_dir / SNAPSHOT_PATTERN.format(version)
+
+    def latest_version(self) -> int:
+        """
+        Última versão: parte da dica '_latest' e avança enquanto existir snapshot seguinte (a dica pode estar atrasada)
+        """
+        hint = self.catalog_dir / LATEST_HINT
+        try:
+            version = int(hint.read_text(encoding='utf-8').strip())
+        except (OSError, ValueError):
+            version = 0
+
+        while self._snapshot_path(version + 1).exists():
+            version += 1
+
+        return version
+
+    def snapshot(self, version: int | None = None) -> dict:
+        """
+        Snapshot de uma versão (None = atual). Tabela sem commits retorna um snapshot vazio de versão 0
+        """
+        version = self.latest_version() if version is None else version
+        if version == 0:
+            return {'version': 0, 'parent': None, 'schema_version': 0, 'schema_fingerprint': None, 'files': []}
+
+        with open(self._snapshot_path(version), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def files(self, version: int | None = None) -> list[Path]:
+        """
+        Arquivos vivos de uma versão, sem listar o diretório da tabela
+        """
+        return [self.table_dir / entry['path'] for entry in self.snapshot(version)['files']]
+
+    def plan(self, ranges: dict[str, tuple] | None = None, version: int | None = None) -> list[Path]:
+        """
+        Arquivos que podem ter linhas dentro das faixas (poda por min/max do snapshot)
+
+        params:
+        ranges: dict[str, tuple] | None = None | Coluna -> (mínimo, máximo) inclusivo; None em um lado deixa aberto.
+        Em colunas de data/hora os limites (date, datetime, ISO ou dd/mm/aaaa) são comparados como data/hora completa
+        version: int | None = None | Versão lida, None = atual
+        """
+        selected = []
+        for entry in self.snapshot(version)['files']:
+            if self._may_contain(entry, ranges or {}):
+                selected.append(self.table_dir / entry['path'])
+        return selected
+
+    @staticmethod
+    def _may_contain(entry: dict, ranges: dict[str, tuple]) -> bool:
+        for column, (lo, hi) in ranges.items():
+            stats = entry['stats'].get(column)
+            if stats is None:
+                continue
+            if isinstance(stats[0], str) and ISO_STAT.match(stats[0]): # <-- '2025-01-02' < '2025-01-02 00:00:00' como texto
+                stats = [_timestamp_text(v) for v in stats]
+                lo = _timestamp_text(lo) if lo is not None else None # <-- limite que não é data não poda
+                hi = _timestamp_text(hi) if hi is not None else None
+                if None in stats:
+                    continue
+            try:
+                if lo is not None and stats[1] < _json_value(lo):
+                    return False
+                if hi is not None and stats[0] > _json_value(hi):
+                    return False
+            except TypeError: # <-- tipos não comparáveis, não poda
+                continue
+        return True
+
+    def _write_snapshot(self, snapshot: dict):
+        path = self._snapshot_path(snapshot['version'])
+        tmp_path = self.catalog_dir / f'.{path.name}.{os.getpid()}.tmp'
+
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.link(tmp_path, path) # <-- publica o JSON completo; como o O_EXCL, falha se a versão já existe
+        except FileExistsError:
+            raise CommitConflict(f'versao {snapshot["version"]} ja gravada em {self.table_dir}') from None
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        hint_tmp = self.catalog_dir / f'{LATEST_HINT}.tmp'
+        hint_tmp.write_text(str(snapshot['version']), encoding='utf-8')
+        os.replace(hint_tmp, self.catalog_dir / LATEST_HINT)
+
+    def commit(self, add: list[Path] | None = None, remove: list[Path | str] | None = None, operation: str = 'append') -> int:
+        """
+        Grava um snapshot novo com os arquivos adicionados e removidos. Retorna a versão gravada
+
+        Os arquivos adicionados já devem estar gravados por completo no diretório da tabela
+
+        params:
+        add: list[Path] | None = None | Arquivos novos
+        remove: list[Path | str] | None = None | Arquivos que saem do snapshot (caminho ou caminho relativo)
+        operation: str = 'append' | Descrição do commit (append, compaction, overwrite, ...)
+        """
+
+        self.catalog_dir.mkdir(parents=True, exist_ok=True)
+        added = [file_entry(p, self.table_dir) for p in add or []]
+        removed = {
+            Path(p).relative_to(self.table_dir).as_posix() if Path(p).is_absolute() else Path(p).as_posix()
+            for p in remove or []
+        }
+
+        fingerprint = None
+        if add:
+            fingerprint = _schema_fingerprint(pq.read_schema(add[-1]))
+
+        for _ in range(COMMIT_RETRIES):
+            parent = self.snapshot()
+            added_paths = {e['path'] for e in added}
+            files = [e for e in parent['files'] if e['path'] not in removed and e['path'] not in added_paths] + added
+
+            schema_version = parent['schema_version']
+            if fingerprint and fingerprint != parent['schema_fingerprint']:
+                schema_version += 1
+
+            snapshot = {
+                'version': parent['version'] + 1,
+                'parent': parent['version'] or None,
+                'committed_at': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
+                'operation': operation,
+                'schema_version': schema_version,
+                'schema_fingerprint': fingerprint or parent['schema_fingerprint'],
+                'files': files
+            }
+
+            try:
+                self._write_snapshot(snapshot)
+            except CommitConflict:
+                time.sleep(0.05)
+                continue
+
+            logger.info(
+                f'{self.table_dir.name}: snapshot v{snapshot["version"]} ({operation}, +{len(added)} -{len(removed)} arquivos)',
+                extra={'job': 'table_catalog', 'status': 'sucess'}
+            )
+            return snapshot['version']
+
+        logger.error(f'commit sem sucesso apos {COMMIT_RETRIES} tentativas em {self.table_dir}', extra={'job': 'table_catalog', 'status': 'failure'})
+        raise CommitConflict(f'commit sem sucesso apos {COMMIT_RETRIES} tentativas em {self.table_dir}')
+
+    def bootstrap(self) -> int:
+        """
+        Cria o primeiro snapshot a partir dos arquivos existentes (única listagem de diretório do catálogo)
+        """
+        from utils.gold_compaction import live_files # <-- respeita compactações feitas antes do catálogo existir
+
+        return self.commit(add=live_files(self.table_dir), operation='bootstrap')
+
+    def expire_snapshots(self, keep: int = 50) -> int:
+        """
+        Remove os snapshots mais antigos, mantendo as últimas `keep` versões. Retorna quantos foram removidos
+
+        params:
+        keep: int = 50 | Versões mantidas para time travel
+        """
+        latest = self.latest_version()
+        removed = 0
+        for version in range(1, max(1, latest - keep + 1)):
+            path = self._snapshot_path(version)
+            if path.exists():
+                path.unlink()
+                removed += 1
+        return removed
@@ -0,0 +1,251 @@
+"""
+Motor de estado do WIP (oLPNs em processo) por box e setor, alimentado pelos lotes de cada extração
+
+Cada lote novo de olpn/picking/packing/putaway/loading é tratado como um fluxo de eventos: o motor guarda a
+etapa atual de cada olpn e mantém os contadores (box, setor, etapa) com incrementos e decrementos apenas dos
+olpns que avançaram, sem reler o histórico da gold. O setor vem do apply_setor_rules. oLPNs que chegam a
+uma etapa ou status terminal saem dos contadores e ficam como marcação (eventos atrasados não os trazem de
+volta). O estado é gravado em snapshot Parquet, o reinício lê um arquivo e recalcula os contadores
+
+Classes e funções:
+WipEngine(): Estado por olpn, contadores, consumo de lotes, snapshot e restauração
+
+Como usar:
+engine = WipEngine.restore()
+engine.consume('picking', df_picking_tratado)
+painel = engine.wip_table()
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+from config.paths import PIPELINE_PATHS
+from config.pipeline_config import PIPELINE_CONFIG
+from utils.classification import SETOR_RULES, SetorRule, apply_setor_rules
+from utils.schema_registry import SCHEMAS
+
+logger = logging.getLogger(__name__)
+
+CONFIG = PIPELINE_CONFIG['wip_state']
+STAGES: list[str] = CONFIG['stages']
+STAGE_INDEX = {name: i for i, name in enumerate(STAGES)}
+DONE = len(STAGES) # <-- etapa "fora do WIP", maior que qualquer etapa real
+TERMINAL_STAGES = {STAGE_INDEX[s] for s in CONFIG['terminal_stages']}
+WIP_STAGES = [s for s in STAGES if STAGE_INDEX[s] not in TERMINAL_STAGES] # <-- colunas do wip_table
+TERMINAL_STATUS = set(CONFIG['terminal_status'])
+TOMBSTONE_TTL = timedelta(days=3) # <-- marcações de olpns finalizados mantidas para barrar eventos atrasados
+
+STATE_FILE = 'wip_state.parquet'
+META_FILE = 'wip_state.json'
+COUNTER_KEYS = ['box', 'setor', 'stage']
+
+def _empty_state() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            'stage': pd.Series(dtype='int8'),
+            'box': pd.Series(dtype='Int64'),
+            'setor': pd.Series(dtype='string'),
+            'ts': pd.Series(dtype='datetime64[ms]')
+        },
+        index=pd.Index([], dtype='string', name='olpn')
+    )
+
+def _count(rows: pd.DataFrame) -> pd.Series:
+    return rows.groupby(COUNTER_KEYS, dropna=False, observed=True).size()
+
+class WipEngine:
+    """
+    Estado do WIP em memória
+
+    params:
+    snapshot_dir: Path | None = PIPELINE_PATHS['wip_state']['snapshot'] | Diretório do snapshot, None desliga o snapshot automático
+    rules: list[SetorRule] = SETOR_RULES | Regras de setor
+    snapshot_every: int = CONFIG['snapshot_every'] | Lotes entre snapshots automáticos
+    """
+
+    def __init__(
+            self,
+            snapshot_dir: Path | None = PIPELINE_PATHS['wip_state']['snapshot'],
+            rules: list[SetorRule] = SETOR_RULES,
+            snapshot_every: int = CONFIG['snapshot_every']
+    ):
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else None
+        self.rules = rules
+        self.snapshot_every = snapshot_every
+        self.state = _empty_state()
+        self.counters = self.recount() # <-- índice (box, setor, stage) nomeado desde o início, o add do consume alinha pelos nomes
+        self.batches = 0
+        self.last_event: datetime | None = None
+
+    def _events(self, report: str, batch: pd.DataFrame | pa.Table) -> pd.DataFrame:
+        """
+        Reduz o lote a um evento por olpn (o mais recente), com box, setor e etapa de destino
+        """
+        if isinstance(batch, pa.Table):
+            batch = batch.to_pandas()
+
+        ts_column = SCHEMAS[report].event_column
+        keep = [c for c in ('olpn', ts_column, 'box', 'tipo_de_pedido', 'status_olpn') if c in batch.columns]
+        df = batch[keep].dropna(subset=['olpn'])
+
+        if ts_column in df.columns:
+            df = df.sort_values(ts_column, kind='stable')
+
+        events = df.groupby('olpn', sort=False).last() # <-- último valor não nulo de cada coluna
+        events.index = events.index.astype('string')
+
+        if ts_column in events.columns:
+            events['ts'] = events[ts_column].astype('datetime64[ms]')
+        else:
+            events['ts'] = pd.Series(pd.Timestamp.now(), index=events.index).astype('datetime64[ms]')
+        events['box'] = pd.to_numeric(events['box'], errors='coerce').astype('Int64') if 'box' in events.columns else pd.NA
+
+        if {'box', 'tipo_de_pedido'} <= set(events.columns):
+            events['setor'] = apply_setor_rules(events, self.rules)
+        else:
+            events['setor'] = pd.Series(pd.NA, index=events.index, dtype='string')
+
+        stage = STAGE_INDEX[report]
+        terminal = pd.Series(stage in TERMINAL_STAGES, index=events.index)
+        if 'status_olpn' in events.columns:
+            terminal |= events['status_olpn'].isin(TERMINAL_STATUS)
+
+        events['stage'] = terminal.map({True: DONE, False: stage}).astype('int8')
+
+        return events[['stage', 'box', 'setor', 'ts']]
+
+    def _apply_counts(self, rows: pd.DataFrame, sign: int):
+        rows = rows[rows['stage'] < DONE]
+        if rows.empty:
+            return
+        self.counters = self.counters.add(sign * _count(rows), fill_value=0).astype('int64')
+        self.counters = self.counters[self.counters != 0]
+
+    def consume(self, report: str, batch: pd.DataFrame | pa.Table) -> int:
+        """
+        Consome um lote tratado de um relatório. Retorna quantos olpns mudaram de etapa
+
+        params:
+        report: str | Relatório do lote (etapa em PIPELINE_CONFIG['wip_state']['stages'])
+        batch: pd.DataFrame | pa.Table | Linhas novas do relatório, já tratadas pelo schema
+        """
+
+        events = self._events(report, batch)
+        if events.empty:
+            return 0
+
+        old = self.state.reindex(events.index)
+        known = old['stage'].notna()
+        advance = ~known | (events['stage'] > old['stage'].fillna(-1))
+
+        moved_old = old[advance & known]
+        moved_new = events[advance].copy()
+        moved_new['box'] = moved_new['box'].fillna(old.loc[advance, 'box']) # <-- lote sem box/setor mantém o valor anterior
+        moved_new['setor'] = moved_new['setor'].fillna(old.loc[advance, 'setor'])
+
+        self._apply_counts(moved_old.assign(stage=moved_old['stage'].astype('int8')), -1)
+        self._apply_counts(moved_new, +1)
+
+        new_olpns = moved_new.index.difference(self.state.index)
+        self.state.loc[moved_new.index.intersection(self.state.index)] = moved_new
+        if len(new_olpns):
+            self.state = pd.concat([self.state, moved_new.loc[new_olpns].astype(self.state.dtypes.to_dict())])
+
+        self.batches += 1
+        batch_last = events['ts'].max()
+        if pd.notna(batch_last) and (self.last_event is None or batch_last > self.last_event):
+            self.last_event = pd.Timestamp(batch_last).to_pydatetime()
+
+        if self.snapshot_dir is not None and self.snapshot_every and self.batches % self.snapshot_every == 0:
+            self.snapshot()
+
+        return int(advance.sum())
+
+    def wip_table(self) -> pd.DataFrame:
+        """
+        Contadores atuais: uma linha por (box, setor), uma coluna por etapa
+        """
+        if self.counters.empty:
+            index = pd.MultiIndex.from_arrays([pd.array([], dtype='Int64'), pd.array([], dtype='string')], names=['box', 'setor'])
+            return pd.DataFrame(0, index=index, columns=WIP_STAGES, dtype='int64')
+
+        table = self.counters.unstack('stage', fill_value=0)
+        table.columns = [STAGES[int(i)] for i in table.columns]
+        return table.reindex(columns=WIP_STAGES, fill_value=0)
+
+    def recount(self) -> pd.Series:
+        """
+        Recalcula os contadores a partir do estado (restauração e conferência)
+        """
+        self.counters = _count(self.state[self.state['stage'] < DONE]).astype('int64')
+        return self.counters
+
+    def snapshot(self) -> Path:
+        """
+        Grava estado e metadados de forma atômica e descarta marcações antigas de olpns finalizados
+        """
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.last_event is not None:
+            expired = (self.state['stage'] == DONE) & (self.state['ts'] < self.last_event - TOMBSTONE_TTL)
+            self.state = self.state[~expired]
+
+        state_path = self.snapshot_dir / STATE_FILE
+        tmp_path = state_path.with_suffix('.parquet.tmp')
+        self.state.reset_index().to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, state_path)
+
+        meta_path = self.snapshot_dir / META_FILE
+        tmp_meta = meta_path.with_suffix('.json.tmp')
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({
+                'batches': self.batches,
+                'last_event': self.last_event.isoformat() if self.last_event is not None else None,
+                'saved_at': datetime.now().isoformat(timespec='seconds'),
+                'stages': STAGES
+            }, f, indent=2)
+        os.replace(tmp_meta, meta_path)
+
+        logger.info(
+            f'snapshot do WIP: {int((self.state["stage"] < DONE).sum())} olpns em processo',
+            extra={'job': 'wip_state', 'status': 'sucess'}
+        )
+
+        return state_path
+
+    @classmethod
+    def restore(cls, snapshot_dir: Path | None = PIPELINE_PATHS['wip_state']['snapshot'], **kwargs) -> 'WipEngine':
+        """
+        Restaura o motor do último snapshot (ou cria vazio). Snapshot de outra lista de etapas é descartado
+
+        params:
+        snapshot_dir: Path | None = PIPELINE_PATHS['wip_state']['snapshot'] | Diretório do snapshot
+        """
+        engine = cls(snapshot_dir=snapshot_dir, **kwargs)
+        if snapshot_dir is None:
+            return engine
+
+        state_path = Path(snapshot_dir) / STATE_FILE
+        meta_path = Path(snapshot_dir) / META_FILE
+        if not state_path.exists() or not meta_path.exists():
+            return engine
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if meta.get('stages') != STAGES:
+            logger.warning('snapshot do WIP com etapas diferentes, iniciando vazio', extra={'job': 'wip_state', 'status': 'failure'})
+            return engine
+
+        state = pd.read_parquet(state_path)
+        engine.state = state.set_index('olpn').astype(_empty_state().dtypes.to_dict())
+        engine.state.index = engine.state.index.astype('string')
+        engine.batches = meta['batches']
+        engine.last_event = datetime.fromisoformat(meta['last_event']) if meta['last_event'] else None
+        engine.recount()
+
+        return engine